@@ -1,12 +1,312 @@
-import json, os, time, traceback, threading, subprocess, sys
+import time, traceback
+import numpy as np
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
-    QSpinBox, QGroupBox, QFormLayout, 
-    QTableWidget, QTableWidgetItem
+    QSpinBox, QGroupBox, QFormLayout, QTableView
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
 from fleet_tab import _refresh_scheduled_fleets_list, save_scheduled_fleets
-from text import cantidad
+from text import cantidad, time_str
+from workers.debris_profit import RECYCLER, debris_profit
+from workers.flight import parse_coords
+from workers.galaxy_query import connect, debris_cursor
+from workers.galaxy_service import GalaxyScanWorker
+from workers.galaxy_targets import origins as planet_origins
+
+GALAXY_DB = "galaxy.db"
+DEBRIS_BATCH = 500
+
+# Columnas de galaxy_query.SQL_DEBRIS_ALL que guarda el modelo (scanned_at no se usa)
+DEBRIS_FIELDS = ("galaxy", "system", "position", "metal", "crystal", "deuterium", "total", "required_ships")
+# ...y lo que agrega debris_profit por fila: mejor origen, vuelo ida y vuelta, deuterio, netos por hora, recicladores
+PROFIT_FIELDS = ("origin", "seconds", "fuel", "per_hour", "recyclers")
+GALAXY, SYSTEM, POSITION, METAL, CRYSTAL, DEUTERIUM, TOTAL, SHIPS, ORIGIN, FLIGHT, FUEL, PER_HOUR, RECYCLERS = range(
+    len(DEBRIS_FIELDS) + len(PROFIT_FIELDS))
+
+# Opción del combo -> campo que tiene que ser > 0
+RESOURCE_FILTERS = {
+    "Todos": None,
+    "Metal": METAL,
+    "Crystal": CRYSTAL,
+    "Deuterium": DEUTERIUM,
+}
+
+# Valor numérico crudo de cada celda para ordenar (el texto viene abreviado: 1.5M)
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# ─────────────────────────────
+# Modelo
+# ─────────────────────────────
+
+def sort_key(row, field):
+    """Valor numérico de `field` para ordenar (None = coordenadas)"""
+    if field is None:
+        return (row[GALAXY] * 1000 + row[SYSTEM]) * 100 + row[POSITION]
+    return row[field] if row[field] is not None else float("-inf")
+
+class DebrisTableModel(QAbstractTableModel):
+    """
+    Escombros de galaxy.db leídos de a DEBRIS_BATCH filas desde un cursor ordenado por total:
+    la vista pide la tanda siguiente (fetchMore) recién al llegar al final del scroll.
+    Ordenar por otra columna lee lo que falta del cursor y ordena acá con list.sort, sin
+    pasar por lessThan del proxy fila por fila.
+    Cada tanda pasa por debris_profit (vectorizado) contra los orígenes de set_origins: el
+    orden por defecto es el del cursor, así Netos/h solo se calcula para las filas leídas.
+    """
+    HEADERS = ["Coordenadas", "Metal", "Crystal", "Deuterium", "Total", "Naves", "Origen", "Vuelo", "Deut.", "Netos/h"]
+    COLUMNS = [None, METAL, CRYSTAL, DEUTERIUM, TOTAL, SHIPS, ORIGIN, FLIGHT, FUEL, PER_HOUR]
+    CURSOR_ORDER = (4, Qt.SortOrder.DescendingOrder)  # el orden en que llegan las filas
+
+    def __init__(self, batch=DEBRIS_BATCH):
+        super().__init__()
+        self.batch = batch
+        self.rows = []
+        self.cursor = None
+        self.replaced = set()   # (g, s) aplicados por update_system mientras el cursor sigue abierto
+        self.pending = []       # filas de update_system que van después de lo leído del cursor
+        self.order = self.CURSOR_ORDER
+        self.origins = []       # [(nombre, (g, s, p))] de planets_data
+        self.fleet_speed = 1
+
+    def set_origins(self, origins, fleet_speed=1):
+        """Orígenes y velocidad de flota para las filas que se lean desde el próximo reload"""
+        self.origins = list(origins)
+        self.fleet_speed = fleet_speed
+
+    def with_profit(self, rows):
+        """Filas del cursor (tuplas) recortadas a DEBRIS_FIELDS, con las columnas de PROFIT_FIELDS al final"""
+        if not rows:
+            return []
+        rows = [r[:len(DEBRIS_FIELDS)] for r in rows]
+        if not self.origins:
+            return [r + (None,) * len(PROFIT_FIELDS) for r in rows]
+        galaxies, systems, positions, _, _, _, totals, ships = zip(*rows)
+        profit = debris_profit(
+            galaxies, systems, positions, totals, [n or 0 for n in ships],
+            [coords for _, coords in self.origins], fleet_speed=self.fleet_speed
+        )
+        columns = (profit["origin"], profit["seconds"], profit["fuel"].astype(np.int64), profit["per_hour"],
+                   profit["ships"].astype(np.int64))
+        return [r + extra for r, extra in zip(rows, zip(*(c.tolist() for c in columns)))]
+
+    def _from_cursor(self, rows):
+        """Filas del cursor sin los sistemas que ya reemplazó update_system (el cursor tiene la foto vieja)"""
+        if self.replaced:
+            rows = [r for r in rows if (r[0], r[1]) not in self.replaced]
+        return self.with_profit(rows)
+
+    def _close_cursor(self):
+        self.cursor.close()
+        self.cursor = None
+        self.replaced = set()
+
+    def _read_rest(self):
+        rows = self._from_cursor(self.cursor.fetchall()) + self.pending
+        self.pending = []
+        self._close_cursor()
+        return rows
+
+    def _sort_field(self):
+        column, order = self.order
+        return self.COLUMNS[column], order == Qt.SortOrder.DescendingOrder
+
+    def _sort_rows(self):
+        field, descending = self._sort_field()
+        self.rows.sort(key=lambda r: sort_key(r, field), reverse=descending)
+
+    def reload(self, cursor):
+        """
+        Reemplaza los datos por los de `cursor`. En el orden del cursor no lee ninguna fila
+        (las pide la vista); en otro orden lee y ordena todo antes de avisar a la vista.
+        """
+        self.beginResetModel()
+        try:
+            if self.cursor is not None:
+                self._close_cursor()
+            self.rows = []
+            self.pending = []
+            self.cursor = cursor
+            if self.order != self.CURSOR_ORDER:
+                self.rows = self._read_rest()
+                self._sort_rows()
+        finally:
+            self.endResetModel()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.order = (column, order)
+        if self.order != self.CURSOR_ORDER and self.cursor is not None:
+            # Con otro orden las tandas que faltan no caerían al final: leer todo antes
+            self.beginResetModel()
+            try:
+                self.rows.extend(self._read_rest())
+                self._sort_rows()
+            finally:
+                self.endResetModel()
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._sort_rows()
+        self.layoutChanged.emit()
+
+    def update_system(self, galaxy, system, debris):
+        """
+        Aplica los escombros de un sistema recién guardado (el payload de system_done) sin
+        volver a consultar galaxy.db: una fila que cambió sin moverse de lugar avisa
+        dataChanged, las nuevas o las que cambian de lugar entran con beginInsertRows en su
+        posición del orden actual y las que ya no están salen con beginRemoveRows. La vista
+        conserva la selección y el scroll.
+        Con el cursor todavía abierto, el sistema deja de tomarse del cursor y las filas que
+        caen más allá de lo leído esperan en `pending` a la tanda que les corresponde.
+        """
+        new = {r[POSITION]: r for r in self.with_profit([
+            (d["galaxy"], d["system"], d["position"], d["metal"], d["crystal"], d["deuterium"],
+             d["metal"] + d["crystal"] + d["deuterium"], d["requiredShips"])
+            for d in debris
+        ])}
+        if self.cursor is not None:
+            self.replaced.add((galaxy, system))
+        self.pending = [r for r in self.pending if (r[GALAXY], r[SYSTEM]) != (galaxy, system)]
+
+        field, _ = self._sort_field()
+        moved = []
+        for i in reversed(range(len(self.rows))):
+            r = self.rows[i]
+            if r[GALAXY] != galaxy or r[SYSTEM] != system:
+                continue
+            updated = new.pop(r[POSITION], None)
+            if updated is not None and sort_key(updated, field) == sort_key(r, field):
+                self.rows[i] = updated
+                self.dataChanged.emit(self.index(i, 0), self.index(i, len(self.HEADERS) - 1))
+                continue
+            self.beginRemoveRows(QModelIndex(), i, i)
+            del self.rows[i]
+            self.endRemoveRows()
+            if updated is not None:
+                moved.append(updated)
+        for r in moved + list(new.values()):
+            self._insert(r)
+
+    def _insert(self, row):
+        field, descending = self._sort_field()
+        key = sort_key(row, field)
+        at = len(self.rows)
+        for i, r in enumerate(self.rows):
+            other = sort_key(r, field)
+            if (other < key) if descending else (other > key):
+                at = i
+                break
+        if at == len(self.rows) and self.cursor is not None:
+            self.pending.append(row)
+            return
+        self.beginInsertRows(QModelIndex(), at, at)
+        self.rows.insert(at, row)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.cursor is not None
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self.cursor is None:
+            return
+        rows = []
+        while not rows and self.cursor is not None:
+            raw = self.cursor.fetchmany(self.batch)
+            rows = self._from_cursor(raw)
+            if len(raw) < self.batch:
+                self._close_cursor()
+            if self.pending:
+                # Las filas de update_system que ya entran en esta tanda (el cursor va por total)
+                limit = raw[-1][TOTAL] if raw and self.cursor is not None else float("-inf")
+                rows += [r for r in self.pending if r[TOTAL] >= limit]
+                self.pending = [r for r in self.pending if r[TOTAL] < limit]
+                rows.sort(key=lambda r: r[TOTAL], reverse=True)
+        if not rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def debris(self, row):
+        """
+        La fila como dict, en el formato de las misiones de reciclaje, con el mejor origen
+        (coordenadas) y los recicladores que calculó debris_profit (None sin orígenes)
+        """
+        r = self.rows[row]
+        return {
+            "galaxy": r[GALAXY], "system": r[SYSTEM], "position": r[POSITION],
+            "metal": r[METAL], "crystal": r[CRYSTAL], "deuterium": r[DEUTERIUM],
+            "requiredShips": r[SHIPS],
+            "origin": self.origins[r[ORIGIN]][1] if r[ORIGIN] is not None else None,
+            "recyclers": r[RECYCLERS],
+        }
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self.rows[index.row()]
+        field = self.COLUMNS[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if field is None:
+                return f"{r[GALAXY]}:{r[SYSTEM]}:{r[POSITION]}"
+            if field == SHIPS:
+                return str(r[SHIPS]) if r[SHIPS] is not None else "?"
+            if r[field] is None:
+                return "—"
+            if field == ORIGIN:
+                return self.origins[r[ORIGIN]][0]
+            if field == FLIGHT:
+                return time_str(r[FLIGHT])
+            return cantidad(r[field])
+        if role == SORT_ROLE:
+            return sort_key(r, field)
+        if role == Qt.ItemDataRole.TextAlignmentRole and field not in (None, ORIGIN):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.UserRole:
+            return self.debris(index.row())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+class DebrisFilterProxy(QSortFilterProxyModel):
+    """
+    Filtra por galaxia y recurso sin tocar el modelo ni la vista. El orden lo resuelve
+    DebrisTableModel.sort: el proxy solo reenvía el pedido y conserva el orden de origen.
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.galaxy = None
+        self.resource = None
+        self.setSortRole(SORT_ROLE)
+        self.setSourceModel(model)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.model.sort(column, order)
+
+    def set_filters(self, galaxy, resource):
+        self.galaxy = galaxy
+        self.resource = resource
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        r = self.model.rows[source_row]
+        if self.galaxy is not None and r[GALAXY] != self.galaxy:
+            return False
+        return self.resource is None or r[self.resource] > 0
+
+# ─────────────────────────────
+# Pestaña
+# ─────────────────────────────
 
 def create_debris_tab(self):
     """Crea la pestaña para mostrar debris y programar reciclajes"""
@@ -47,29 +347,32 @@ def create_debris_tab(self):
     load_single_galaxy_btn.setStyleSheet(style_button)
     load_single_galaxy_btn.clicked.connect(lambda: load_selected_galaxy(self))
     load_buttons_layout.addWidget(load_single_galaxy_btn)
+
+    self.debris_cancel_btn = QPushButton("⏹ Cancelar Escaneo")
+    self.debris_cancel_btn.setStyleSheet(style_button)
+    self.debris_cancel_btn.setEnabled(False)
+    self.debris_cancel_btn.clicked.connect(lambda: cancel_galaxy_scan(self))
+    load_buttons_layout.addWidget(self.debris_cancel_btn)
     
-    load_buttons_layout.addStretch()
-    debris_layout.addLayout(load_buttons_layout)
-    
-    load_all_json_btn = QPushButton("📄 Cargar desde JSONs (Todas)")
-    load_all_json_btn.setStyleSheet(style_button)
-    load_all_json_btn.clicked.connect(lambda: load_debris_data(self))
-    load_buttons_layout.addWidget(load_all_json_btn)
-    
-    load_single_json_btn = QPushButton("📄 Recargar desde JSON")
-    load_single_json_btn.setStyleSheet(style_button)
-    load_single_json_btn.clicked.connect(lambda: load_debris_data(self))
-    load_buttons_layout.addWidget(load_single_json_btn)
+    load_db_btn = QPushButton(f"🗄️ Recargar desde {GALAXY_DB}")
+    load_db_btn.setStyleSheet(style_button)
+    load_db_btn.clicked.connect(lambda: load_debris_data(self))
+    load_buttons_layout.addWidget(load_db_btn)
     
     load_buttons_layout.addStretch()
     debris_layout.addLayout(load_buttons_layout)
     
-    # Tabla de debris
-    self.debris_table = QTableWidget()
-    self.debris_table.setColumnCount(7)
-    self.debris_table.setHorizontalHeaderLabels(["Coordenadas", "Metal", "Crystal", "Deuterium", "Total", "Naves", ""])
+    # Tabla de debris (modelo -> proxy de filtros/orden -> vista)
+    self.debris_model = DebrisTableModel()
+    self.debris_proxy = DebrisFilterProxy(self.debris_model)
+    self.debris_table = QTableView()
+    self.debris_table.setModel(self.debris_proxy)
     self.debris_table.setSelectionBehavior(self.debris_table.SelectionBehavior.SelectRows)
     self.debris_table.setSelectionMode(self.debris_table.SelectionMode.MultiSelection)
+    self.debris_table.setSortingEnabled(True)
+    self.debris_table.sortByColumn(*DebrisTableModel.CURSOR_ORDER)
+    self.debris_table.verticalHeader().setDefaultSectionSize(22)
+    self.debris_table.verticalHeader().hide()  # con miles de filas el header numerado es lo más caro de cada filtro
     self.debris_table.horizontalHeader().setStretchLastSection(False)
     self.debris_table.setColumnWidth(0, 100)
     self.debris_table.setColumnWidth(1, 120)
@@ -77,7 +380,10 @@ def create_debris_tab(self):
     self.debris_table.setColumnWidth(3, 120)
     self.debris_table.setColumnWidth(4, 120)
     self.debris_table.setColumnWidth(5, 70)
-    self.debris_table.setColumnWidth(6, 30)
+    self.debris_table.setColumnWidth(6, 110)
+    self.debris_table.setColumnWidth(7, 80)
+    self.debris_table.setColumnWidth(8, 80)
+    self.debris_table.setColumnWidth(9, 100)
     debris_layout.addWidget(QLabel("🎯 Debris Detectados:"))
     debris_layout.addWidget(self.debris_table)
     
@@ -97,12 +403,15 @@ def create_debris_tab(self):
     filters_form.addRow("Galaxia:", self.debris_galaxy)
     
     filters_group.setLayout(filters_form)
+    self.debris_resource_type.currentIndexChanged.connect(lambda: apply_debris_filters(self))
+    self.debris_galaxy.valueChanged.connect(lambda: apply_debris_filters(self))
+    apply_debris_filters(self)
     debris_layout.addWidget(filters_group)
     
     # Botones de acción
     actions_layout = QHBoxLayout()
     
-    refresh_btn = QPushButton("🔄 Actualizar Filtros")
+    refresh_btn = QPushButton("🔄 Actualizar Lista")
     refresh_btn.setStyleSheet("""
         QPushButton {
             background-color: #4a6a0a;
@@ -141,253 +450,177 @@ def create_debris_tab(self):
     debris_widget.setLayout(debris_layout)
     
     # Data
-    self.debris_data = []
-    
-    return debris_widget
+    self.debris_db = None
+    self.galaxy_scan_thread = None
+    self.galaxy_scan_worker = None
 
-def extract_debris_list(galaxy_data: dict):
-    debris_list = []
+    return debris_widget
 
-    for g, systems in galaxy_data.items():
-        # Verificar que systems es un diccionario
-        if not isinstance(systems, dict):
-            continue
-            
-        for s, positions in systems.items():
-            # Verificar que positions es un diccionario
-            if not isinstance(positions, dict):
-                continue
-                
-            for pos, entry in positions.items():
-                # Verificar que entry es un diccionario
-                if not isinstance(entry, dict):
-                    continue
-                    
-                debris = entry.get("debris")
-                if not debris:
-                    continue
-
-                try:
-                    debris_list.append({
-                        "galaxy": int(g),
-                        "system": int(s),
-                        "position": int(pos),
-                        "metal": int(debris.get("metal", 0)) if isinstance(debris, dict) else 0,
-                        "crystal": int(debris.get("crystal", 0)) if isinstance(debris, dict) else 0,
-                        "deuterium": int(debris.get("deuterium", 0)) if isinstance(debris, dict) else 0,
-                        "requiredShips": debris.get("requiredShips") if isinstance(debris, dict) else None
-                    })
-                except (ValueError, TypeError, AttributeError):
-                    # Ignorar entries con datos malformados
-                    continue
-
-    return debris_list
+def debris_connection(self):
+    """Conexión de solo lectura a galaxy.db, abierta la primera vez que se necesita"""
+    if self.debris_db is None:
+        self.debris_db = connect(GALAXY_DB)
+    return self.debris_db
 
 def load_debris_data(self):
-    """Carga datos de debris desde los archivos galaxy_data_g*.json"""
+    """Recarga la tabla de debris desde galaxy.db"""
     try:
-        combined_data = {}
-        files_loaded = 0
-        
-        # Cargar datos de todas las galaxias
-        for g in range(1, 6):
-            galaxy_file = f"galaxy_data_g{g}.json"
-            if os.path.isfile(galaxy_file):
-                try:
-                    with open(galaxy_file, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        if isinstance(data, dict):
-                            combined_data.update(data)
-                            files_loaded += 1
-                            print(f"✅ Cargado {galaxy_file} ({len(data)} entradas)")
-                except Exception as e:
-                    print(f"⚠️ Error cargando {galaxy_file}: {e}")
-        
-        if not combined_data:
-            self._notif_label.setText("⚠️ No se encontraron archivos de galaxia o están vacíos")
-            return
-        
-        print(f"📊 Total de archivos cargados: {files_loaded}")
-        print(f"📊 Total de entradas: {len(combined_data)}")
-        
-        # Extraer lista de debris
-        self.debris_data = extract_debris_list(combined_data)
-        
-        # Ordenar por cantidad de metal descendente
-        self.debris_data.sort(key=lambda x: x.get("metal", 0), reverse=True)
-        
-        self._notif_label.setText(f"✅ Cargados {len(self.debris_data)} puntos de debris de {files_loaded} archivo(s)")
-        print(f"✅ Debris extraído: {len(self.debris_data)} puntos")
+        start = time.perf_counter()
         refresh_debris_list(self)
-        
+        elapsed = (time.perf_counter() - start) * 1000
+        self._notif_label.setText(f"✅ Debris de {GALAXY_DB} recargados ({elapsed:.0f} ms)")
+        print(f"✅ Debris desde {GALAXY_DB} en {elapsed:.0f} ms")
     except Exception as e:
         self._notif_label.setText(f"❌ Error cargando debris: {str(e)}")
         print(f"❌ Error: {e}")
         traceback.print_exc()
 
 def run_galaxy_worker_and_refresh(self, galaxy_only=None):
-    """Ejecuta galaxy_worker.py en una consola separada para obtener datos de galaxia
-    
+    """Escanea galaxias en segundo plano (GalaxyScanWorker) y actualiza los debris a medida que llegan
+
     Args:
         galaxy_only: Si es None, escanea todas las galaxias (1-5). Si es un número, escanea solo esa galaxia.
     """
+    if self.galaxy_scan_thread is not None:
+        self._notif_label.setText("⚠️ Ya hay un escaneo en curso")
+        return
+
     try:
-        self._notif_label.setText("🔄 Abriendo consola para explorar galaxias...")        
-        
-        def run_galaxy_workers_subprocess():
-            try:
-                galaxies_to_scan = [galaxy_only] if galaxy_only else range(1, 6)
-                
-                for galaxy_num in galaxies_to_scan:
-                    try:
-                        # Ejecutar galaxy_worker.py con argumento del número de galaxia
-                        if sys.platform == "win32":
-                            subprocess.Popen(
-                                [sys.executable, "galaxy_worker.py", str(galaxy_num)],
-                                creationflags=subprocess.CREATE_NEW_CONSOLE
-                            )
-                        else:
-                            # Para otros sistemas operativos
-                            subprocess.Popen([sys.executable, "galaxy_worker.py", str(galaxy_num)])
-                        
-                        print(f"[DEBUG] Galaxia {galaxy_num} lanzada en consola separada")
-                        
-                    except Exception as e:
-                        self._notif_label.setText(f"❌ Error lanzando galaxia {galaxy_num}: {str(e)}")
-                        print(f"[GalaxyWorker] Error en galaxia {galaxy_num}: {e}")
-                        traceback.print_exc()
-                
-                self._notif_label.setText("✅ Procesos GalaxyWorker lanzados en consolas separadas")
-                print("[GalaxyWorker] Todos los procesos han sido lanzados")
-                
-            except Exception as e:
-                self._notif_label.setText(f"❌ Error ejecutando GalaxyWorker: {str(e)}")
-                print(f"❌ Error: {e}")
-                traceback.print_exc()
-        
-        # Ejecutar en thread para no bloquear UI
-        thread = threading.Thread(target=run_galaxy_workers_subprocess, daemon=True)
-        thread.start()
-        
+        galaxies = [galaxy_only] if galaxy_only else list(range(1, 6))
+        target = str(galaxy_only) if galaxy_only else "1-5"
+        self._notif_label.setText(f"🔄 Escaneando galaxia(s) {target}...")
+
+        self.galaxy_scan_thread = QThread()
+        self.galaxy_scan_worker = GalaxyScanWorker(galaxies, db_path=GALAXY_DB)
+        self.galaxy_scan_worker.moveToThread(self.galaxy_scan_thread)
+
+        # Conectar señales
+        self.galaxy_scan_thread.started.connect(self.galaxy_scan_worker.run)
+        self.galaxy_scan_worker.finished.connect(self.galaxy_scan_thread.quit)
+        self.galaxy_scan_worker.finished.connect(self.galaxy_scan_worker.deleteLater)
+        self.galaxy_scan_thread.finished.connect(self.galaxy_scan_thread.deleteLater)
+        self.galaxy_scan_thread.finished.connect(lambda: _on_galaxy_scan_finished(self))
+        self.galaxy_scan_worker.progress.connect(lambda done, total: _on_galaxy_scan_progress(self, target, done, total))
+        self.galaxy_scan_worker.system_done.connect(lambda g, s, debris: _on_system_scanned(self, g, s, debris))
+        self.galaxy_scan_worker.success.connect(lambda summary: _on_galaxy_scan_success(self, summary))
+        self.galaxy_scan_worker.error.connect(lambda msg: _on_galaxy_scan_error(self, msg))
+
+        self.debris_cancel_btn.setEnabled(True)
+        self.galaxy_scan_thread.start()
+
     except Exception as e:
+        self.galaxy_scan_thread = None
+        self.galaxy_scan_worker = None
         self._notif_label.setText(f"❌ Error ejecutando GalaxyWorker: {str(e)}")
         print(f"❌ Error: {e}")
         traceback.print_exc()
 
+def cancel_galaxy_scan(self):
+    """Detiene el escaneo en curso después de los sistemas que se están pidiendo"""
+    if self.galaxy_scan_worker is not None:
+        self.galaxy_scan_worker.cancel()
+        self.debris_cancel_btn.setEnabled(False)
+        self._notif_label.setText("⏹ Cancelando escaneo...")
+
+def _on_galaxy_scan_progress(self, target, done, total):
+    self._notif_label.setText(f"🔄 Escaneando galaxia(s) {target}: {done}/{total} sistemas")
+
+def _on_system_scanned(self, galaxy, system, debris):
+    """Un sistema ya guardado en galaxy.db: solo sus filas cambian en la tabla, sin reconsultar"""
+    self.debris_model.update_system(galaxy, system, debris)
+
+def _on_galaxy_scan_success(self, summary):
+    state = "cancelado" if summary["cancelled"] else "terminado"
+    self._notif_label.setText(
+        f"✅ Escaneo {state}: {summary['systems']} sistemas en {summary['elapsed']:.0f}s ({summary['writes']})"
+    )
+
+def _on_galaxy_scan_error(self, msg):
+    self._notif_label.setText(f"❌ Error en el escaneo: {msg}")
+    print(f"[DEBRIS] ❌ Error en el escaneo: {msg}")
+
+def _on_galaxy_scan_finished(self):
+    self.galaxy_scan_thread = None
+    self.galaxy_scan_worker = None
+    self.debris_cancel_btn.setEnabled(False)
+
 def load_selected_galaxy(self):
     """Carga solo la galaxia seleccionada en el filtro"""
     selected_galaxy = self.debris_galaxy.value()
     run_galaxy_worker_and_refresh(self, galaxy_only=selected_galaxy)
 
 def refresh_debris_list(self):
-    """Actualiza la tabla visual de debris aplicando filtros"""
-    self.debris_table.setRowCount(0)
-    
-    if not self.debris_data:
-        row = self.debris_table.rowCount()
-        self.debris_table.insertRow(row)
-        item = QTableWidgetItem("No hay datos de debris. Carga los archivos primero.")
-        self.debris_table.setItem(row, 0, item)
-        return
-    
-    resource_type = self.debris_resource_type.currentText()
-    target_galaxy = self.debris_galaxy.value()
-    
-    # Filtrar debris por galaxia y recurso
-    filtered = [
-        d for d in self.debris_data
-        if d.get("galaxy", 0) == target_galaxy
-    ]
-    
-    # Si no es "Todos", filtrar por tipo de recurso
-    if resource_type != "Todos":
-        if resource_type == "Metal":
-            filtered = [d for d in filtered if d.get("metal", 0) > 0]
-        elif resource_type == "Crystal":
-            filtered = [d for d in filtered if d.get("crystal", 0) > 0]
-        elif resource_type == "Deuterium":
-            filtered = [d for d in filtered if d.get("deuterium", 0) > 0]
-    
-    # Mostrar en la tabla
-    for debris in filtered:
-        g = debris.get("galaxy", 0)
-        s = debris.get("system", 0)
-        p = debris.get("position", 0)
-        metal = debris.get("metal", 0)
-        crystal = debris.get("crystal", 0)
-        deuterium = debris.get("deuterium", 0)
-        ships_needed = debris.get("requiredShips", "?")
-        
-        total_resources = metal + crystal + deuterium
-        
-        row = self.debris_table.rowCount()
-        self.debris_table.insertRow(row)
-        
-        # Columna 0: Coordenadas
-        coords_item = QTableWidgetItem(f"{g}:{s}:{p}")
-        self.debris_table.setItem(row, 0, coords_item)
-        
-        # Columna 1: Metal
-        metal_item = QTableWidgetItem(cantidad(metal))
-        metal_item.setData(Qt.ItemDataRole.UserRole, debris)  # Guardar el objeto debris
-        self.debris_table.setItem(row, 1, metal_item)
-        
-        # Columna 2: Crystal
-        crystal_item = QTableWidgetItem(cantidad(crystal))
-        self.debris_table.setItem(row, 2, crystal_item)
-        
-        # Columna 3: Deuterium
-        deut_item = QTableWidgetItem(cantidad(deuterium))
-        self.debris_table.setItem(row, 3, deut_item)
-        
-        # Columna 4: Total
-        total_item = QTableWidgetItem(cantidad(total_resources))
-        self.debris_table.setItem(row, 4, total_item)
-        
-        # Columna 5: Ships
-        ships_item = QTableWidgetItem(str(ships_needed))
-        self.debris_table.setItem(row, 5, ships_item)
-        
-        # Columna 6: Empty (para checkbox si lo necesitamos luego)
-        empty_item = QTableWidgetItem("")
-        self.debris_table.setItem(row, 6, empty_item)
+    """
+    Vuelve a consultar galaxy.db: el modelo toma un cursor nuevo (todas las galaxias,
+    ordenado por total con idx_debris_total) y la vista pide las filas a medida que scrollea.
+    La rentabilidad se recalcula con los planetas y la velocidad de flota actuales, tanda por
+    tanda; ordenada por otra columna (ej. netos/h) se leen y calculan todas las filas de una vez.
+    """
+    self.debris_model.set_origins(planet_origins(self.planets_data), self.fleet_speed_peaceful)
+    cursor = debris_cursor(debris_connection(self))
+    cursor.row_factory = None  # tuplas: el modelo accede por posición
+    self.debris_model.reload(cursor)
+    if self.debris_model.canFetchMore(QModelIndex()):
+        self.debris_model.fetchMore(QModelIndex())
+
+def apply_debris_filters(self):
+    """Galaxia y tipo de recurso se aplican en el proxy: no se recarga ni se redibuja nada más"""
+    self.debris_proxy.set_filters(
+        self.debris_galaxy.value(),
+        RESOURCE_FILTERS[self.debris_resource_type.currentText()]
+    )
+
+def origin_planet(planets_data, coords):
+    """(id, texto del combo de origen de flotas) del planeta de planets_data en `coords`, o None"""
+    for planet_id, pdata in planets_data.items():
+        try:
+            if parse_coords(pdata.get("coords", "")) == coords:
+                return planet_id, f"{pdata.get('name', 'Unknown')} ({pdata['coords']})"
+        except ValueError:
+            continue
+    return None
 
 def schedule_recycling_missions(self):
-    """Programa misiones de reciclaje para los debris seleccionados"""
+    """
+    Programa misiones de reciclaje para los debris seleccionados, cada una desde el origen
+    de la columna Origen y con los recicladores que usó el cálculo de Netos/h
+    """
     selected_rows = self.debris_table.selectionModel().selectedRows()
     
     if not selected_rows:
         self._notif_label.setText("⚠️ Selecciona al menos un punto de debris")
         return
     
-    origin_text = self.fleet_planet_combo.currentText()
-    if origin_text == "Seleccionar planeta...":
-        self._notif_label.setText("⚠️ Selecciona un planeta de origen")
-        return
-    
     # Crear misión de reciclaje para cada debris seleccionado
     missions_created = 0
+    without_origin = 0
     
-    for row in selected_rows:
-        # Obtener el debris desde la columna 1 (Metal) donde está guardado
-        item = self.debris_table.item(row, 1)
-        debris = item.data(Qt.ItemDataRole.UserRole) if item else None
+    for index in selected_rows:
+        debris = index.data(Qt.ItemDataRole.UserRole)
         if not debris:
             continue
+
+        origin = origin_planet(self.planets_data, debris["origin"]) if debris["origin"] else None
+        if origin is None:
+            without_origin += 1
+            continue
+        origin_id, origin_text = origin
         
         g = debris.get("galaxy", 0)
         s = debris.get("system", 0)
         p = debris.get("position", 0)
         coords = f"{g}:{s}:{p}"
+        recyclers = int(debris["recyclers"])
         
         # Crear entry de misión
         fleet_entry = {
             "id": len(self.scheduled_fleets),
             "mission": "Recolecta de escombros",
             "origin": origin_text,
+            "origin_id": origin_id,
             "destination": coords,
-            "ships": {"Reciclador": 1},  # Por defecto 1 reciclador
-            "total_ships": 1,
+            "ships": {RECYCLER: recyclers},
+            "total_ships": recyclers,
             "timing_type": "Enviar ahora",
             "scheduled_time": time.time(),
             "repeat_count": 1,
@@ -402,7 +635,10 @@ def schedule_recycling_missions(self):
     if missions_created > 0:
         _refresh_scheduled_fleets_list(self)
         save_scheduled_fleets(self.scheduled_fleets)
-        self._notif_label.setText(f"✅ {missions_created} misiones de reciclaje programadas")
+        skipped = f" ({without_origin} sin origen)" if without_origin else ""
+        self._notif_label.setText(f"✅ {missions_created} misiones de reciclaje programadas{skipped}")
+    elif without_origin:
+        self._notif_label.setText("⚠️ Sin origen calculado: carga tus planetas y actualiza la lista")
     
     # Limpiar selección
-    self.debris_table.selectionModel().clearSelection()
\ No newline at end of file
+    self.debris_table.selectionModel().clearSelection()
@@ -7,6 +7,10 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import QDateTime, QThread, pyqtSignal, QObject
 from workers.fleet_sender import send_scheduled_fleets
+from workers.galaxy_grid import (
+    GRID_PATH, HAS_PLANET, HAS_MOON, HAS_DEBRIS, INACTIVE, VACATION, BANNED, load_grid, slot_info
+)
+from text import cantidad
 
 class FleetSendWorker(QObject):
     """Worker para enviar flotas programadas sin bloquear la UI"""
@@ -108,6 +112,10 @@ def create_fleet_scheduler_panel(self):
     coords_layout.addWidget(QLabel("P:"))
     coords_layout.addWidget(self.fleet_dest_position)
     mission_form.addRow("Destino:", coords_layout)
+    self.fleet_dest_info = QLabel("")
+    mission_form.addRow("", self.fleet_dest_info)
+    for spin in (self.fleet_dest_galaxy, self.fleet_dest_system, self.fleet_dest_position):
+        spin.valueChanged.connect(lambda _: on_fleet_dest_changed(self))
     
     mission_group.setLayout(mission_form)
     scheduler_layout.addWidget(mission_group)
@@ -332,6 +340,26 @@ def on_fleet_origin_changed(self, origin_text):
     except (ValueError, IndexError):
         pass
 
+def on_fleet_dest_changed(self):
+    """Muestra qué hay en el destino según la grilla del scanner"""
+    info = slot_info(load_grid(GRID_PATH),
+                     self.fleet_dest_galaxy.value(), self.fleet_dest_system.value(), self.fleet_dest_position.value())
+    if info is None:
+        self.fleet_dest_info.setText("")
+        return
+
+    flags = info["flags"]
+    parts = []
+    if flags & HAS_PLANET:
+        state = "".join(tag for bit, tag in ((INACTIVE, " (i)"), (VACATION, " (v)"), (BANNED, " (b)")) if flags & bit)
+        parts.append(f"🪐 Jugador {info['player_id']}{state}")
+    if flags & HAS_MOON:
+        parts.append(f"🌙 {info['moon_size']} km")
+    if flags & HAS_DEBRIS:
+        parts.append(f"☄ {cantidad(info['metal'] + info['crystal'] + info['deuterium'])}")
+    age = int((time.time() - info["last_seen"]) // 60)
+    self.fleet_dest_info.setText(f"{' | '.join(parts) or 'Vacío'}  · visto hace {age} min")
+
 def on_fleet_timing_changed(self, timing_text):
     """Actualiza la UI según el tipo de envío seleccionado"""
     self.fleet_send_time.setEnabled(timing_text == "Programar hora específica")
@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import QApplication, QMainWindow
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtCore import QUrl
 from pathlib import Path
+from workers.galaxy_grid import GALAXIES, GRID_PATH, HAS_PLANET, HAS_MOON, HAS_DEBRIS, load_grid
 
 def galaxy_loader(NUM_G):
     # ---------------------------
@@ -86,6 +87,43 @@ def galaxy_loader(NUM_G):
             systems.append(planets)
         return systems
 
+    def load_systems_from_grid(grid):
+        # La grilla no guarda nombres: se muestran las coordenadas
+        g = int(NUM_G)
+        view = grid[g - 1]
+        systems = []
+
+        for sid in range(view.shape[0]):
+            flags = view["flags"][sid]
+            planets = []
+
+            for pos in np.nonzero(flags & (HAS_PLANET | HAS_DEBRIS))[0]:
+                slot = int(pos) + 1
+                coords = f"{NUM_G}:{sid + 1}:{slot}"
+                obj={
+                    "r": slot_to_radius(slot),
+                    "coords": coords,
+                    "phase": np.random.uniform(0, 2*np.pi),
+                    "has_moon": bool(flags[pos] & HAS_MOON),
+                    "has_debris": bool(flags[pos] & HAS_DEBRIS),
+                    "moon_phase": np.random.uniform(0, 2*np.pi)
+                }
+                if obj["has_debris"]:
+                    obj["name"] = "DEEP_SPACE"
+                    obj["metal"] = int(view["metal"][sid, pos])
+                    obj["crystal"] = int(view["crystal"][sid, pos])
+                    obj["deuterium"] = int(view["deuterium"][sid, pos])
+                if flags[pos] & HAS_PLANET:
+                    obj["name"] = coords
+                    if obj["has_moon"]:
+                        obj["moon_name"] = coords
+                        obj["moon_size"] = int(view["moon_size"][sid, pos])
+                else:
+                    obj["has_moon"] = False
+                planets.append(obj)
+            systems.append(planets)
+        return systems
+
     JS_CLICK = """
     <script>
     document.addEventListener("DOMContentLoaded", function () {
@@ -132,7 +170,8 @@ def galaxy_loader(NUM_G):
     # ---------------------------
     # Carga de datos
     # ---------------------------
-    systems = load_systems(JSON_PATH)
+    grid = load_grid(GRID_PATH) if int(NUM_G) <= GALAXIES else None
+    systems = load_systems_from_grid(grid) if grid is not None else load_systems(JSON_PATH)
     moon_sizes = []
     for system in systems:
         for p in system:
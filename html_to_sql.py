@@ -26,7 +26,8 @@ def init_db(conn):
         cargo_json TEXT,
         combat_json TEXT,
         espionage_json TEXT,
-        source_file TEXT
+        source_file TEXT,
+        resources_json TEXT
     );
 
     CREATE TABLE IF NOT EXISTS loot (
@@ -41,6 +42,11 @@ def init_db(conn):
     CREATE INDEX IF NOT EXISTS idx_messages_type ON messages(msg_type);
     """)
 
+    # Bases creadas antes de guardar los recursos de los informes de espionaje
+    columns = [row[1] for row in cur.execute("PRAGMA table_info(messages)")]
+    if "resources_json" not in columns:
+        cur.execute("ALTER TABLE messages ADD COLUMN resources_json TEXT")
+
     conn.commit()
 
 # ───────────────── Parsing helpers ─────────────────
@@ -77,6 +83,7 @@ def parse_message(msg, source_file):
     cargo = raw.get("data-raw-cargo")
     combat = raw.get("data-raw-result")
     espionage = raw.get("data-raw-research") or raw.get("data-raw-fleet")
+    resources = raw.get("data-raw-resources")
 
     message = (
         msg_id,
@@ -91,7 +98,8 @@ def parse_message(msg, source_file):
         cargo,
         combat,
         espionage,
-        source_file
+        source_file,
+        resources
     )
 
     loot = parse_loot(msg)
@@ -113,8 +121,8 @@ def process_html(conn, html_path):
         INSERT OR IGNORE INTO messages
         (id, msg_type, title, sender, date, timestamp,
          source_coords, target_coords, content,
-         cargo_json, combat_json, espionage_json, source_file)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+         cargo_json, combat_json, espionage_json, source_file, resources_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, data)
 
         for res, amount in loot:
@@ -286,6 +286,7 @@ class MainWindow(QMainWindow):
         self.last_fleet_update = 0
         self.fleet_slots = {"current": 0, "max": 0}
         self.exp_slots = {"current": 0, "max": 0}
+        self.fleet_speed_peaceful = 1
         
         # Envíos programados de naves
         self.scheduled_fleets = []
@@ -547,6 +548,12 @@ class MainWindow(QMainWindow):
         self.current_main_web_is_moon = planet_type == 'moon'
         self.current_main_web_planet_id = planet_id
 
+        # Velocidad de flota pacífica (transporte, despliegue, reciclaje): la usa la rentabilidad de debris
+        try:
+            self.fleet_speed_peaceful = max(int(speed_fleet_peaceful), 1)
+        except (TypeError, ValueError):
+            pass
+
         # Extraer recursos
         self.main_web.page().runJavaScript(extract_resources_script, lambda data: handle_main_web_resources(self, data))
 
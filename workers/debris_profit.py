@@ -0,0 +1,112 @@
+"""
+Rentabilidad de los escombros: recursos por hora de vuelo de recicladores.
+
+Para cada campo de escombros y cada uno de mis planetas (planets_data) calcula, todo con
+arrays de NumPy de forma (campos, orígenes):
+
+- distancia y duración del vuelo de ida y vuelta (flight.distances / flight_seconds, con
+  la velocidad de flota pacífica del universo que publica la página en sus <meta>);
+- recicladores: los `requiredShips` que informa el juego, o los que hacen falta por carga;
+- deuterio consumido, con la fórmula del juego
+  1 + round(naves * consumo * distancia / 35000 * (velocidad + 1)²);
+- recursos netos (lo que entra en las bodegas menos el deuterio) y netos por hora.
+
+Por campo se queda con el mejor origen. Sin tecnologías de motor: la velocidad de nave es
+la base de flight.SHIPS salvo que se pase la real.
+
+Uso (desde la raíz del repo):
+    python -m workers.debris_profit [--db galaxy.db] [--fleet-speed 4] [--speed 100] [--limit 20]
+"""
+import argparse, json, time
+import numpy as np
+from workers.flight import SHIPS, distances, flight_seconds
+from workers.galaxy_query import connect, debris_cursor
+from workers.galaxy_targets import origins as planet_origins
+
+RECYCLER = "Reciclador"
+
+def fuel_cost(dist, ships, consumption, speed_pct=1.0):
+    """Deuterio de un envío de `ships` naves iguales a distancia `dist` (escalares o arrays)."""
+    return 1 + np.round(ships * consumption * np.asarray(dist, dtype=np.float64) / 35000 * (speed_pct + 1) ** 2)
+
+def recyclers_needed(total, required_ships, capacity):
+    """Los requiredShips del juego cuando vienen (> 0); si no, los que hacen falta por carga."""
+    by_cargo = np.maximum(np.ceil(np.asarray(total, dtype=np.float64) / capacity), 1)
+    required = np.asarray(required_ships, dtype=np.float64)
+    return np.where(required > 0, required, by_cargo)
+
+def debris_profit(galaxies, systems, positions, totals, required_ships, origins,
+                  ship=RECYCLER, ship_speed=None, speed_pct=1.0, fleet_speed=1):
+    """
+    Mejor origen para cada campo. `origins` es una lista de (g, s, p); los campos vienen
+    como arrays paralelos (required_ships con 0 donde no se conoce). Retorna un dict de
+    arrays de largo len(galaxies): origin (índice en `origins`), distance, seconds (ida y
+    vuelta), ships, fuel, net y per_hour. Sin orígenes, origin es -1 y el resto NaN.
+    """
+    n = len(galaxies)
+    if not len(origins) or not n:
+        empty = np.full(n, np.nan)
+        return {"origin": np.full(n, -1), "distance": empty, "seconds": empty, "ships": empty,
+                "fuel": empty, "net": empty, "per_hour": empty}
+
+    base_speed, capacity, consumption = SHIPS[ship]
+    origin = np.asarray(origins, dtype=np.int64)
+
+    # (campos, 1) contra (1, orígenes): distances ya trabaja con arrays y difunde a (campos, orígenes)
+    dist = distances(
+        (origin[None, :, 0], origin[None, :, 1], origin[None, :, 2]),
+        np.asarray(galaxies)[:, None], np.asarray(systems)[:, None], np.asarray(positions)[:, None]
+    )
+    seconds = 2 * flight_seconds(dist, ship_speed or base_speed, speed_pct, fleet_speed)
+    totals = np.asarray(totals, dtype=np.float64)
+    ships = recyclers_needed(totals, required_ships, capacity)
+    fuel = fuel_cost(dist, ships[:, None], consumption, speed_pct)
+    net = np.minimum(totals, ships * capacity)[:, None] - fuel
+    per_hour = net / (seconds / 3600)
+
+    best = np.argmax(per_hour, axis=1)
+    rows = np.arange(n)
+    return {
+        "origin": best,
+        "distance": dist[rows, best],
+        "seconds": seconds[rows, best],
+        "ships": ships,
+        "fuel": fuel[rows, best],
+        "net": net[rows, best],
+        "per_hour": per_hour[rows, best],
+    }
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escombros ordenados por recursos netos por hora de reciclaje")
+    parser.add_argument("--db", default="galaxy.db")
+    parser.add_argument("--planets", default="planets_data.json")
+    parser.add_argument("--fleet-speed", type=int, default=1, help="velocidad de flota pacífica del universo")
+    parser.add_argument("--speed", type=int, default=100, help="porcentaje de velocidad del envío (10-100)")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.planets, "r", encoding="utf-8") as f:
+        named = planet_origins(json.load(f))
+    conn = connect(args.db)
+    fields = debris_cursor(conn).fetchall()
+
+    start = time.perf_counter()
+    profit = debris_profit(
+        [r["galaxy"] for r in fields], [r["system"] for r in fields], [r["position"] for r in fields],
+        [r["total"] for r in fields], [r["required_ships"] or 0 for r in fields],
+        [coords for _, coords in named], speed_pct=args.speed / 100, fleet_speed=args.fleet_speed
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"[PROFIT] {len(fields)} campos x {len(named)} orígenes en {elapsed:.1f} ms")
+
+    for i in np.argsort(-profit["per_hour"])[:args.limit]:
+        r = fields[i]
+        name, coords = named[profit["origin"][i]]
+        print(f"  {r['galaxy']}:{r['system']}:{r['position']}  total {r['total']:>12,}  desde {name} {coords}  "
+              f"{profit['seconds'][i] / 60:6.1f} min  {int(profit['ships'][i])} rec  "
+              f"{int(profit['fuel'][i]):>7,} deut  {profit['per_hour'][i]:>14,.0f}/h")
+    conn.close()
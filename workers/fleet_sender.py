@@ -4,7 +4,8 @@ Estrategia de token AJAX: Se obtiene de cualquier endpoint API exitoso
 """
 import requests, time, json, traceback
 from datetime import datetime
-from workers.new_galaxy_worker import load_ogame_session
+from workers.session_manager import session_manager
+from workers.rate_limiter import GAME_LIMITER, PRIORITY_FLEET, healthy
 from typing import Optional
 
 # Cache global para el token AJAX
@@ -50,7 +51,9 @@ def get_ajax_token(session) -> Optional[str]:
             "Accept": "*/*",
         }
         
-        response = session.get(url, headers=headers, timeout=10)
+        with GAME_LIMITER.request(PRIORITY_FLEET) as req:
+            response = session.get(url, headers=headers, timeout=10)
+            req.ok = healthy(response.status_code)
         response.raise_for_status()
                 
         try:
@@ -119,7 +122,8 @@ def send_fleet(fleet_data, profile_path="profile_data"):
     try:
         # Cargar sesión del navegador Chrome
         print(f"[FLEET] Cargando sesión desde {profile_path}...")
-        session = load_ogame_session(profile_path)
+        # Cookies y conexiones compartidas con el resto del proceso; headers propios (Referer)
+        session = session_manager(profile_path).client()
         
         # Obtener token AJAX (es CRÍTICO para el envío)
         ajax_token = get_ajax_token(session)
@@ -191,7 +195,10 @@ def send_fleet(fleet_data, profile_path="profile_data"):
         
         print(f"[FLEET] Enviando {total_ships} naves a {g}:{s}:{p} - Misión: {mission_name}")
         
-        response = session.post(url, data=payload, timeout=10)
+        # El envío de flotas pasa primero: el escaneo espera si hace falta
+        with GAME_LIMITER.request(PRIORITY_FLEET) as req:
+            response = session.post(url, data=payload, timeout=10)
+            req.ok = healthy(response.status_code)
         
         # Verificar respuesta
         if response.status_code == 200:
@@ -0,0 +1,97 @@
+"""
+Distancias entre coordenadas del universo, con las fórmulas del juego.
+
+- Otra galaxia:           20000 * salto de galaxias
+- Misma galaxia:          2700 + 95 * salto de sistemas
+- Mismo sistema:          1000 + 5 * salto de posiciones
+- Misma posición:         5 (planeta <-> luna / escombros)
+
+Con universo "donut" (el caso de s163-ar) galaxias y sistemas dan la vuelta: de 1 a 499
+hay un sistema de distancia, no 498.
+
+`distance` trabaja con una coordenada; `distances` con arrays de NumPy, para comparar un
+origen contra miles de destinos de una vez.
+"""
+import numpy as np
+from workers.galaxy_grid import GALAXIES, SYSTEMS
+
+DONUT_GALAXY = True
+DONUT_SYSTEM = True
+
+def parse_coords(coords):
+    """'3:120:8' (o '[3:120:8]') -> (3, 120, 8). ValueError si no son coordenadas."""
+    parts = str(coords).strip().strip("[]").split(":")
+    if len(parts) != 3:
+        raise ValueError(f"Coordenadas inválidas: '{coords}'")
+    g, s, p = (int(x) for x in parts)
+    return g, s, p
+
+def gap(a, b, size, donut):
+    d = abs(a - b)
+    return min(d, size - d) if donut else d
+
+def galaxy_gap(g1, g2):
+    return gap(g1, g2, GALAXIES, DONUT_GALAXY)
+
+def system_gap(s1, s2):
+    return gap(s1, s2, SYSTEMS, DONUT_SYSTEM)
+
+def distance(origin, target):
+    """Distancia del juego entre dos (galaxia, sistema, posición)."""
+    g1, s1, p1 = origin
+    g2, s2, p2 = target
+    if g1 != g2:
+        return 20000 * galaxy_gap(g1, g2)
+    if s1 != s2:
+        return 2700 + 95 * system_gap(s1, s2)
+    if p1 != p2:
+        return 1000 + 5 * abs(p1 - p2)
+    return 5
+
+def _gaps(a, b, size, donut):
+    d = np.abs(a - b)
+    return np.minimum(d, size - d) if donut else d
+
+def distances(origin, galaxies, systems, positions):
+    """`distance` de un origen contra arrays de galaxias, sistemas y posiciones."""
+    g1, s1, p1 = origin
+    galaxies, systems, positions = (np.asarray(a, dtype=np.int64) for a in (galaxies, systems, positions))
+    return np.where(
+        galaxies != g1, 20000 * _gaps(galaxies, g1, GALAXIES, DONUT_GALAXY),
+        np.where(
+            systems != s1, 2700 + 95 * _gaps(systems, s1, SYSTEMS, DONUT_SYSTEM),
+            np.where(positions != p1, 1000 + 5 * np.abs(positions - p1), 5)
+        )
+    )
+
+# ─────────────────────────────
+# Naves
+# ─────────────────────────────
+
+# Nombre (como en fleet_tab) -> (velocidad base, capacidad de carga, consumo base).
+# Sin tecnologías de motor ni bonus de clase: pasar la velocidad real si se conoce.
+SHIPS = {
+    "Cazador Ligero": (12500, 50, 20),
+    "Cazador Pesado": (10000, 100, 75),
+    "Crucero": (15000, 800, 300),
+    "Nave de Batalla": (10000, 1500, 500),
+    "Acorazado": (10000, 750, 250),
+    "Bombardero": (4000, 500, 700),
+    "Destructor": (5000, 2000, 1000),
+    "Estrella de la Muerte": (100, 1000000, 1),
+    "Nave Pequeña de Carga": (5000, 5000, 10),
+    "Nave Grande de Carga": (7500, 25000, 50),
+    "Nave Colonizadora": (2500, 7500, 1000),
+    "Reciclador": (2000, 20000, 300),
+    "Sonda de Espionaje": (100000000, 0, 1),
+    "Segador": (7000, 10000, 1100),
+    "Explorador": (12000, 10000, 300),
+}
+
+def flight_seconds(dist, ship_speed, speed_pct=1.0, fleet_speed=1):
+    """
+    Duración de un vuelo de ida en segundos. `speed_pct` es la fracción elegida en el
+    envío (0.1 a 1.0) y `fleet_speed` el multiplicador de flota del universo.
+    Acepta escalares o arrays de NumPy en `dist`.
+    """
+    return (10 + 350 / speed_pct * np.sqrt(10 * np.asarray(dist, dtype=np.float64) / ship_speed)) / fleet_speed
@@ -0,0 +1,192 @@
+"""
+Actividad de jugadores en el tiempo.
+
+`planets.activity` guarda solo el último showActivity. Acá cada escaneo deja, por jugador,
+una observación "activo en la última hora (hace N min)" o "sin actividad visible":
+
+- player_activity_ring: buffer circular de las últimas RING_SIZE observaciones por
+  jugador (ts y minutos), pisando siempre la más vieja;
+- player_activity_head: posición del buffer y última observación de cada jugador;
+- player_activity_hist: por jugador y hora de la semana (0 = lunes 00h, hora local),
+  cuántas veces se lo vio y cuántas estaba activo.
+
+Cada observación cuesta lo mismo (una fila del buffer, la cabecera y una celda del
+histograma) sin importar cuánto historial haya. Los planetas de un mismo jugador vistos
+con menos de MERGE_WINDOW segundos de diferencia cuentan como una sola observación.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_activity <player_id | nombre> [--db galaxy.db]
+"""
+import argparse, sqlite3
+from datetime import datetime
+
+RING_SIZE = 64
+MERGE_WINDOW = 600
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS player_activity_ring (
+        player_id INTEGER, slot INTEGER, ts REAL, minutes INTEGER,
+        PRIMARY KEY (player_id, slot)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS player_activity_head (
+        player_id INTEGER PRIMARY KEY, next_slot INTEGER, count INTEGER, last_ts REAL, last_active INTEGER)""",
+    """CREATE TABLE IF NOT EXISTS player_activity_hist (
+        player_id INTEGER, hour INTEGER, seen INTEGER, active INTEGER,
+        PRIMARY KEY (player_id, hour)) WITHOUT ROWID""",
+]
+
+def init_activity(conn):
+    for sql in SCHEMA:
+        conn.execute(sql)
+    conn.commit()
+
+def hour_of_week(ts):
+    t = datetime.fromtimestamp(ts)
+    return t.weekday() * 24 + t.hour
+
+def activity_minutes(value):
+    """showActivity -> minutos desde la última actividad (15 = hace menos de 15), None si no hay."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        return None
+    return minutes if minutes > 0 else None
+
+def player_observations(scan):
+    """{player_id: minutos o None} de un sistema: la actividad más reciente de sus planetas y lunas."""
+    moons = {m[0]: m for m in scan.moons}
+    planets_by_pos = {p[7]: p for p in scan.planets}
+    seen = {}
+
+    def observe(player_id, minutes):
+        if player_id is None:
+            return
+        if player_id not in seen or (minutes is not None and (seen[player_id] is None or minutes < seen[player_id])):
+            seen[player_id] = minutes
+
+    for pl in scan.planets:
+        observe(pl[2], activity_minutes(pl[5]))
+    for moon_id, pos in scan.moon_links:
+        planet, moon = planets_by_pos.get(pos), moons.get(moon_id)
+        if planet is not None and moon is not None:
+            observe(planet[2], activity_minutes(moon[5]))
+    return seen
+
+# ─────────────────────────────
+# Writer hook
+# ─────────────────────────────
+
+class ActivityRecorder:
+    """Hook del writer: una observación por jugador del sistema, en el buffer y el histograma."""
+    def __init__(self):
+        self._ready = False
+
+    def __call__(self, cur, scan, scan_id):
+        if not self._ready:
+            for sql in SCHEMA:
+                cur.execute(sql)
+            self._ready = True
+
+        ts = scan.scanned_at
+        for player_id, minutes in player_observations(scan).items():
+            record(cur, player_id, ts, minutes)
+
+def record(cur, player_id, ts, minutes):
+    active = int(minutes is not None)
+    head = cur.execute(
+        "SELECT next_slot, count, last_ts, last_active FROM player_activity_head WHERE player_id = ?", (player_id,)
+    ).fetchone()
+
+    if head is not None and abs(ts - head[2]) < MERGE_WINDOW:
+        # Otro planeta del mismo jugador en la misma pasada: solo puede sumar actividad
+        if active and not head[3]:
+            slot = (head[0] - 1) % RING_SIZE
+            cur.execute("UPDATE player_activity_ring SET minutes = ? WHERE player_id = ? AND slot = ?", (minutes, player_id, slot))
+            cur.execute("UPDATE player_activity_hist SET active = active + 1 WHERE player_id = ? AND hour = ?",
+                        (player_id, hour_of_week(head[2])))
+            cur.execute("UPDATE player_activity_head SET last_active = 1 WHERE player_id = ?", (player_id,))
+        return
+
+    slot, count = (head[0], head[1]) if head is not None else (0, 0)
+    cur.execute("INSERT OR REPLACE INTO player_activity_ring (player_id, slot, ts, minutes) VALUES (?, ?, ?, ?)",
+                (player_id, slot, ts, minutes))
+    cur.execute("""
+        INSERT OR REPLACE INTO player_activity_head (player_id, next_slot, count, last_ts, last_active)
+        VALUES (?, ?, ?, ?, ?)
+    """, (player_id, (slot + 1) % RING_SIZE, min(count + 1, RING_SIZE), ts, active))
+    cur.execute("""
+        INSERT INTO player_activity_hist (player_id, hour, seen, active) VALUES (?, ?, 1, ?)
+        ON CONFLICT(player_id, hour) DO UPDATE SET seen = seen + 1, active = active + excluded.active
+    """, (player_id, hour_of_week(ts), active))
+
+# ─────────────────────────────
+# Consultas
+# ─────────────────────────────
+
+def recent_activity(conn, player_id):
+    """[(ts, minutos o None)] de las observaciones en el buffer, de la más vieja a la más nueva."""
+    return conn.execute(
+        "SELECT ts, minutes FROM player_activity_ring WHERE player_id = ? ORDER BY ts", (player_id,)
+    ).fetchall()
+
+def weekly_pattern(conn, player_id):
+    """{hora de la semana: (vistas, activas)} del histograma."""
+    return {
+        hour: (seen, active)
+        for hour, seen, active in conn.execute(
+            "SELECT hour, seen, active FROM player_activity_hist WHERE player_id = ?", (player_id,)
+        )
+    }
+
+def offline_hours(conn, player_id, max_ratio=0.2, min_seen=3):
+    """
+    Horas de la semana en las que el jugador casi nunca está activo: vistas al menos
+    `min_seen` veces y activas en a lo sumo `max_ratio` de ellas.
+    """
+    return sorted(
+        hour for hour, (seen, active) in weekly_pattern(conn, player_id).items()
+        if seen >= min_seen and active <= max_ratio * seen
+    )
+
+def find_player_id(conn, name_or_id):
+    if str(name_or_id).isdigit():
+        return int(name_or_id)
+    row = conn.execute("SELECT player_id FROM players WHERE name = ? COLLATE NOCASE", (name_or_id,)).fetchone()
+    return row[0] if row else None
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+DAYS = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+
+def print_pattern(pattern):
+    print("      " + "".join(f"{h:>3}" for h in range(24)))
+    for d, day in enumerate(DAYS):
+        cells = []
+        for h in range(24):
+            seen, active = pattern.get(d * 24 + h, (0, 0))
+            cells.append("  ." if not seen else f"{round(100 * active / seen / 10):>3}")
+        print(f"  {day} " + "".join(cells))
+    print("  (decenas de % de observaciones activas; '.' sin datos)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Patrón semanal de actividad de un jugador")
+    parser.add_argument("player", help="player_id o nombre")
+    parser.add_argument("--db", default="galaxy.db")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    init_activity(conn)
+    player_id = find_player_id(conn, args.player)
+    if player_id is None:
+        raise SystemExit(f"[ACTIVITY] Jugador no encontrado: {args.player}")
+
+    obs = recent_activity(conn, player_id)
+    print(f"[ACTIVITY] jugador {player_id}: {len(obs)} observaciones recientes")
+    print_pattern(weekly_pattern(conn, player_id))
+    hours = offline_hours(conn, player_id)
+    if hours:
+        print("  Suele estar offline: " + ", ".join(f"{DAYS[h // 24]} {h % 24:02d}h" for h in hours))
+    conn.close()
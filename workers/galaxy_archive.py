@@ -0,0 +1,317 @@
+"""
+Archivo comprimido de respuestas crudas de fetchGalaxyContent.
+
+Una vez decodificada, la respuesta se perdía: un bug en el esquema o en el decode
+obligaba a re-escanear el universo. Con `--archive DIR` el GalaxyWorker guarda además
+cada cuerpo crudo en DIR:
+
+- segment_00001.zst, segment_00002.zst...: frames zstd independientes, uno por
+  respuesta, concatenados; se abre un segmento nuevo al pasar SEGMENT_SIZE bytes;
+- dict_<n>.zdict: diccionarios zstd entrenados con TRAIN_SAMPLES respuestas (todas
+  comparten casi toda la estructura JSON, así cada frame ocupa una fracción). Se entrena
+  recién con TRAIN_SAMPLES muestras y TRAIN_MIN_BYTES (antes, frames sin diccionario) y se
+  reentrena con las últimas respuestas cada RETRAIN_EVERY frames o cuando la compresión
+  cae por debajo de RATIO_DROP de la que tenía el diccionario;
+- index.db: por (galaxia, sistema, ts) el segmento, offset y largo del frame.
+
+Cada frame se descomprime solo, así que leer un sistema es un seek + read. `reparse`
+recorre el índice en orden de disco y reconstruye galaxy.db con el writer y los hooks
+de siempre, sin red.
+
+Requiere `zstandard` (pip install zstandard).
+
+Uso (desde la raíz del repo):
+    python -m workers.new_galaxy_worker 1 --archive archive/
+    python -m workers.galaxy_archive stats archive/
+    python -m workers.galaxy_archive reparse archive/ --db galaxy_reparsed.db [--all] [--galaxies 1-5]
+"""
+import argparse, collections, glob, os, re, sqlite3, threading, time
+from workers.galaxy_db import GalaxyDBWriter
+from workers.galaxy_decode import decode_galaxy
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+SEGMENT_SIZE = 64 * 1024 * 1024
+LEVEL = 9
+TRAIN_SAMPLES = 500
+DICT_SIZE = 112 * 1024
+TRAIN_MIN_BYTES = 10 * DICT_SIZE
+RETRAIN_EVERY = 20000   # frames por diccionario
+RATIO_WINDOW = 200      # frames por medición de la compresión
+RATIO_DROP = 0.8        # reentrenar si la ventana comprime menos del 80% que al principio
+COMMIT_EVERY = 200
+
+INDEX_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        galaxy INTEGER, system INTEGER, ts REAL,
+        segment INTEGER, offset INTEGER, length INTEGER, dict_id INTEGER, size INTEGER,
+        PRIMARY KEY (galaxy, system, ts)
+    ) WITHOUT ROWID
+"""
+
+def require_zstd():
+    if zstd is None:
+        raise RuntimeError("El archivo de respuestas necesita zstandard (pip install zstandard)")
+
+def segment_path(directory, segment):
+    return os.path.join(directory, f"segment_{segment:05d}.zst")
+
+def dict_path(directory, dict_id):
+    return os.path.join(directory, f"dict_{dict_id}.zdict")
+
+def open_index(directory):
+    conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+    conn.execute(INDEX_SCHEMA)
+    conn.commit()
+    return conn
+
+def load_dictionaries(directory):
+    """{dict_id: ZstdCompressionDict} de los diccionarios guardados en `directory`."""
+    dicts = {}
+    for path in glob.glob(os.path.join(directory, "dict_*.zdict")):
+        dict_id = int(re.search(r"dict_(\d+)\.zdict$", path).group(1))
+        with open(path, "rb") as f:
+            dicts[dict_id] = zstd.ZstdCompressionDict(f.read())
+    return dicts
+
+# ─────────────────────────────
+# Escritura
+# ─────────────────────────────
+
+class ResponseArchive:
+    """
+    Archivo en `directory`, seguro entre threads. Hasta tener muestras suficientes para
+    entrenar no hay diccionario: se guardan en memoria y se escriben al entrenarlo (o en
+    close(), sin diccionario, si no alcanzaron).
+    """
+    def __init__(self, directory, segment_size=SEGMENT_SIZE, level=LEVEL, train_samples=TRAIN_SAMPLES,
+                 retrain_every=RETRAIN_EVERY):
+        require_zstd()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.level = level
+        self.train_samples = train_samples
+        self.retrain_every = retrain_every
+        self.lock = threading.Lock()
+        self.index = open_index(directory)
+        self.rows = []
+        self.pending = []   # (galaxia, sistema, ts, body) esperando el diccionario
+        self.recent = collections.deque(maxlen=train_samples)   # muestras para reentrenar
+        self.window = [0, 0, 0]   # frames, bytes crudos, bytes comprimidos de la ventana actual
+
+        dicts = load_dictionaries(directory)
+        self.last_dict_id = max(dicts, default=0)
+        self.dict_id = self.last_dict_id
+        self.compressor = self._compressor(dicts[self.dict_id]) if dicts else None
+        # Lo que ya comprimió el diccionario vigente en sesiones anteriores
+        frames, raw, packed = self.index.execute(
+            "SELECT COUNT(*), SUM(size), SUM(length) FROM responses WHERE dict_id = ?", (self.dict_id,)
+        ).fetchone()
+        self.dict_frames = frames if dicts else 0
+        self.baseline = raw / packed if dicts and frames >= RATIO_WINDOW else None
+
+        last = self.index.execute("SELECT MAX(segment) FROM responses").fetchone()[0]
+        self.segment = last or 1
+        self.file = open(segment_path(directory, self.segment), "ab")
+        self.file.seek(0, os.SEEK_END)
+
+    def _compressor(self, dictionary=None):
+        return zstd.ZstdCompressor(level=self.level, dict_data=dictionary)
+
+    def _enough(self, samples):
+        return len(samples) >= self.train_samples and sum(map(len, samples)) >= TRAIN_MIN_BYTES
+
+    def _train(self, samples):
+        """Diccionario nuevo (dict_id siguiente) con `samples`. False si zstd no pudo entrenarlo."""
+        try:
+            dictionary = zstd.train_dictionary(DICT_SIZE, samples)
+        except zstd.ZstdError:
+            return False
+        self.last_dict_id += 1
+        self.dict_id = self.last_dict_id
+        with open(dict_path(self.directory, self.dict_id), "wb") as f:
+            f.write(dictionary.as_bytes())
+        self.compressor = self._compressor(dictionary)
+        self.dict_frames, self.baseline, self.window = 0, None, [0, 0, 0]
+        return True
+
+    def _measure(self, raw, packed):
+        """Lleva la compresión del diccionario vigente y reentrena si envejeció o empeoró."""
+        self.dict_frames += 1
+        if not self.dict_id:
+            # zstd no pudo entrenar: reintentar con cada tanda nueva de muestras
+            if self.dict_frames % self.train_samples == 0 and self._enough(self.recent):
+                self._train(list(self.recent))
+            return
+        self.window[0] += 1
+        self.window[1] += raw
+        self.window[2] += packed
+        if self.window[0] < RATIO_WINDOW:
+            return
+        ratio = self.window[1] / self.window[2]
+        self.window = [0, 0, 0]
+        if self.baseline is None:
+            self.baseline = ratio
+        stale = self.dict_frames >= self.retrain_every or ratio < self.baseline * RATIO_DROP
+        if stale and self._enough(self.recent):
+            self._train(list(self.recent))
+
+    def _write(self, galaxy, system, ts, body):
+        frame = self.compressor.compress(body)
+        if self.file.tell() and self.file.tell() + len(frame) > self.segment_size:
+            self.file.close()
+            self.segment += 1
+            self.file = open(segment_path(self.directory, self.segment), "ab")
+        offset = self.file.tell()
+        self.file.write(frame)
+        self.rows.append((galaxy, system, ts, self.segment, offset, len(frame), self.dict_id, len(body)))
+        if len(self.rows) >= COMMIT_EVERY:
+            self._commit()
+        self._measure(len(body), len(frame))
+
+    def _commit(self):
+        # Primero los datos a disco, después el índice que apunta a ellos
+        self.file.flush()
+        self.index.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self.rows)
+        self.index.commit()
+        self.rows.clear()
+
+    def add(self, galaxy, system, ts, body):
+        with self.lock:
+            self.recent.append(body)
+            if self.compressor is not None:
+                self._write(galaxy, system, ts, body)
+                return
+            self.pending.append((galaxy, system, ts, body))
+            if self._enough([item[3] for item in self.pending]):
+                self._flush_pending()
+
+    def _flush_pending(self, train=True):
+        # Sin muestras suficientes (o si zstd no pudo) frames sin diccionario: dict_id 0
+        if not (train and self._train([item[3] for item in self.pending])):
+            self.dict_id, self.compressor = 0, self._compressor()
+        for item in self.pending:
+            self._write(*item)
+        self.pending.clear()
+
+    def close(self):
+        with self.lock:
+            if self.pending:
+                self._flush_pending(train=False)
+            self._commit()
+            self.file.close()
+            self.index.close()
+
+# ─────────────────────────────
+# Lectura
+# ─────────────────────────────
+
+class ArchiveReader:
+    def __init__(self, directory):
+        require_zstd()
+        self.directory = directory
+        self.index = open_index(directory)
+        self.decompressors = {
+            dict_id: zstd.ZstdDecompressor(dict_data=d) for dict_id, d in load_dictionaries(directory).items()
+        }
+        self.decompressors[0] = zstd.ZstdDecompressor()
+
+    def entries(self, latest=True, galaxies=None):
+        """
+        Filas (galaxia, sistema, ts, segmento, offset, largo, dict_id) del índice. `latest`: solo
+        la última respuesta de cada sistema, en orden de disco; si no, todas en orden de ts.
+        """
+        where, params = "", []
+        if galaxies is not None:
+            galaxies = list(galaxies)
+            where = f"WHERE galaxy IN ({', '.join('?' * len(galaxies))})"
+            params = galaxies
+        if latest:
+            rows = self.index.execute(f"""
+                SELECT galaxy, system, MAX(ts), segment, offset, length, dict_id FROM responses
+                {where} GROUP BY galaxy, system
+            """, params).fetchall()
+            return sorted(rows, key=lambda r: (r[3], r[4]))
+        return self.index.execute(f"""
+            SELECT galaxy, system, ts, segment, offset, length, dict_id FROM responses
+            {where} ORDER BY ts
+        """, params).fetchall()
+
+    def responses(self, latest=True, galaxies=None):
+        """Genera (galaxia, sistema, ts, body) leyendo cada segmento con un solo archivo abierto."""
+        current, f = None, None
+        try:
+            for galaxy, system, ts, segment, offset, length, dict_id in self.entries(latest, galaxies):
+                if segment != current:
+                    if f is not None:
+                        f.close()
+                    f, current = open(segment_path(self.directory, segment), "rb"), segment
+                f.seek(offset)
+                yield galaxy, system, ts, self.decompressors[dict_id].decompress(f.read(length))
+        finally:
+            if f is not None:
+                f.close()
+
+    def stats(self):
+        """(respuestas, sistemas, bytes crudos, bytes comprimidos)."""
+        return self.index.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT galaxy * 1000 + system), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0)
+            FROM responses
+        """).fetchone()
+
+# ─────────────────────────────
+# Re-parse
+# ─────────────────────────────
+
+def reparse(directory, db_path, hooks=(), latest=True, galaxies=None):
+    """
+    Decodifica de nuevo las respuestas archivadas y las escribe en `db_path`, con el
+    scanned_at original. Retorna (escritos, inválidos, writer).
+    """
+    reader = ArchiveReader(directory)
+    writer = GalaxyDBWriter(db_path, batch_size=200, max_delay=5.0, hooks=hooks)
+    writer.start()
+    done = failed = 0
+    try:
+        for galaxy, system, ts, body in reader.responses(latest, galaxies):
+            scan = decode_galaxy(body, galaxy, system)
+            if scan is None:
+                failed += 1
+                continue
+            scan.scanned_at = ts
+            writer.submit(scan)
+            done += 1
+    finally:
+        writer.close()
+    return done, failed, writer
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    from workers.new_galaxy_worker import parse_galaxies_arg, writer_hooks
+
+    parser = argparse.ArgumentParser(description="Archivo comprimido de respuestas de galaxia")
+    parser.add_argument("command", choices=["stats", "reparse"])
+    parser.add_argument("directory")
+    parser.add_argument("--db", default="galaxy_reparsed.db", help="base a reconstruir (reparse)")
+    parser.add_argument("--all", action="store_true", help="todas las respuestas en orden de tiempo, no solo la última por sistema")
+    parser.add_argument("--galaxies", help="galaxia, rango inicio-fin o 'all'")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        count, systems, raw, packed = ArchiveReader(args.directory).stats()
+        ratio = raw / packed if packed else 0.0
+        print(f"[ARCHIVE] {count} respuestas de {systems} sistemas: {raw / 1e6:.1f} MB -> {packed / 1e6:.1f} MB ({ratio:.1f}x)")
+    else:
+        galaxies = parse_galaxies_arg(args.galaxies) if args.galaxies else None
+        start = time.perf_counter()
+        done, failed, writer = reparse(args.directory, args.db, writer_hooks(args.db), latest=not args.all, galaxies=galaxies)
+        elapsed = time.perf_counter() - start
+        print(f"[ARCHIVE] {done} sistemas re-parseados en {elapsed:.1f}s ({done / max(elapsed, 1e-9):.0f}/s), {failed} inválidos")
+        print(f"[DB] {writer.summary()}")
@@ -0,0 +1,205 @@
+"""
+Motor asíncrono para escanear galaxias.
+
+En vez de 3 threads con un `session.post` bloqueante cada uno, mantiene `concurrency`
+requests en vuelo entre todas las galaxias pedidas, sobre una única conexión keep-alive
+de aiohttp. Las tareas solo hacen fetch + decode (`decode_galaxy`) y el guardado
+queda a cargo del único `GalaxyDBWriter`.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_async <galaxia|all> [sistema|inicio-fin] [--concurrency N] [--max-age 6h] [--metrics scan.prom]
+"""
+import argparse, asyncio, threading, time, traceback
+import aiohttp
+from tqdm import tqdm
+from workers.galaxy_db import GalaxyDBWriter, fresh_systems, init_db
+from workers.galaxy_decode import decode_galaxy
+from workers.new_galaxy_worker import (
+    GALAXY_PARAMS, PROFILE_PATH, GalaxyWorker, parse_age_arg, parse_systems_arg, writer_hooks
+)
+from workers.session_manager import SESSION_COOKIE, HEADERS, LoginError, session_manager
+from workers.rate_limiter import GAME_LIMITER, PRIORITY_SCAN, healthy
+from workers.scan_metrics import MetricsFlusher, ScanMetrics, limiter_collector, sessions_collector, writer_collector
+
+RETRY_BACKOFF = 0.5   # segundos antes de reintentar un 5xx / 429, duplicando en cada intento
+
+class AsyncGalaxyScanner:
+    def __init__(self, galaxies, systems=None, concurrency=GAME_LIMITER.max_concurrency, max_retries=2, max_age=None, db_path="galaxy.db", metrics_path=None, sessions=None,
+                 login_attempts=None):
+        self.galaxies = list(galaxies)
+        self.systems = systems or range(1, 500)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.max_age = max_age
+        self.db_path = db_path
+        self.metrics = ScanMetrics()
+        self.metrics_path = metrics_path
+        self.sessions = sessions or session_manager(PROFILE_PATH)
+        self.base_url = self.sessions.base_url
+        self.login_attempts = login_attempts   # None = reintentar el login hasta que stop() lo corte
+        self.login_error = None
+
+        # Reutilizamos los contadores del worker sincrónico
+        self.parser = GalaxyWorker(self.galaxies[0], self.systems, sessions=self.sessions)
+        self.done = 0
+        self.failed = 0
+        # Tiempos para galaxy_bench
+        self.fetch_times = []
+        self.decode_time = 0.0
+        self.db_time = 0.0
+        self.write_stats = None
+        self.elapsed = 0.0
+
+        self._login_gen = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Corta los reintentos y un login en curso; las tareas pendientes terminan sin pedir nada."""
+        self._stop.set()
+
+    async def _relogin(self, http, seen_gen):
+        """Re-login del SessionManager (single-flight) en un executor; después copiar su jar a aiohttp."""
+        loop = asyncio.get_running_loop()
+        gen = await loop.run_in_executor(
+            None, self.sessions.relogin, seen_gen, None, self._stop, self.login_attempts
+        )
+        if gen != self._login_gen:
+            http.cookie_jar.clear()
+            http.cookie_jar.update_cookies(self.sessions.cookies())
+            self._login_gen = gen
+
+    async def _scan_one(self, http, sem, writer, galaxy, system, pbar):
+        for attempt in range(self.max_retries + 1):
+            if self._stop.is_set():
+                break
+            gen = self._login_gen
+            if attempt:
+                self.metrics.inc("retries_total")
+            try:
+                async with sem, GAME_LIMITER.request_async(PRIORITY_SCAN) as req:
+                    start = time.perf_counter()
+                    async with http.post(self.base_url, params=GALAXY_PARAMS, data={"galaxy": galaxy, "system": system}) as r:
+                        body = await r.read()
+                        req.ok = healthy(r.status)
+                        # aiohttp actualiza su propio jar; el SessionManager la propaga al resto del proceso
+                        if SESSION_COOKIE in r.cookies:
+                            self.sessions.rotate(r.cookies[SESSION_COOKIE].value)
+                    elapsed = time.perf_counter() - start
+                    self.fetch_times.append(elapsed)
+                    self.metrics.request("fetchGalaxyContent", elapsed, r.status, len(body))
+
+                if not req.ok:
+                    # 5xx / 429: el servidor está cargado, la sesión sigue bien
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                    continue
+                start = time.perf_counter()
+                scan = decode_galaxy(body, galaxy, system)
+                elapsed = time.perf_counter() - start
+                self.decode_time += elapsed
+                self.metrics.observe("decode_seconds", elapsed)
+                if scan is not None:
+                    self.parser.count(scan)
+                    writer.submit(scan)
+                    self.done += 1
+                    self.metrics.inc("systems_total", result="ok")
+                    break
+                # 200 que no es JSON: la página de login, la sesión se cayó
+                self.metrics.inc("relogins_total")
+                await self._relogin(http, gen)
+            except LoginError as e:
+                if self.login_error is None:
+                    self.login_error = str(e)
+                    tqdm.write(f"[ASYNC] {e}")
+                self._stop.set()
+                break
+            except Exception as e:
+                self.metrics.inc("errors_total", type=type(e).__name__)
+                tqdm.write(f"[ERROR][ASYNC] {galaxy}:{system} {e}")
+        else:
+            self.failed += 1
+            self.metrics.inc("systems_total", result="failed")
+        pbar.update(1)
+
+    def _targets(self):
+        fresh = {}
+        if self.max_age is not None:
+            conn = init_db(self.db_path)
+            since = time.time() - self.max_age
+            fresh = {g: fresh_systems(conn, g, since) for g in self.galaxies}
+            conn.close()
+        return [(g, s) for g in self.galaxies for s in self.systems if s not in fresh.get(g, ())]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        self._login_gen = await loop.run_in_executor(
+            None, self.sessions.ensure_logged_in, None, self._stop, self.login_attempts
+        )
+
+        writer = GalaxyDBWriter(self.db_path, hooks=writer_hooks(self.db_path),
+                                on_batch=lambda seconds: self.metrics.observe("db_batch_seconds", seconds))
+        writer.start()
+        self.metrics.add_collector(writer_collector(writer))
+        self.metrics.add_collector(limiter_collector(GAME_LIMITER))
+        self.metrics.add_collector(sessions_collector(self.sessions))
+        flusher = MetricsFlusher(self.metrics, self.metrics_path) if self.metrics_path else None
+        if flusher is not None:
+            flusher.start()
+        targets = self._targets()
+        pbar = tqdm(total=len(targets), desc=f"G{','.join(map(str, self.galaxies))} async", unit="sistem")
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=10)
+        sem = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS, cookies=self.sessions.cookies()) as http:
+                await asyncio.gather(*(
+                    self._scan_one(http, sem, writer, g, s, pbar) for g, s in targets
+                ))
+        finally:
+            # Ctrl-C cancela las tareas: que un re-login en el executor no quede girando
+            self._stop.set()
+            pbar.close()
+            writer.close()
+            if flusher is not None:
+                flusher.close()
+
+        elapsed = time.perf_counter() - started
+        self.elapsed = elapsed
+        self.db_time = writer.db_time
+        self.write_stats = writer.stats
+        rate = self.done / max(elapsed, 1e-9)
+        print(f"[ASYNC] {self.done}/{len(targets)} sistemas en {elapsed:.1f}s ({rate:.2f} sistemas/s, concurrencia {self.concurrency}, fallidos {self.failed})")
+        print(f"[LIMITER] {GAME_LIMITER.snapshot()}")
+        print(f"[DB] {writer.summary()}")
+        return rate
+
+    def run(self):
+        self.sessions.observers.append(self.metrics.request)   # latencia del chequeo de sesión del login
+        try:
+            return asyncio.run(self._run())
+        finally:
+            self.sessions.observers.remove(self.metrics.request)
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escaneo asíncrono de galaxias")
+    parser.add_argument("galaxy", help="número de galaxia o 'all' para 1-5")
+    parser.add_argument("systems", nargs="?", help="sistema o rango inicio-fin")
+    parser.add_argument("--concurrency", type=int, default=GAME_LIMITER.max_concurrency, help="tope de requests en vuelo (el limitador ajusta la concurrencia real)")
+    parser.add_argument("--max-age", help="saltear sistemas escaneados hace menos de esto (30m, 6h, 2d)")
+    parser.add_argument("--metrics", metavar="FILE", help="volcar métricas del escaneo cada 10s en FILE (.prom = Prometheus, si no JSON)")
+    args = parser.parse_args()
+
+    try:
+        galaxies = range(1, 6) if args.galaxy == "all" else [int(args.galaxy)]
+        systems = parse_systems_arg(args.systems) if args.systems else None
+        max_age = parse_age_arg(args.max_age) if args.max_age else None
+        AsyncGalaxyScanner(galaxies, systems, concurrency=args.concurrency, max_age=max_age, metrics_path=args.metrics).run()
+    except Exception as e:
+        print(f"[AsyncGalaxyScanner] Error: {e}")
+        traceback.print_exc()
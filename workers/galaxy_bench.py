@@ -0,0 +1,111 @@
+"""
+Benchmark del scanner contra el servidor de replay (sin tocar el servidor real).
+
+Cada configuración escanea los mismos sistemas sobre una base temporal y reporta
+sistemas/s, p50/p99 del fetch, tiempo de decode JSON y tiempo de escritura en la DB.
+
+Configuraciones: "threads:N" (GalaxyWorker) o "async:N" (AsyncGalaxyScanner).
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_bench fixtures/ [--galaxies 1-2] [--systems 1-100]
+        [--configs threads:3,threads:8,async:16] [--latency 0.08] [--jitter 0.04] [--error-rate 0.01]
+        [--keep-limits] [--json bench.json]
+"""
+import argparse, json, os, tempfile, time, traceback
+from workers.galaxy_async import AsyncGalaxyScanner
+from workers.galaxy_replay import replay_sessions, serve
+from workers.new_galaxy_worker import GalaxyWorker, parse_galaxies_arg, parse_systems_arg
+from workers.rate_limiter import GAME_LIMITER
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+def parse_config(spec):
+    kind, _, n = spec.partition(":")
+    if kind not in ("threads", "async") or not n.isdigit():
+        raise ValueError(f"Configuración inválida: '{spec}' (usar threads:N o async:N)")
+    return kind, int(n)
+
+def run_config(kind, n, url, galaxies, systems, db_path):
+    sessions = replay_sessions(url, pool_size=n)
+    if kind == "threads":
+        scanner = GalaxyWorker(galaxies, systems, db_path=db_path, sessions=sessions)
+        scanner.run(threads=n)
+        done = scanner.scanned
+    else:
+        scanner = AsyncGalaxyScanner(galaxies, systems, concurrency=n, db_path=db_path, sessions=sessions)
+        scanner.run()
+        done = scanner.done
+
+    fetch = scanner.fetch_times
+    return {
+        "config": f"{kind}:{n}",
+        "systems": done,
+        "elapsed": round(scanner.elapsed, 3),
+        "systems_per_sec": round(done / max(scanner.elapsed, 1e-9), 2),
+        "fetch_p50_ms": round(percentile(fetch, 50) * 1000, 1),
+        "fetch_p99_ms": round(percentile(fetch, 99) * 1000, 1),
+        "decode_ms": round(scanner.decode_time * 1000, 1),
+        "decode_ms_per_system": round(scanner.decode_time * 1000 / max(done, 1), 3),
+        "db_ms": round(scanner.db_time * 1000, 1),
+        "metrics": scanner.metrics.to_dict(),
+    }
+
+def print_report(results):
+    cols = ["config", "systems", "systems_per_sec", "fetch_p50_ms", "fetch_p99_ms", "decode_ms_per_system", "db_ms"]
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in cols]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for r in results:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(cols, widths)))
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del scanner de galaxias contra fixtures")
+    parser.add_argument("fixtures", help="directorio con fixtures capturadas (--capture)")
+    parser.add_argument("--galaxies", default="1", help="galaxia, rango inicio-fin o 'all'")
+    parser.add_argument("--systems", default="1-100", help="sistema o rango inicio-fin")
+    parser.add_argument("--configs", default="threads:3,threads:8,async:16")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--logout-rate", type=float, default=0.0)
+    parser.add_argument("--keep-limits", action="store_true", help="respetar el rate del limitador compartido (por defecto se libera)")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    try:
+        galaxies = parse_galaxies_arg(args.galaxies)
+        systems = parse_systems_arg(args.systems)
+        configs = [parse_config(c) for c in args.configs.split(",")]
+
+        if not args.keep_limits:
+            # Contra el replay se mide el scanner, no el rate pensado para el servidor real
+            GAME_LIMITER.rate = GAME_LIMITER.burst = 1e6
+            GAME_LIMITER.tokens = float(GAME_LIMITER.burst)
+            GAME_LIMITER.max_concurrency = max(GAME_LIMITER.max_concurrency, *(n for _, n in configs))
+            GAME_LIMITER.limit = float(GAME_LIMITER.max_concurrency)
+
+        server, url = serve(args.fixtures, latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, logout_rate=args.logout_rate)
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, (kind, n) in enumerate(configs):
+                db_path = os.path.join(tmp, f"bench_{i}.db")
+                results.append(run_config(kind, n, url, galaxies, systems, db_path))
+        server.shutdown()
+
+        print()
+        print(f"[BENCH] latencia {args.latency}s ±{args.jitter}s, errores {args.error_rate}, logouts {args.logout_rate}")
+        print_report(results)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"ts": time.time(), "args": vars(args), "results": results}, f, indent=2)
+    except Exception as e:
+        print(f"[GalaxyBench] Error: {e}")
+        traceback.print_exc()
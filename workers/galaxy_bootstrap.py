@@ -0,0 +1,235 @@
+"""
+Arranque en frío de galaxy.db desde los volcados XML públicos del universo.
+
+Un escaneo completo son ~2500 fetchGalaxyContent. El juego publica en /api/ el universo
+entero (players.xml, alliances.xml, universe.xml, highscore.xml, serverData.xml): con
+eso se cargan jugadores, planetas y lunas de una vez y después el GalaxyWorker solo
+tiene que pedir los sistemas ocupados o con escombros conocidos (`--occupied-only`),
+que son los que tienen actividad, escombros y estados que el XML no trae.
+
+- Los XML se leen con iterparse, liberando cada elemento ya procesado.
+- Jugadores: upsert con nombre, alianza, ranking y estados (i/I inactivo, v, b).
+- Sistemas: el volcado reemplaza planetas y lunas, y borra los escombros viejos, salvo
+  que haya un escaneo en vivo más nuevo que el volcado. Los sistemas cargados así quedan
+  en `scans` con success = 0 (conocidos, sin escaneo en vivo) y content_hash vacío; los
+  sistemas vacíos también se registran, así el worker sabe que no hace falta pedirlos
+  (salvo que un escaneo en vivo anterior les haya visto escombros: scans.had_debris).
+- Al final se recalculan los agregados (galaxy_rollups) y la grilla (galaxy_grid).
+
+El volcado no trae actividad, escombros ni misiones disponibles: esas columnas quedan en
+NULL hasta el primer escaneo en vivo del sistema. Los escombros aparecen también sobre
+slots vacíos y en la posición 16 (expediciones), así que un sistema vacío sin escombros
+conocidos puede tenerlos igual: solo un escaneo completo (sin --occupied-only) los encuentra.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_bootstrap download xml/
+    python -m workers.galaxy_bootstrap import xml/ [--db galaxy.db]
+    python -m workers.new_galaxy_worker all --occupied-only
+"""
+import argparse, os, time
+import xml.etree.ElementTree as ET
+import requests
+from workers.flight import parse_coords
+from workers.galaxy_db import TABLE_MOONS, TABLE_PLANETS, bump_generation, init_db, sql_insert_values
+from workers.galaxy_grid import GALAXIES, SYSTEMS, grid_path_for, rebuild_grid
+from workers.galaxy_rollups import init_rollups, rebuild
+
+API_URL = "https://s163-ar.ogame.gameforge.com/api"
+
+# Archivo local -> ruta en /api/ (highscore: total de puntos de jugadores)
+DUMP_FILES = {
+    "serverData.xml": "serverData.xml",
+    "players.xml": "players.xml",
+    "alliances.xml": "alliances.xml",
+    "universe.xml": "universe.xml",
+    "highscore.xml": "highscore.xml?category=1&type=0",
+}
+
+# ─────────────────────────────
+# Lectura
+# ─────────────────────────────
+
+def iter_tag(path, tag):
+    """Genera cada elemento <tag> de `path` ya completo; lo leído se descarta al avanzar."""
+    context = ET.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == tag:
+            yield elem
+            root.clear()
+
+def dump_timestamp(path):
+    """Atributo timestamp del elemento raíz (cuándo generó el juego el volcado)."""
+    for _, root in ET.iterparse(path, events=("start",)):
+        return float(root.get("timestamp", 0))
+
+def universe_size(path):
+    """(galaxias, sistemas) de serverData.xml, o los de galaxy_grid si no está."""
+    if not os.path.exists(path):
+        return GALAXIES, SYSTEMS
+    root = ET.parse(path).getroot()
+    return int(root.findtext("galaxies", GALAXIES)), int(root.findtext("systems", SYSTEMS))
+
+def read_alliances(path):
+    """{alliance_id: tag}"""
+    if not os.path.exists(path):
+        return {}
+    return {int(a.get("id")): a.get("tag") for a in iter_tag(path, "alliance")}
+
+def read_ranks(path):
+    """{player_id: posición en el ranking total}"""
+    if not os.path.exists(path):
+        return {}
+    return {int(p.get("id")): int(p.get("position")) for p in iter_tag(path, "player")}
+
+def player_rows(path, tags, ranks):
+    """Filas de players.xml en el orden de TABLE_PLAYERS (is_active queda en 0: el XML no lo trae)."""
+    for p in iter_tag(path, "player"):
+        player_id = int(p.get("id"))
+        status = p.get("status", "")
+        alliance_id = int(p.get("alliance")) if p.get("alliance") else None
+        yield (
+            player_id,
+            p.get("name"),
+            alliance_id,
+            tags.get(alliance_id),
+            ranks.get(player_id),
+            0,
+            int("i" in status or "I" in status),
+            int("v" in status),
+            int("b" in status),
+        )
+
+def universe_planets(path):
+    """{(galaxia, sistema): [(posición, planet_id, player_id, nombre, luna o None)]}, luna = (id, nombre, tamaño)."""
+    systems = {}
+    for planet in iter_tag(path, "planet"):
+        g, s, p = parse_coords(planet.get("coords"))
+        moon = planet.find("moon")
+        if moon is not None:
+            moon = (int(moon.get("id")), moon.get("name"), int(moon.get("size", 0)))
+        systems.setdefault((g, s), []).append((p, int(planet.get("id")), int(planet.get("player")), planet.get("name"), moon))
+    return systems
+
+# ─────────────────────────────
+# Carga
+# ─────────────────────────────
+
+def import_dump(conn, directory):
+    """
+    Carga el volcado de `directory` en galaxy.db en una sola transacción.
+    Retorna {"players", "planets", "moons", "systems", "skipped"} (skipped = sistemas con
+    escaneo en vivo más nuevo que el volcado).
+    """
+    path = lambda name: os.path.join(directory, name)
+    universe = path("universe.xml")
+    ts = dump_timestamp(universe)
+    galaxies, systems = universe_size(path("serverData.xml"))
+    tags = read_alliances(path("alliances.xml"))
+    ranks = read_ranks(path("highscore.xml"))
+    by_system = universe_planets(universe)
+    stats = {"players": 0, "planets": 0, "moons": 0, "systems": 0, "skipped": 0}
+
+    init_rollups(conn)
+    cur = conn.cursor()
+    with conn:
+        cur.executemany("""
+            INSERT INTO players (player_id, name, alliance_id, alliance_tag, rank_position, is_active, is_inactive, is_vacation, is_banned)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(player_id) DO UPDATE SET
+                name = excluded.name,
+                alliance_id = excluded.alliance_id,
+                alliance_tag = excluded.alliance_tag,
+                rank_position = COALESCE(excluded.rank_position, rank_position),
+                is_inactive = excluded.is_inactive,
+                is_vacation = excluded.is_vacation,
+                is_banned = excluded.is_banned
+        """, player_rows(path("players.xml"), tags, ranks))
+        stats["players"] = cur.rowcount
+
+        live = {
+            (g, s): scanned_at
+            for g, s, scanned_at in cur.execute("SELECT galaxy, system, scanned_at FROM scans WHERE success = 1")
+        }
+        planets, moons = [], []
+        for g in range(1, galaxies + 1):
+            for s in range(1, systems + 1):
+                if live.get((g, s), 0) >= ts:
+                    stats["skipped"] += 1
+                    continue
+                cur.execute("""
+                    INSERT INTO scans (galaxy, system, scanned_at, success) VALUES (?, ?, ?, 0)
+                    ON CONFLICT(galaxy, system) DO UPDATE SET
+                        scanned_at = excluded.scanned_at, success = 0, content_hash = NULL
+                """, (g, s, ts))
+                scan_id = cur.execute("SELECT id FROM scans WHERE galaxy = ? AND system = ?", (g, s)).fetchone()[0]
+                cur.execute("DELETE FROM planets WHERE scan_id = ?", (scan_id,))
+                cur.execute("DELETE FROM moons WHERE scan_id = ?", (scan_id,))
+                # Escombros de un escaneo en vivo anterior al volcado: scans.had_debris los recuerda
+                cur.execute("DELETE FROM debris WHERE scan_id = ?", (scan_id,))
+                for pos, planet_id, player_id, name, moon in by_system.get((g, s), ()):
+                    moon_id = moon[0] if moon else None
+                    planets.append((planet_id, name, player_id, None, 0, None, scan_id, pos, moon_id, None, None, None, None, None))
+                    if moon:
+                        moons.append((moon_id, moon[1], moon[2], None, 0, None, None, None, None, None, None, None, scan_id, pos))
+                stats["systems"] += 1
+
+        cur.executemany(f"INSERT OR REPLACE INTO planets {sql_insert_values(TABLE_PLANETS)}", planets)
+        cur.executemany(f"INSERT OR REPLACE INTO moons {sql_insert_values(TABLE_MOONS)}", moons)
+        stats["planets"], stats["moons"] = len(planets), len(moons)
+
+        rebuild(cur)
+        bump_generation(cur, range(1, galaxies + 1), players=True)
+    return stats
+
+def systems_needing_detail(conn, galaxy, systems):
+    """
+    Los sistemas de `systems` que vale la pena pedir en vivo: los que tienen planetas
+    según galaxy.db, los que el último escaneo en vivo vio con escombros (sobre slots
+    vacíos o en la posición 16) y los que la base todavía no conoce. Se saltean los
+    vacíos sin escombros conocidos: los escombros nuevos ahí no se ven hasta un escaneo
+    completo.
+    """
+    known = {s for (s,) in conn.execute("SELECT system FROM scans WHERE galaxy = ?", (galaxy,))}
+    occupied = {s for (s,) in conn.execute("""
+        SELECT DISTINCT s.system FROM planets p JOIN scans s ON s.id = p.scan_id
+        WHERE s.galaxy = ? AND p.player_id IS NOT NULL
+    """, (galaxy,))}
+    with_debris = {s for (s,) in conn.execute("SELECT system FROM scans WHERE galaxy = ? AND had_debris", (galaxy,))}
+    return [s for s in systems if s in occupied or s in with_debris or s not in known]
+
+def download_dump(directory, api_url=API_URL):
+    os.makedirs(directory, exist_ok=True)
+    for name, remote in DUMP_FILES.items():
+        r = requests.get(f"{api_url}/{remote}", timeout=60)
+        r.raise_for_status()
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(r.content)
+        print(f"[BOOTSTRAP] {name}: {len(r.content) / 1024:.0f} KB")
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga inicial de galaxy.db desde los XML del universo")
+    parser.add_argument("command", choices=["download", "import"])
+    parser.add_argument("directory")
+    parser.add_argument("--db", default="galaxy.db")
+    parser.add_argument("--api", default=API_URL)
+    args = parser.parse_args()
+
+    if args.command == "download":
+        download_dump(args.directory, args.api)
+    else:
+        conn = init_db(args.db)
+        start = time.perf_counter()
+        stats = import_dump(conn, args.directory)
+        rebuild_grid(args.db, grid_path_for(args.db))
+        print(f"[BOOTSTRAP] {stats['players']} jugadores, {stats['planets']} planetas, {stats['moons']} lunas "
+              f"en {stats['systems']} sistemas ({time.perf_counter() - start:.1f}s); "
+              f"{stats['skipped']} sistemas con escaneo en vivo más nuevo")
+        galaxies, systems = universe_size(os.path.join(args.directory, "serverData.xml"))
+        pending = sum(len(systems_needing_detail(conn, g, range(1, systems + 1))) for g in range(1, galaxies + 1))
+        print(f"[BOOTSTRAP] {pending} sistemas ocupados o con escombros para escanear en vivo (--occupied-only)")
+        conn.close()
@@ -0,0 +1,621 @@
+"""
+Esquema de galaxy.db, decodificación de fetchGalaxyContent y escritor único.
+Sin dependencias de red: lo usan GalaxyWorker, el motor async, el scheduler y los módulos de análisis.
+"""
+import hashlib, json, queue, sqlite3, threading, time, traceback
+from dataclasses import dataclass, field
+
+TABLE_SCANS = [("id", 'INTEGER PRIMARY KEY AUTOINCREMENT'), ("galaxy", 'INTEGER'), ("system", 'INTEGER'), ("scanned_at", 'REAL'), ("success", 'INTEGER')]
+TABLE_SCAN_RUNS = [("id", 'INTEGER PRIMARY KEY AUTOINCREMENT'), ("galaxy", 'INTEGER'), ("systems", 'TEXT'), ("started_at", 'REAL'), ("finished_at", 'REAL')]
+TABLE_PLAYERS = [("player_id", 'INTEGER PRIMARY KEY'), ("name", 'TEXT'), ("alliance_id", 'INTEGER'), ("alliance_tag", 'TEXT'), ("rank_position", 'INTEGER'), ("is_active", 'INTEGER'), ("is_inactive", 'INTEGER'), ("is_vacation", 'INTEGER'), ("is_banned", 'INTEGER')]
+TABLE_PLANETS = [("planet_id", 'INTEGER PRIMARY KEY'), ("name", 'TEXT'), ("player_id", 'INTEGER'), ("image", 'TEXT'), ("is_destroyed", 'INTEGER'), ("activity", 'INTEGER'), ("scan_id", 'INTEGER'), ("position", 'INTEGER'), ("moon_id", 'INTEGER'),
+                  ("can_attack", 'INTEGER'), ("can_transport", 'INTEGER'), ("can_deploy", 'INTEGER'), ("can_hold", 'INTEGER'), ("can_espionage", 'INTEGER')]
+TABLE_MOONS = [("moon_id", " INTEGER PRIMARY KEY"),("name"," TEXT"),("size"," INTEGER"),("image"," TEXT"),("is_destroyed"," INTEGER"),("activity"," INTEGER"),
+               ("can_attack"," INTEGER"),("can_transport"," INTEGER"),("can_deploy"," INTEGER"),("can_hold"," INTEGER"),("can_espionage"," INTEGER"),("can_destroy"," INTEGER"),
+               ("scan_id"," INTEGER"),("position"," INTEGER")]
+TABLE_DEBRIS = [("scan_id", 'INTEGER'), ("position", 'INTEGER'), ("metal", 'INTEGER'), ("crystal", 'INTEGER'), ("deuterium", 'INTEGER'), ("required_ships", 'INTEGER')]
+
+# ─────────────────────────────
+# Utils
+# ─────────────────────────────
+
+MISSION_FLAGS = {
+    1: "can_attack",
+    3: "can_transport",
+    4: "can_deploy",
+    5: "can_hold",
+    6: "can_espionage",
+    9: "can_destroy",
+}
+
+def parse_mission_flags(available):
+    result = {v: 0 for v in MISSION_FLAGS.values()}
+
+    for m in available or []:
+        mt = m.get("missionType")
+        if mt in MISSION_FLAGS:
+            result[MISSION_FLAGS[mt]] = 1
+
+    return result
+
+def sql_insert_values(table_cols):
+    return f" ({', '.join(col for col, _ in table_cols)}) VALUES ({', '.join(['?'] * len(table_cols))})"
+
+def sql_create(table):
+    return f"{', '.join([f'{col} {type_}' for col, type_ in table])}"
+
+# ─────────────────────────────
+# DB
+# ─────────────────────────────
+
+def init_db(db_path="galaxy.db"):
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+
+    cur.executescript(
+        f"CREATE TABLE IF NOT EXISTS scans ({sql_create(TABLE_SCANS)}, UNIQUE (galaxy, system));" +
+        f"CREATE TABLE IF NOT EXISTS scan_runs ({sql_create(TABLE_SCAN_RUNS)});" +
+        f"CREATE TABLE IF NOT EXISTS players ({sql_create(TABLE_PLAYERS)});" +
+        f"CREATE TABLE IF NOT EXISTS planets ({sql_create(TABLE_PLANETS)});" +
+        f"CREATE TABLE IF NOT EXISTS moons ({sql_create(TABLE_MOONS)});" +
+        f"CREATE TABLE IF NOT EXISTS debris ({sql_create(TABLE_DEBRIS)}, PRIMARY KEY (scan_id, position));" +
+        "CREATE TABLE IF NOT EXISTS images (image_name TEXT PRIMARY KEY, image_src TEXT);" +
+        "CREATE TABLE IF NOT EXISTS missions (missionType INTEGER PRIMARY KEY, name TEXT, link TEXT);"
+    )
+    conn.commit()
+
+    MISSIONS = [
+        (0, "Reubicar", "prepareMove"),
+        (1, "Atacar", "attack"),
+        (2, "Ataque conjunto", "unionAttack"),
+        (3, "Transportar", "transport"),
+        (4, "Desplegar", "deploy"),
+        (5, "Mantener posición", "hold"),
+        (6, "Espionaje", "espionage"),
+        (7, "Colonizar", "colonize"),
+        (8, "Recolectar", "recycle"),
+        (9, "Destruir", "destroy"),
+        (10, "Misil", "missileAttack"),
+        (15, "Expedicíon", "expedition"),
+        (18, "Forma de vida", "discovery")
+    ]
+
+    cur.executemany("""
+        INSERT OR IGNORE INTO missions (missionType, name, link)
+        VALUES (?, ?, ?)
+    """, MISSIONS)
+    conn.commit()
+
+    migrate(conn)
+    return conn
+
+# ─────────────────────────────
+# Migraciones (PRAGMA user_version)
+# ─────────────────────────────
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def migrate_v1(cur):
+    """
+    Lunas con coordenadas (scan_id, position) y vínculo luna -> planeta por slot.
+    El UPDATE viejo ponía el moon_id en todos los planetas del sistema: solo se conservan
+    los vínculos sin ambigüedad (un único planeta con esa luna); el resto lo corrige el
+    próximo escaneo.
+    """
+    have = columns(cur.connection, "moons")
+    for col in ("scan_id", "position"):
+        if col not in have:
+            cur.execute(f"ALTER TABLE moons ADD COLUMN {col} INTEGER")
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_planets_moon ON planets (moon_id)")
+    cur.execute("""
+        UPDATE planets SET moon_id = NULL
+        WHERE moon_id IN (SELECT moon_id FROM planets WHERE moon_id IS NOT NULL GROUP BY moon_id HAVING COUNT(*) > 1)
+    """)
+    cur.execute("""
+        UPDATE moons SET
+            scan_id = (SELECT p.scan_id FROM planets p WHERE p.moon_id = moons.moon_id),
+            position = (SELECT p.position FROM planets p WHERE p.moon_id = moons.moon_id)
+        WHERE scan_id IS NULL
+    """)
+
+def migrate_v2(cur):
+    """Índices para las consultas de galaxy_query (debris, objetivos, jugadores, lunas por slot)."""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_planets_slot ON planets (scan_id, position)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_planets_player ON planets (player_id, scan_id, position)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_moons_slot ON moons (scan_id, position)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_players_alliance ON players (alliance_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_players_name ON players (name COLLATE NOCASE)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_players_inactive ON players (is_inactive, is_vacation, is_banned)")
+
+def migrate_v3(cur):
+    """Tabla meta con los contadores de generación que incrementa el writer (ver galaxy_query.GalaxyReader)."""
+    cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_moons_size ON moons (size)")
+
+def migrate_v4(cur):
+    """Hash del contenido de cada sistema: el writer saltea los sistemas que no cambiaron."""
+    if "content_hash" not in columns(cur.connection, "scans"):
+        cur.execute("ALTER TABLE scans ADD COLUMN content_hash TEXT")
+
+def migrate_v5(cur):
+    """
+    Galaxia en cada fila de debris (la escribe el writer) e índices por total de recursos:
+    la pestaña de escombros filtra y ordena en SQL sin pasar por scans.
+    """
+    if "galaxy" not in columns(cur.connection, "debris"):
+        cur.execute("ALTER TABLE debris ADD COLUMN galaxy INTEGER")
+    cur.execute("UPDATE debris SET galaxy = (SELECT s.galaxy FROM scans s WHERE s.id = debris.scan_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_debris_galaxy_total ON debris (galaxy, (metal + crystal + deuterium))")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_debris_total ON debris ((metal + crystal + deuterium))")
+
+def migrate_v6(cur):
+    """
+    Si el último escaneo en vivo de cada sistema vio escombros (cualquier posición, también la
+    16 de expediciones): el volcado XML borra los escombros viejos pero el sistema se sigue
+    pidiendo con --occupied-only (ver galaxy_bootstrap.systems_needing_detail).
+    """
+    if "had_debris" not in columns(cur.connection, "scans"):
+        cur.execute("ALTER TABLE scans ADD COLUMN had_debris INTEGER")
+    cur.execute("UPDATE scans SET had_debris = EXISTS (SELECT 1 FROM debris d WHERE d.scan_id = scans.id)")
+
+MIGRATIONS = [
+    (1, migrate_v1),
+    (2, migrate_v2),
+    (3, migrate_v3),
+    (4, migrate_v4),
+    (5, migrate_v5),
+    (6, migrate_v6),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn):
+    """Aplica en orden las migraciones pendientes, cada una en su transacción."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with conn:
+            step(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version}")
+    return max(current, SCHEMA_VERSION)
+
+def table_index(table_cols, col):
+    return [c for c, _ in table_cols].index(col)
+
+def fresh_systems(conn, galaxy, since):
+    """Sistemas de la galaxia escaneados con éxito a partir de `since`."""
+    rows = conn.execute("""
+        SELECT system FROM scans
+        WHERE galaxy = ? AND success = 1 AND scanned_at >= ?
+    """, (galaxy, since)).fetchall()
+    return {r[0] for r in rows}
+
+def start_scan_run(conn, galaxy, spec, started_at):
+    cur = conn.execute("""
+        INSERT INTO scan_runs (galaxy, systems, started_at, finished_at)
+        VALUES (?, ?, ?, NULL)
+    """, (galaxy, spec, started_at))
+    conn.commit()
+    return cur.lastrowid
+
+def unfinished_scan_run(conn, galaxy, spec):
+    """Último escaneo interrumpido con el mismo rango: (id, started_at) o None."""
+    return conn.execute("""
+        SELECT id, started_at FROM scan_runs
+        WHERE galaxy = ? AND systems = ? AND finished_at IS NULL
+        ORDER BY started_at DESC LIMIT 1
+    """, (galaxy, spec)).fetchone()
+
+def finish_scan_run(conn, run_id):
+    conn.execute("UPDATE scan_runs SET finished_at = ? WHERE id = ?", (time.time(), run_id))
+    conn.commit()
+
+# ─────────────────────────────
+# Decode
+# ─────────────────────────────
+
+@dataclass
+class SystemScan:
+    """Filas tipadas de un sistema, listas para el writer. scan_id va en None hasta escribirse."""
+    galaxy: int
+    system: int
+    scanned_at: float
+    players: list = field(default_factory=list)   # tuplas en orden de TABLE_PLAYERS
+    planets: list = field(default_factory=list)   # tuplas en orden de TABLE_PLANETS
+    moons: list = field(default_factory=list)     # tuplas en orden de TABLE_MOONS
+    debris: list = field(default_factory=list)    # tuplas en orden de TABLE_DEBRIS
+    images: list = field(default_factory=list)    # (image_name, image_src)
+    moon_links: list = field(default_factory=list)  # (moon_id, position) por slot con luna
+
+def decode_galaxy_text(text, galaxy, system):
+    """Convierte el cuerpo de fetchGalaxyContent en un SystemScan. Retorna None si no es JSON (sesión caída)."""
+    text = text.strip()
+    if not text.startswith("{"):
+        return None
+
+    return scan_from_dict(json.loads(text), galaxy, system)
+
+def scan_from_dict(data, galaxy, system):
+    """Camino de referencia: recorre el JSON ya parseado (dicts) y arma el SystemScan."""
+    scan = SystemScan(galaxy, system, time.time())
+
+    galaxy_content = data.get("system", {}).get("galaxyContent", [])
+
+    for row in galaxy_content:
+        pos = row.get("position")
+        if not pos:
+            continue
+
+        player = row.get("player")
+        if player:
+            # Sin playerId (ej. "player": {}) no hay jugador
+            pId = player.get("playerId")
+            if pId is not None and pId != 99999:
+                scan.players.append((
+                    pId,
+                    player.get("playerName"),
+                    player.get("allianceId"),
+                    player.get("allianceTag"),
+                    player.get("highscorePositionPlayer"),
+                    int(player.get("isActive", False)),
+                    int(player.get("isInactive", False)),
+                    int(player.get("isOnVacation", False)),
+                    int(player.get("isBanned", False))
+                ))
+
+        planets = row.get("planets") or []
+        if not isinstance(planets, list):
+            planets = [planets]
+
+        moon_id = None
+        for body in planets:
+            if not isinstance(body, dict):
+                continue
+
+            ptype = body.get("planetType")
+            missions = body.get("availableMissions", [])
+            flags = parse_mission_flags(missions)
+            # ── PLANETA
+            if ptype == 1:
+                image_name = body.get("imageInformation")
+                image_src = body.get("imageSrc")
+                if image_name and image_src:
+                    scan.images.append((image_name, image_src))
+                scan.planets.append((
+                    body.get("planetId"),
+                    body.get("planetName"),
+                    body.get("playerId"),
+                    image_name,
+                    int(body.get("isDestroyed", False)),
+                    body.get("activity", {}).get("showActivity"),
+                    None,
+                    pos,
+                    None,
+                    flags["can_attack"],
+                    flags["can_transport"],
+                    flags["can_deploy"],
+                    flags["can_hold"],
+                    flags["can_espionage"]
+                ))
+
+            # ── LUNA
+            elif ptype == 3:
+                image_name = body.get("imageInformation")
+                image_src = body.get("imageSrc")
+                if image_name and image_src:
+                    scan.images.append((image_name, image_src))
+                moon_id = body.get("planetId")
+                scan.moons.append((
+                    moon_id,
+                    body.get("planetName"),
+                    body.get("size"),
+                    image_name,
+                    int(body.get("isDestroyed", False)),
+                    body.get("activity", {}).get("showActivity"),
+                    flags["can_attack"],
+                    flags["can_transport"],
+                    flags["can_deploy"],
+                    flags["can_hold"],
+                    flags["can_espionage"],
+                    flags["can_destroy"],
+                    None,
+                    pos
+                ))
+
+            # ── ESCOMBROS
+            elif ptype == 2:
+                res = body.get("resources", {})
+                scan.debris.append((
+                    None, pos,
+                    int(res.get("metal", {}).get("amount", 0)),
+                    int(res.get("crystal", {}).get("amount", 0)),
+                    int(res.get("deuterium", {}).get("amount", 0)),
+                    body.get("requiredShips")
+                ))
+
+        # ── si hubo luna, vincularla al planeta del slot
+        if moon_id:
+            scan.moon_links.append((moon_id, pos))
+
+    return scan
+
+# ─────────────────────────────
+# Writer
+# ─────────────────────────────
+
+PLANET_SCAN_ID = table_index(TABLE_PLANETS, "scan_id")
+PLANET_POSITION = table_index(TABLE_PLANETS, "position")
+PLANET_MOON_ID = table_index(TABLE_PLANETS, "moon_id")
+MOON_SCAN_ID = table_index(TABLE_MOONS, "scan_id")
+DEBRIS_SCAN_ID = table_index(TABLE_DEBRIS, "scan_id")
+DEBRIS_POSITION = table_index(TABLE_DEBRIS, "position")
+
+def with_value(row, idx, value):
+    return row[:idx] + (value,) + row[idx + 1:]
+
+def with_scan_id(row, idx, scan_id):
+    return with_value(row, idx, scan_id)
+
+def scan_hash(scan):
+    """Hash del contenido del sistema (sin scanned_at): igual hash = nada que escribir."""
+    content = (scan.players, scan.planets, scan.moons, scan.debris, scan.images, scan.moon_links)
+    return hashlib.blake2b(repr(content).encode(), digest_size=16).hexdigest()
+
+def planet_rows(scan, scan_id):
+    """Planetas del sistema como quedan en la tabla: con scan_id y el moon_id de su slot."""
+    moons = {pos: moon_id for moon_id, pos in scan.moon_links}
+    return [
+        with_value(with_scan_id(p, PLANET_SCAN_ID, scan_id), PLANET_MOON_ID, moons.get(p[PLANET_POSITION]))
+        for p in scan.planets
+    ]
+
+def changed_rows(cur, table, table_cols, rows, where_col, key):
+    """
+    Las filas de `rows` que no están idénticas en la tabla. Lee las actuales con
+    `where_col IN (...)` y compara fila por fila usando `key(fila)` como identidad.
+    """
+    if not rows:
+        return []
+    names = ", ".join(col for col, _ in table_cols)
+    idx = table_index(table_cols, where_col)
+    values = sorted({row[idx] for row in rows})
+    current = {}
+    for i in range(0, len(values), 500):
+        chunk = values[i:i + 500]
+        for row in cur.execute(f"SELECT {names} FROM {table} WHERE {where_col} IN ({', '.join('?' * len(chunk))})", chunk):
+            current[key(row)] = row
+    return [row for row in rows if current.get(key(row)) != tuple(row)]
+
+@dataclass
+class WriteStats:
+    """Lo que escribió (y lo que se ahorró) el writer."""
+    systems: int = 0
+    unchanged: int = 0          # sistemas con el mismo hash que la vez anterior
+    rows_written: int = 0
+    rows_skipped: int = 0       # filas idénticas a las guardadas
+
+    def summary(self):
+        total = self.rows_written + self.rows_skipped
+        saved = 100 * self.rows_skipped / total if total else 0.0
+        return (f"{self.unchanged}/{self.systems} sistemas sin cambios, "
+                f"{self.rows_written} filas escritas, {self.rows_skipped} evitadas ({saved:.0f}%)")
+
+# La tabla players es global: un jugador que cambia en una galaxia aparece en los slots de otras
+PLAYERS_GENERATION = "players_generation"
+
+def generation_key(galaxy=None):
+    return "scan_generation" if galaxy is None else f"scan_generation:{galaxy}"
+
+def bump_generation(cur, galaxies, players=False):
+    """
+    Una generación nueva global y por cada galaxia escrita: invalida las cachés de lectura.
+    Con `players`, también la de la tabla players (consultas que la unen, de cualquier galaxia).
+    """
+    keys = [generation_key()] + [generation_key(g) for g in sorted(set(galaxies))]
+    if players:
+        keys.append(PLAYERS_GENERATION)
+    cur.executemany("""
+        INSERT INTO meta (key, value) VALUES (?, 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    """, [(k,) for k in keys])
+
+def write_system_scans(conn, scans, hooks=(), stats=None):
+    """
+    Escribe varios sistemas en una sola transacción, con un executemany por tabla.
+    Los sistemas cuyo contenido no cambió (mismo scan_hash) solo actualizan scanned_at;
+    del resto se escriben únicamente las filas distintas de las guardadas.
+    Los planetas, lunas y escombros que ya no están en un sistema escaneado se borran.
+    Cada hook se llama como hook(cur, scan, scan_id) dentro de la misma transacción,
+    también para los sistemas sin cambios; los que tienen estado fuera de la base pueden
+    definir commit() (se llama después del COMMIT) y rollback() (si la transacción falló).
+    La generación (cachés de lectura) solo avanza en las galaxias con algún sistema
+    cambiado. Retorna `stats` (WriteStats) actualizado.
+    """
+    stats = stats if stats is not None else WriteStats()
+    cur = conn.cursor()
+    try:
+        _write_system_scans(conn, cur, scans, hooks, stats)
+    except Exception:
+        for hook in hooks:
+            if hasattr(hook, "rollback"):
+                hook.rollback()
+        raise
+    for hook in hooks:
+        if hasattr(hook, "commit"):
+            hook.commit()
+    return stats
+
+def _write_system_scans(conn, cur, scans, hooks, stats):
+    scan_ids = []
+    players, planets, moons, debris, images = [], [], [], [], []
+    galaxy_of, debris_positions, present = {}, [], []
+    unchanged_players = set()
+
+    with conn:
+        for scan in scans:
+            cur.execute("""
+                INSERT INTO scans (galaxy, system, scanned_at, success)
+                VALUES (?, ?, ?, 1)
+                ON CONFLICT(galaxy, system)
+                DO UPDATE SET
+                    scanned_at = excluded.scanned_at,
+                    success = 1
+            """, (scan.galaxy, scan.system, scan.scanned_at))
+
+            cur.execute("""
+                SELECT id, content_hash FROM scans WHERE galaxy = ? AND system = ?
+            """, (scan.galaxy, scan.system))
+            scan_id, old_hash = cur.fetchone()
+            scan_ids.append(scan_id)
+            stats.systems += 1
+
+            new_hash = scan_hash(scan)
+            if new_hash == old_hash:
+                stats.unchanged += 1
+                unchanged_players.update(scan.players)
+                stats.rows_skipped += len(scan.planets) + len(scan.moons) + len(scan.debris)
+                continue
+            cur.execute("UPDATE scans SET content_hash = ?, had_debris = ? WHERE id = ?", (new_hash, int(bool(scan.debris)), scan_id))
+
+            players.extend(scan.players)
+            planets.extend(planet_rows(scan, scan_id))
+            moons.extend(with_scan_id(m, MOON_SCAN_ID, scan_id) for m in scan.moons)
+            debris.extend(with_scan_id(d, DEBRIS_SCAN_ID, scan_id) for d in scan.debris)
+            images.extend(scan.images)
+            galaxy_of[scan_id] = scan.galaxy
+            debris_positions.append((scan_id, json.dumps([d[DEBRIS_POSITION] for d in scan.debris])))
+            present.append((scan_id, json.dumps([p[0] for p in scan.planets]), json.dumps([m[0] for m in scan.moons])))
+
+        players = list(dict.fromkeys(players))
+        # Evitadas = filas idénticas a las guardadas; un jugador repetido entre sistemas cuenta una vez
+        stats.rows_skipped += len(unchanged_players.difference(players))
+        candidates = len(players) + len(planets) + len(moons) + len(debris)
+        players = changed_rows(cur, "players", TABLE_PLAYERS, players, "player_id", lambda r: r[0])
+        planets = changed_rows(cur, "planets", TABLE_PLANETS, planets, "scan_id", lambda r: r[0])
+        moons = changed_rows(cur, "moons", TABLE_MOONS, moons, "scan_id", lambda r: r[0])
+        debris = changed_rows(cur, "debris", TABLE_DEBRIS, debris, "scan_id", lambda r: (r[0], r[1]))
+        written = len(players) + len(planets) + len(moons) + len(debris)
+        stats.rows_written += written
+        stats.rows_skipped += candidates - written
+
+        cur.executemany(f"INSERT OR REPLACE INTO players {sql_insert_values(TABLE_PLAYERS)}", players)
+        cur.executemany(f"INSERT OR REPLACE INTO planets {sql_insert_values(TABLE_PLANETS)}", planets)
+        cur.executemany(f"INSERT OR REPLACE INTO moons {sql_insert_values(TABLE_MOONS)}", moons)
+        cur.executemany(
+            f"INSERT OR REPLACE INTO debris {sql_insert_values(TABLE_DEBRIS + [('galaxy', 'INTEGER')])}",
+            [d + (galaxy_of[d[DEBRIS_SCAN_ID]],) for d in debris]
+        )
+        cur.executemany("""
+            DELETE FROM debris
+            WHERE scan_id = ? AND position NOT IN (SELECT value FROM json_each(?))
+        """, debris_positions)
+        # Planetas destruidos, abandonados o mudados que el sistema ya no muestra
+        cur.executemany("""
+            DELETE FROM planets
+            WHERE scan_id = ? AND planet_id NOT IN (SELECT value FROM json_each(?))
+        """, [(scan_id, planet_ids) for scan_id, planet_ids, _ in present])
+        cur.executemany("""
+            DELETE FROM moons
+            WHERE scan_id = ? AND moon_id NOT IN (SELECT value FROM json_each(?))
+        """, [(scan_id, moon_ids) for scan_id, _, moon_ids in present])
+        cur.executemany("""
+            INSERT OR IGNORE INTO images (image_name, image_src)
+            VALUES (?, ?)
+        """, images)
+
+        for hook in hooks:
+            for scan, scan_id in zip(scans, scan_ids):
+                hook(cur, scan, scan_id)
+
+        if galaxy_of:
+            bump_generation(cur, set(galaxy_of.values()), players=bool(players))
+
+class GalaxyDBWriter(threading.Thread):
+    """
+    Único escritor de galaxy.db. Los threads de red solo hacen fetch + decode y
+    encolan SystemScan; este thread agrupa `batch_size` sistemas por transacción (WAL).
+    """
+    _STOP = object()
+
+    def __init__(self, db_path="galaxy.db", batch_size=25, max_delay=1.0, hooks=(), on_written=None, on_batch=None):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.hooks = list(hooks)
+        self.on_written = on_written   # on_written(scans) después de cada commit, desde este thread
+        self.on_batch = on_batch       # on_batch(segundos) con lo que tardó cada transacción (ver scan_metrics)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.q = queue.Queue()
+
+        self.systems = 0
+        self.batches = 0
+        self.db_time = 0.0
+        self.stats = WriteStats()
+
+    def submit(self, scan):
+        self.q.put(scan)
+
+    def close(self):
+        self.q.put(self._STOP)
+        self.join()
+
+    def flush(self, conn, batch):
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            write_system_scans(conn, batch, self.hooks, self.stats)
+            self.systems += len(batch)
+            self.batches += 1
+            if self.on_batch is not None:
+                self.on_batch(time.perf_counter() - start)
+        except Exception as e:
+            print(f"\n[DB] Error escribiendo {len(batch)} sistemas: {e}")
+            traceback.print_exc()
+        else:
+            if self.on_written is not None:
+                try:
+                    self.on_written(list(batch))
+                except Exception as e:
+                    print(f"\n[DB] Error en on_written: {e}")
+        self.db_time += time.perf_counter() - start
+        batch.clear()
+
+    def summary(self):
+        return (f"{self.systems} sistemas en {self.batches} transacciones, {self.db_time:.2f}s de escritura; "
+                f"{self.stats.summary()}")
+
+    def run(self):
+        conn = init_db(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.q.get(timeout=timeout)
+            except queue.Empty:
+                self.flush(conn, batch)
+                deadline = None
+                continue
+
+            if item is self._STOP:
+                self.flush(conn, batch)
+                break
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.max_delay
+            if len(batch) >= self.batch_size:
+                self.flush(conn, batch)
+                deadline = None
+
+        # Hooks con estado fuera de la base (ej. GridRecorder)
+        for hook in self.hooks:
+            if hasattr(hook, "flush"):
+                hook.flush()
+        conn.close()
@@ -0,0 +1,311 @@
+"""
+Decodificación rápida de fetchGalaxyContent.
+
+`decode_galaxy_text` (galaxy_db) hace text.strip() + json.loads del documento completo y
+después recorre dicts con muchos .get. Acá se decodifican directamente los bytes crudos a
+structs de msgspec que solo declaran los campos que guardamos: el resto del JSON se
+saltea sin crear objetos Python.
+
+Si msgspec no está instalado, o la respuesta no valida contra los structs (el juego
+cambió un tipo, un campo raro...), se cae al camino de referencia `scan_from_dict`
+parseando con orjson o json.
+
+Micro-benchmark sobre respuestas grabadas (ver galaxy_replay --capture), con chequeo de
+que ambos caminos dan las mismas filas (fixtures + casos borde de PARITY_CASES):
+    python -m workers.galaxy_decode fixtures/ [--repeat 20] [--check]
+"""
+import argparse, json, time
+from typing import Optional, Union
+from workers.galaxy_db import MISSION_FLAGS, SystemScan, decode_galaxy_text, scan_from_dict
+from workers.galaxy_replay import load_fixtures
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+# ─────────────────────────────
+# Structs
+# ─────────────────────────────
+
+if msgspec is not None:
+    class Activity(msgspec.Struct):
+        showActivity: Union[int, bool, str, None] = None
+
+    class Mission(msgspec.Struct):
+        missionType: Union[int, str, None] = None
+
+    class Amount(msgspec.Struct):
+        amount: Union[int, float, str] = 0
+
+    class Resources(msgspec.Struct):
+        metal: Optional[Amount] = None
+        crystal: Optional[Amount] = None
+        deuterium: Optional[Amount] = None
+
+    class Body(msgspec.Struct):
+        planetType: Optional[int] = None
+        planetId: Union[int, str, None] = None
+        planetName: Optional[str] = None
+        playerId: Union[int, str, None] = None
+        imageInformation: Optional[str] = None
+        imageSrc: Optional[str] = None
+        isDestroyed: bool = False
+        activity: Optional[Activity] = None
+        availableMissions: list[Mission] = []
+        size: Union[int, str, None] = None
+        resources: Optional[Resources] = None
+        requiredShips: Union[int, str, None] = None
+
+    class Player(msgspec.Struct):
+        # Sin default: un jugador sin playerId no valida y va al camino de referencia
+        playerId: Union[int, str, None]
+        playerName: Optional[str] = None
+        allianceId: Union[int, str, None] = None
+        allianceTag: Optional[str] = None
+        highscorePositionPlayer: Union[int, str, None] = None
+        isActive: bool = False
+        isInactive: bool = False
+        isOnVacation: bool = False
+        isBanned: bool = False
+
+    class Row(msgspec.Struct):
+        position: Optional[int] = None
+        player: Optional[Player] = None
+        planets: Union[list[Body], Body, None] = None
+
+    class System(msgspec.Struct):
+        galaxyContent: list[Row] = []
+
+    class GalaxyResponse(msgspec.Struct):
+        system: Optional[System] = None
+
+    _decoder = msgspec.json.Decoder(GalaxyResponse)
+
+# ─────────────────────────────
+# Decode
+# ─────────────────────────────
+
+def mission_flags(missions):
+    result = dict.fromkeys(MISSION_FLAGS.values(), 0)
+    for m in missions:
+        name = MISSION_FLAGS.get(m.missionType)
+        if name:
+            result[name] = 1
+    return result
+
+def amount(res, name):
+    value = getattr(res, name) if res is not None else None
+    return int(value.amount) if value is not None else 0
+
+def scan_from_struct(resp, galaxy, system):
+    """Mismas filas que scan_from_dict, pero a partir de los structs tipados."""
+    scan = SystemScan(galaxy, system, time.time())
+    rows = resp.system.galaxyContent if resp.system is not None else []
+
+    for row in rows:
+        pos = row.position
+        if not pos:
+            continue
+
+        player = row.player
+        if player is not None and player.playerId is not None and player.playerId != 99999:
+            scan.players.append((
+                player.playerId,
+                player.playerName,
+                player.allianceId,
+                player.allianceTag,
+                player.highscorePositionPlayer,
+                int(player.isActive),
+                int(player.isInactive),
+                int(player.isOnVacation),
+                int(player.isBanned)
+            ))
+
+        bodies = row.planets
+        if bodies is None:
+            bodies = []
+        elif not isinstance(bodies, list):
+            bodies = [bodies]
+
+        moon_id = None
+        for body in bodies:
+            ptype = body.planetType
+            if ptype == 1 or ptype == 3:
+                flags = mission_flags(body.availableMissions)
+                image_name = body.imageInformation
+                if image_name and body.imageSrc:
+                    scan.images.append((image_name, body.imageSrc))
+                activity = body.activity.showActivity if body.activity is not None else None
+
+            # ── PLANETA
+            if ptype == 1:
+                scan.planets.append((
+                    body.planetId,
+                    body.planetName,
+                    body.playerId,
+                    image_name,
+                    int(body.isDestroyed),
+                    activity,
+                    None,
+                    pos,
+                    None,
+                    flags["can_attack"],
+                    flags["can_transport"],
+                    flags["can_deploy"],
+                    flags["can_hold"],
+                    flags["can_espionage"]
+                ))
+
+            # ── LUNA
+            elif ptype == 3:
+                moon_id = body.planetId
+                scan.moons.append((
+                    moon_id,
+                    body.planetName,
+                    body.size,
+                    image_name,
+                    int(body.isDestroyed),
+                    activity,
+                    flags["can_attack"],
+                    flags["can_transport"],
+                    flags["can_deploy"],
+                    flags["can_hold"],
+                    flags["can_espionage"],
+                    flags["can_destroy"],
+                    None,
+                    pos
+                ))
+
+            # ── ESCOMBROS
+            elif ptype == 2:
+                res = body.resources
+                scan.debris.append((
+                    None, pos,
+                    amount(res, "metal"),
+                    amount(res, "crystal"),
+                    amount(res, "deuterium"),
+                    body.requiredShips
+                ))
+
+        if moon_id:
+            scan.moon_links.append((moon_id, pos))
+
+    return scan
+
+def is_json_body(body):
+    # Solo mirar el principio: no copiar todo el cuerpo para un strip
+    return body[:64].lstrip()[:1] in (b"{", "{")
+
+def decode_galaxy(body, galaxy, system):
+    """
+    bytes (o str) de fetchGalaxyContent -> SystemScan. None si no es JSON (sesión caída).
+    Camino rápido con msgspec; si no valida, el camino de referencia.
+    """
+    if not is_json_body(body):
+        return None
+    if msgspec is not None:
+        try:
+            return scan_from_struct(_decoder.decode(body), galaxy, system)
+        except (msgspec.ValidationError, ValueError, TypeError):
+            pass
+    return scan_from_dict(loads(body), galaxy, system)
+
+# ─────────────────────────────
+# Micro-benchmark
+# ─────────────────────────────
+
+def same_rows(a, b):
+    return all(getattr(a, f) == getattr(b, f) for f in ("players", "planets", "moons", "debris", "images", "moon_links"))
+
+def _case(*rows):
+    return json.dumps({"system": {"galaxyContent": list(rows)}}).encode()
+
+# Respuestas armadas a mano con lo que las fixtures capturadas pueden no traer
+PARITY_CASES = [
+    _case({"position": 1, "player": {}, "planets": []}),
+    _case({"position": 2, "player": {"playerName": "sin id"}, "planets": None}),
+    _case({"position": 3, "player": {"playerId": None, "playerName": "id nulo"}}),
+    _case({"position": 4, "player": {"playerId": 99999, "playerName": "espacio"}}),
+    _case({"position": 5, "player": {"playerId": 7, "playerName": "p7", "isInactive": True},
+           "planets": {"planetType": 1, "planetId": 70, "planetName": "uno", "playerId": 7,
+                       "activity": {"showActivity": 15}, "availableMissions": [{"missionType": 1}]}}),
+    _case({"position": 16, "planets": [{"planetType": 2, "requiredShips": 3,
+           "resources": {"metal": {"amount": 1000}, "crystal": {"amount": 500}, "deuterium": {"amount": 0}}}]}),
+]
+
+def parity(fixtures):
+    """
+    (galaxia, sistema) de las respuestas donde decode_galaxy, o el camino msgspec cuando
+    valida, no da las mismas filas que el de referencia. Los casos de PARITY_CASES van
+    como galaxia 0.
+    """
+    bodies = sorted(fixtures.items()) + [((0, i), body) for i, body in enumerate(PARITY_CASES, 1)]
+    mismatches = []
+    for (g, s), body in bodies:
+        if not is_json_body(body):
+            continue
+        reference = decode_galaxy_text(body.decode("utf-8"), g, s)
+        scans = [decode_galaxy(body, g, s)]
+        if msgspec is not None:
+            try:
+                scans.append(scan_from_struct(_decoder.decode(body), g, s))
+            except (msgspec.ValidationError, ValueError, TypeError):
+                pass
+        if not all(same_rows(scan, reference) for scan in scans):
+            mismatches.append((g, s))
+    return mismatches
+
+def bench(fixtures, repeat=20):
+    """µs por sistema de cada camino, y cuántas respuestas difieren del de referencia."""
+    bodies = [((g, s), body) for (g, s), body in sorted(fixtures.items())]
+    paths = {
+        "json + dicts (referencia)": lambda body, g, s: decode_galaxy_text(body.decode("utf-8"), g, s),
+        "orjson + dicts": lambda body, g, s: scan_from_dict(loads(body), g, s),
+    }
+    if msgspec is not None:
+        paths["msgspec structs"] = lambda body, g, s: scan_from_struct(_decoder.decode(body), g, s)
+    paths["decode_galaxy"] = decode_galaxy
+
+    results = {}
+    for name, fn in paths.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for (g, s), body in bodies:
+                fn(body, g, s)
+        results[name] = (time.perf_counter() - start) / (repeat * len(bodies)) * 1e6
+
+    return results, parity(fixtures)
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark de decodificación de fetchGalaxyContent")
+    parser.add_argument("fixtures", help="directorio con fixtures capturadas (--capture)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--check", action="store_true", help="solo comparar las filas de ambos caminos (sale con 1 si difieren)")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if args.check:
+        mismatches = parity(fixtures)
+        print(f"[DECODE] {len(fixtures)} fixtures + {len(PARITY_CASES)} casos borde: "
+              + (f"⚠️  {len(mismatches)} difieren: {mismatches[:10]}" if mismatches else "✅ mismas filas"))
+        raise SystemExit(1 if mismatches else 0)
+    results, mismatches = bench(fixtures, args.repeat)
+    base = results["json + dicts (referencia)"]
+    print(f"[DECODE] {len(fixtures)} respuestas x {args.repeat} (msgspec {'sí' if msgspec else 'no'})")
+    for name, us in results.items():
+        print(f"  {name:<28} {us:8.1f} µs/sistema  x{base / us:.2f}")
+    if mismatches:
+        print(f"[DECODE] ⚠️  {len(mismatches)} respuestas difieren del camino de referencia: {mismatches[:10]}")
+    else:
+        print("[DECODE] ✅ mismas filas que el camino de referencia")
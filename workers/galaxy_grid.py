@@ -0,0 +1,307 @@
+"""
+Grilla del universo en memoria compartida.
+
+El universo son GALAXIES x 499 sistemas x 16 posiciones: como registros de tamaño fijo
+entra en ~2 MB. El scanner mantiene un array estructurado de NumPy mapeado a disco
+(galaxy_grid.npy) con un registro por slot; las pestañas de flota y escombros y el
+visualizador lo abren con np.load(mmap_mode="r") sin parsear nada, y los filtros sobre
+todo el universo ("escombros > 1M en G3") son operaciones vectorizadas.
+
+La grilla es una vista derivada de galaxy.db: si se pierde o queda desfasada se
+reconstruye desde la base.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_grid rebuild [--db galaxy.db]
+    python -m workers.galaxy_grid debris [--galaxy 3] [--min 1000000]
+"""
+import argparse, os, sqlite3, time
+import numpy as np
+
+GALAXIES = 5
+SYSTEMS = 499
+POSITIONS = 16
+SHAPE = (GALAXIES, SYSTEMS, POSITIONS)
+
+GRID_PATH = "galaxy_grid.npy"
+
+GRID_DTYPE = np.dtype([
+    ("player_id", "<i4"),
+    ("alliance_id", "<i4"),
+    ("rank", "<i4"),
+    ("flags", "<u2"),
+    ("activity", "<i2"),       # minutos desde la última actividad, -1 sin actividad visible
+    ("moon_size", "<u2"),
+    ("required_ships", "<u4"),
+    ("metal", "<i8"),
+    ("crystal", "<i8"),
+    ("deuterium", "<i8"),
+    ("last_seen", "<f8"),      # scanned_at del último escaneo del sistema, 0 si nunca
+])
+
+# Bits de `flags`
+HAS_PLANET = 1
+HAS_MOON = 2
+HAS_DEBRIS = 4
+INACTIVE = 8
+VACATION = 16
+BANNED = 32
+DESTROYED = 64
+
+def grid_path_for(db_path):
+    """galaxy.db -> galaxy_grid.npy, al lado de la base."""
+    return os.path.splitext(db_path)[0] + "_grid.npy"
+
+def _int(value, default=0):
+    if value is None or isinstance(value, bool):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _activity(value):
+    # showActivity: 15 (activo), minutos 16-59, o False/None
+    minutes = _int(value, -1)
+    return minutes if minutes > 0 else -1
+
+# ─────────────────────────────
+# Archivo
+# ─────────────────────────────
+
+def create_grid(path=GRID_PATH):
+    """Crea (o abre para escribir) la grilla. Si el formato cambió, la recrea vacía."""
+    if os.path.exists(path):
+        try:
+            grid = np.lib.format.open_memmap(path, mode="r+")
+            if grid.dtype == GRID_DTYPE and grid.shape == SHAPE:
+                return grid
+            del grid
+        except (ValueError, OSError):
+            pass
+    grid = np.lib.format.open_memmap(path, mode="w+", dtype=GRID_DTYPE, shape=SHAPE)
+    grid.flush()
+    return grid
+
+def load_grid(path=GRID_PATH):
+    """Grilla de solo lectura (memmap). None si no existe o tiene otro formato."""
+    try:
+        grid = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if grid.dtype != GRID_DTYPE or grid.shape != SHAPE:
+        return None
+    return grid
+
+def in_grid(galaxy, system, position=1):
+    return 1 <= galaxy <= GALAXIES and 1 <= system <= SYSTEMS and 1 <= position <= POSITIONS
+
+# ─────────────────────────────
+# Escritura
+# ─────────────────────────────
+
+def system_records(scan):
+    """Los 16 registros de un SystemScan, en el dtype de la grilla."""
+    rows = np.zeros(POSITIONS, dtype=GRID_DTYPE)
+    rows["activity"] = -1
+    rows["last_seen"] = scan.scanned_at
+    players = {p[0]: p for p in scan.players}
+    moons = {m[0]: m for m in scan.moons}
+
+    for pl in scan.planets:
+        pos, player_id = pl[7], pl[2]
+        if not 1 <= pos <= POSITIONS:
+            continue
+        r = rows[pos - 1]
+        flags = HAS_PLANET | (DESTROYED if pl[4] else 0)
+        r["player_id"] = _int(player_id)
+        r["activity"] = _activity(pl[5])
+        owner = players.get(player_id)
+        if owner:
+            r["alliance_id"] = _int(owner[2])
+            r["rank"] = _int(owner[4])
+            flags |= (INACTIVE if owner[6] else 0) | (VACATION if owner[7] else 0) | (BANNED if owner[8] else 0)
+        r["flags"] |= flags
+
+    for moon_id, pos in scan.moon_links:
+        if not 1 <= pos <= POSITIONS:
+            continue
+        rows[pos - 1]["flags"] |= HAS_MOON
+        moon = moons.get(moon_id)
+        if moon:
+            rows[pos - 1]["moon_size"] = _int(moon[2])
+
+    for _, pos, m, c, d, ships in scan.debris:
+        if not 1 <= pos <= POSITIONS:
+            continue
+        r = rows[pos - 1]
+        r["flags"] |= HAS_DEBRIS
+        r["metal"], r["crystal"], r["deuterium"] = _int(m), _int(c), _int(d)
+        r["required_ships"] = _int(ships)
+
+    return rows
+
+class GridRecorder:
+    """
+    Hook del writer: prepara los 16 slots de cada sistema dentro de la transacción y los
+    escribe en la grilla recién en commit(), cuando galaxy.db ya tiene esos datos; si la
+    transacción falla, rollback() los descarta. Los lectores de otros procesos ven el
+    cambio al instante (mapeo compartido); flush() cada `flush_every` sistemas es solo
+    para que llegue al disco.
+    """
+    def __init__(self, path=GRID_PATH, flush_every=25):
+        self.path = path
+        self.flush_every = flush_every
+        self.grid = None
+        self.pending = 0
+        self.staged = {}
+
+    def __call__(self, cur, scan, scan_id):
+        if in_grid(scan.galaxy, scan.system):
+            self.staged[(scan.galaxy, scan.system)] = system_records(scan)
+
+    def commit(self):
+        if not self.staged:
+            return
+        if self.grid is None:
+            self.grid = create_grid(self.path)
+        for (g, s), rows in self.staged.items():
+            self.grid[g - 1, s - 1] = rows
+        self.pending += len(self.staged)
+        self.staged = {}
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def rollback(self):
+        self.staged = {}
+
+    def flush(self):
+        if self.grid is not None:
+            self.grid.flush()
+            self.pending = 0
+
+def rebuild_grid(db_path="galaxy.db", path=None):
+    """Reconstruye la grilla entera desde galaxy.db. Devuelve la cantidad de sistemas."""
+    path = path or grid_path_for(db_path)
+    conn = sqlite3.connect(db_path)
+    grid = np.zeros(SHAPE, dtype=GRID_DTYPE)
+
+    scans = {}
+    for scan_id, g, s, ts in conn.execute("SELECT id, galaxy, system, scanned_at FROM scans"):
+        if in_grid(g, s):
+            scans[scan_id] = (g - 1, s - 1)
+            grid["last_seen"][g - 1, s - 1] = ts
+            grid["activity"][g - 1, s - 1] = -1
+
+    for scan_id, pos, player_id, destroyed, activity, alliance_id, rank, inactive, vacation, banned in conn.execute("""
+        SELECT p.scan_id, p.position, p.player_id, p.is_destroyed, p.activity,
+               pl.alliance_id, pl.rank_position, pl.is_inactive, pl.is_vacation, pl.is_banned
+        FROM planets p LEFT JOIN players pl ON pl.player_id = p.player_id
+    """):
+        if scan_id not in scans or not 1 <= pos <= POSITIONS:
+            continue
+        r = grid[scans[scan_id] + (pos - 1,)]
+        r["player_id"] = _int(player_id)
+        r["activity"] = _activity(activity)
+        r["alliance_id"] = _int(alliance_id)
+        r["rank"] = _int(rank)
+        r["flags"] |= (HAS_PLANET | (DESTROYED if destroyed else 0) | (INACTIVE if inactive else 0)
+                       | (VACATION if vacation else 0) | (BANNED if banned else 0))
+
+    for scan_id, pos, size in conn.execute("SELECT scan_id, position, size FROM moons WHERE scan_id IS NOT NULL"):
+        if scan_id not in scans or not 1 <= pos <= POSITIONS:
+            continue
+        r = grid[scans[scan_id] + (pos - 1,)]
+        r["flags"] |= HAS_MOON
+        r["moon_size"] = _int(size)
+
+    for scan_id, pos, m, c, d, ships in conn.execute("SELECT scan_id, position, metal, crystal, deuterium, required_ships FROM debris"):
+        if scan_id not in scans or not 1 <= pos <= POSITIONS:
+            continue
+        r = grid[scans[scan_id] + (pos - 1,)]
+        r["flags"] |= HAS_DEBRIS
+        r["metal"], r["crystal"], r["deuterium"] = _int(m), _int(c), _int(d)
+        r["required_ships"] = _int(ships)
+    conn.close()
+
+    out = create_grid(path)
+    out[:] = grid
+    out.flush()
+    return len(scans)
+
+# ─────────────────────────────
+# Lectura
+# ─────────────────────────────
+
+def _select(grid, galaxy):
+    return grid if galaxy is None else grid[galaxy - 1:galaxy]
+
+def _coords(mask, galaxy):
+    g, s, p = np.nonzero(mask)
+    return g + (1 if galaxy is None else galaxy), s + 1, p + 1
+
+def has(grid, flag, galaxy=None):
+    """Máscara booleana (galaxia, sistema, posición) de los slots con `flag`."""
+    return (_select(grid, galaxy)["flags"] & flag) != 0
+
+def debris_total(grid, galaxy=None):
+    view = _select(grid, galaxy)
+    return view["metal"] + view["crystal"] + view["deuterium"]
+
+def debris_slots(grid, min_total=0, galaxy=None):
+    """
+    Escombros con al menos `min_total` recursos, de mayor a menor. Devuelve un dict de
+    arrays: galaxy, system, position, metal, crystal, deuterium, total, required_ships, last_seen.
+    """
+    view = _select(grid, galaxy)
+    total = debris_total(grid, galaxy)
+    mask = has(grid, HAS_DEBRIS, galaxy) & (total >= min_total)
+    order = np.argsort(-total[mask], kind="stable")
+
+    g, s, p = _coords(mask, galaxy)
+    result = {"galaxy": g, "system": s, "position": p, "total": total[mask]}
+    for name in ("metal", "crystal", "deuterium", "required_ships", "last_seen"):
+        result[name] = view[name][mask]
+    return {k: v[order] for k, v in result.items()}
+
+def inactive_slots(grid, galaxy=None):
+    """(galaxias, sistemas, posiciones) de planetas de inactivos, sin vacaciones, baneo ni destruidos."""
+    flags = _select(grid, galaxy)["flags"]
+    mask = ((flags & (HAS_PLANET | INACTIVE)) == (HAS_PLANET | INACTIVE)) & ((flags & (VACATION | BANNED | DESTROYED)) == 0)
+    return _coords(mask, galaxy)
+
+def slot_info(grid, galaxy, system, position):
+    """Registro del slot como dict (None si está fuera de la grilla o nunca se escaneó)."""
+    if grid is None or not in_grid(galaxy, system, position):
+        return None
+    r = grid[galaxy - 1, system - 1, position - 1]
+    if not r["last_seen"]:
+        return None
+    return {name: r[name].item() for name in GRID_DTYPE.names}
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grilla memory-mapped del universo")
+    parser.add_argument("command", choices=["rebuild", "debris"])
+    parser.add_argument("--db", default="galaxy.db")
+    parser.add_argument("--galaxy", type=int)
+    parser.add_argument("--min", type=int, default=0, help="recursos mínimos del escombro")
+    args = parser.parse_args()
+
+    path = grid_path_for(args.db)
+    if args.command == "rebuild":
+        start = time.perf_counter()
+        n = rebuild_grid(args.db, path)
+        print(f"[GRID] {n} sistemas en {path} ({time.perf_counter() - start:.2f}s)")
+    else:
+        grid = load_grid(path)
+        if grid is None:
+            raise SystemExit(f"[GRID] No hay grilla en {path} (python -m workers.galaxy_grid rebuild)")
+        start = time.perf_counter()
+        found = debris_slots(grid, args.min, args.galaxy)
+        elapsed = (time.perf_counter() - start) * 1e6
+        for i in range(min(20, len(found["total"]))):
+            print(f"  {found['galaxy'][i]}:{found['system'][i]}:{found['position'][i]}  {found['total'][i]:,}")
+        print(f"[GRID] {len(found['total'])} escombros en {elapsed:.0f} µs")
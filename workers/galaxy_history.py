@@ -0,0 +1,273 @@
+"""
+Historial append-only de galaxy.db, codificado como deltas por slot.
+
+`players`, `planets`, `moons` y `debris` se pisan en cada escaneo. Este módulo guarda, por
+(galaxia, sistema, posición), solo los campos que cambiaron respecto del escaneo anterior
+(actividad, inactivo, vacaciones, ranking, aparición de luna, escombros...). Cada
+KEYFRAME_EVERY cambios se escribe el estado completo, así reconstruir un slot en cualquier
+momento pasado lee como mucho KEYFRAME_EVERY filas.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_history <g:s:p> [--at "2026-01-31 18:00"]
+"""
+import argparse, json, sqlite3, time
+from datetime import datetime
+from workers.galaxy_db import TABLE_PLANETS, table_index, sql_create
+
+TABLE_SLOT_HISTORY = [("galaxy", 'INTEGER'), ("system", 'INTEGER'), ("position", 'INTEGER'), ("ts", 'REAL'), ("keyframe", 'INTEGER'), ("data", 'TEXT')]
+TABLE_SLOT_CURRENT = [("galaxy", 'INTEGER'), ("system", 'INTEGER'), ("position", 'INTEGER'), ("state", 'TEXT'), ("since_keyframe", 'INTEGER')]
+
+KEYFRAME_EVERY = 32
+
+# Código corto guardado en el delta -> nombre del campo
+FIELDS = {
+    "p": "player_id",
+    "a": "alliance_id",
+    "r": "rank_position",
+    "i": "is_inactive",
+    "v": "is_vacation",
+    "b": "is_banned",
+    "P": "planet_id",
+    "A": "activity",
+    "D": "is_destroyed",
+    "M": "moon_id",
+    "S": "moon_size",
+    "m": "metal",
+    "c": "crystal",
+    "d": "deuterium",
+}
+
+PLANET_POSITION = table_index(TABLE_PLANETS, "position")
+
+SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS slot_history ({sql_create(TABLE_SLOT_HISTORY)})",
+    "CREATE INDEX IF NOT EXISTS idx_slot_history_slot ON slot_history (galaxy, system, position, ts)",
+    f"CREATE TABLE IF NOT EXISTS slot_current ({sql_create(TABLE_SLOT_CURRENT)}, PRIMARY KEY (galaxy, system, position))",
+]
+
+def init_history(conn):
+    for sql in SCHEMA:
+        conn.execute(sql)
+    conn.commit()
+
+# ─────────────────────────────
+# Encoding
+# ─────────────────────────────
+
+def encode(state):
+    return json.dumps(state, separators=(",", ":"))
+
+def decode(data):
+    return json.loads(data)
+
+def diff(old, new):
+    """Campos nuevos o cambiados; los que desaparecen van como null."""
+    delta = {k: v for k, v in new.items() if old.get(k) != v}
+    delta.update({k: None for k in old if k not in new})
+    return delta
+
+def apply(state, delta):
+    for k, v in delta.items():
+        if v is None:
+            state.pop(k, None)
+        else:
+            state[k] = v
+    return state
+
+def slot_states(scan):
+    """Estado compacto de cada posición ocupada del sistema."""
+    players = {p[0]: p for p in scan.players}
+    moons = {m[0]: m for m in scan.moons}
+    states = {}
+
+    for pl in scan.planets:
+        st = states.setdefault(pl[PLANET_POSITION], {})
+        st["P"] = pl[0]
+        st["p"] = pl[2]
+        st["D"] = pl[4]
+        if pl[5]:
+            st["A"] = pl[5]
+        owner = players.get(pl[2])
+        if owner:
+            st["a"] = owner[2]
+            st["r"] = owner[4]
+            st["i"] = owner[6]
+            st["v"] = owner[7]
+            st["b"] = owner[8]
+
+    for moon_id, pos in scan.moon_links:
+        st = states.setdefault(pos, {})
+        st["M"] = moon_id
+        moon = moons.get(moon_id)
+        if moon and moon[2] is not None:
+            st["S"] = moon[2]
+
+    for _, pos, m, c, d, _ in scan.debris:
+        st = states.setdefault(pos, {})
+        if m: st["m"] = m
+        if c: st["c"] = c
+        if d: st["d"] = d
+
+    return {pos: {k: v for k, v in st.items() if v is not None} for pos, st in states.items()}
+
+# ─────────────────────────────
+# Writer hook
+# ─────────────────────────────
+
+class HistoryRecorder:
+    """Hook del writer: agrega a slot_history los deltas de cada slot que cambió."""
+    def __init__(self):
+        self._ready = False
+
+    def __call__(self, cur, scan, scan_id):
+        if not self._ready:
+            for sql in SCHEMA:
+                cur.execute(sql)
+            self._ready = True
+
+        g, s, ts = scan.galaxy, scan.system, scan.scanned_at
+        new = slot_states(scan)
+        old = {
+            pos: (decode(state), n)
+            for pos, state, n in cur.execute(
+                "SELECT position, state, since_keyframe FROM slot_current WHERE galaxy = ? AND system = ?", (g, s)
+            ).fetchall()
+        }
+
+        history, current = [], []
+        for pos in sorted(set(new) | set(old)):
+            state = new.get(pos, {})
+            if pos in old:
+                prev, n = old[pos]
+                if prev == state:
+                    continue
+                if n + 1 >= KEYFRAME_EVERY:
+                    history.append((g, s, pos, ts, 1, encode(state)))
+                    n = 0
+                else:
+                    history.append((g, s, pos, ts, 0, encode(diff(prev, state))))
+                    n += 1
+            else:
+                if not state:
+                    continue
+                history.append((g, s, pos, ts, 1, encode(state)))
+                n = 0
+            current.append((g, s, pos, encode(state), n))
+
+        cur.executemany("INSERT INTO slot_history (galaxy, system, position, ts, keyframe, data) VALUES (?, ?, ?, ?, ?, ?)", history)
+        cur.executemany("INSERT OR REPLACE INTO slot_current (galaxy, system, position, state, since_keyframe) VALUES (?, ?, ?, ?, ?)", current)
+
+# ─────────────────────────────
+# Consultas en el tiempo
+# ─────────────────────────────
+
+def expand(state):
+    return {FIELDS.get(k, k): v for k, v in state.items()}
+
+def keyframe_before(conn, galaxy, system, position, ts):
+    start = conn.execute("""
+        SELECT MAX(ts) FROM slot_history
+        WHERE galaxy = ? AND system = ? AND position = ? AND keyframe = 1 AND ts <= ?
+    """, (galaxy, system, position, ts)).fetchone()[0]
+    return 0.0 if start is None else start
+
+def replay(conn, galaxy, system, position, start, until):
+    """Genera (ts, estado compacto) aplicando deltas desde `start`."""
+    state = {}
+    for ts, keyframe, data in conn.execute("""
+        SELECT ts, keyframe, data FROM slot_history
+        WHERE galaxy = ? AND system = ? AND position = ? AND ts >= ? AND ts <= ?
+        ORDER BY ts, rowid
+    """, (galaxy, system, position, start, until)):
+        state = decode(data) if keyframe else apply(state, decode(data))
+        yield ts, state
+
+def slot_timeline(conn, galaxy, system, position, since=0.0, until=None):
+    """Genera (ts, estado) por cada cambio del slot entre `since` y `until`."""
+    until = time.time() if until is None else until
+    start = keyframe_before(conn, galaxy, system, position, since)
+    for ts, state in replay(conn, galaxy, system, position, start, until):
+        if ts >= since:
+            yield ts, expand(state)
+
+def slot_at(conn, galaxy, system, position, ts=None):
+    """Estado del slot en el instante `ts` (None = ahora). None si no hay datos previos."""
+    ts = time.time() if ts is None else ts
+    start = keyframe_before(conn, galaxy, system, position, ts)
+    last = None
+    for _, state in replay(conn, galaxy, system, position, start, ts):
+        last = state
+    return expand(last) if last is not None else None
+
+def system_at(conn, galaxy, system, ts=None):
+    positions = [r[0] for r in conn.execute(
+        "SELECT DISTINCT position FROM slot_history WHERE galaxy = ? AND system = ?", (galaxy, system)
+    )]
+    result = {}
+    for pos in positions:
+        state = slot_at(conn, galaxy, system, pos, ts)
+        if state:
+            result[pos] = state
+    return result
+
+def field_changes(conn, galaxy, system, position, field, since=0.0):
+    """[(ts, valor)] cada vez que `field` cambió en el slot."""
+    changes, last = [], object()
+    for ts, state in slot_timeline(conn, galaxy, system, position, since=since):
+        value = state.get(field)
+        if value != last:
+            changes.append((ts, value))
+            last = value
+    return changes
+
+def player_slots(conn, player_id):
+    return conn.execute("""
+        SELECT galaxy, system, position FROM slot_current
+        WHERE json_extract(state, '$.p') = ?
+    """, (player_id,)).fetchall()
+
+def player_history(conn, player_id, field):
+    """
+    Cambios de `field` para un jugador, tomados de sus slots actuales.
+    Ej: player_history(conn, pid, "is_inactive") -> cuándo pasó a inactivo.
+    """
+    changes = []
+    for g, s, p in player_slots(conn, player_id):
+        last = object()
+        for ts, state in slot_timeline(conn, g, s, p):
+            if state.get("player_id") != player_id:
+                last = object()
+                continue
+            value = state.get(field)
+            if value != last:
+                changes.append((ts, value))
+                last = value
+    changes.sort()
+    # Un mismo cambio aparece una vez por planeta: quedarse con la primera observación
+    merged, last = [], object()
+    for ts, value in changes:
+        if value != last:
+            merged.append((ts, value))
+            last = value
+    return merged
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historial de un slot de galaxia")
+    parser.add_argument("coords", help="galaxia:sistema:posición")
+    parser.add_argument("--at", help="fecha 'YYYY-MM-DD HH:MM' (por defecto muestra todos los cambios)")
+    parser.add_argument("--db", default="galaxy.db")
+    args = parser.parse_args()
+
+    g, s, p = map(int, args.coords.split(":"))
+    conn = sqlite3.connect(args.db)
+    if args.at:
+        ts = datetime.strptime(args.at, "%Y-%m-%d %H:%M").timestamp()
+        print(slot_at(conn, g, s, p, ts))
+    else:
+        for ts, state in slot_timeline(conn, g, s, p):
+            print(datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"), state)
+    conn.close()
@@ -0,0 +1,296 @@
+"""
+Consultas de lectura sobre galaxy.db.
+
+SQL fijo por consulta (sqlite3 cachea el statement preparado por texto) y pensado para
+los índices de las migraciones de galaxy_db: escombros, objetivos inactivos, jugadores y
+slots se resuelven con búsquedas por índice en vez de recorrer tablas.
+
+`GalaxyReader` pone una caché LRU delante: cada resultado queda asociado a la generación
+(tabla meta) de su galaxia, que el writer incrementa al guardar. Mientras no llegan datos
+nuevos, repetir una consulta desde la UI no toca SQLite más allá de un PRAGMA data_version.
+
+Ver el plan de cada consulta (desde la raíz del repo):
+    python -m workers.galaxy_query [--db galaxy.db]
+"""
+import argparse, sqlite3, threading
+from collections import OrderedDict
+from workers.galaxy_db import PLAYERS_GENERATION, generation_key, init_db
+
+def connect(db_path="galaxy.db"):
+    """Conexión de solo lectura (migra antes el esquema si hace falta)."""
+    init_db(db_path).close()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+# ─────────────────────────────
+# SQL
+# ─────────────────────────────
+
+SQL_SYSTEM_SLOTS = """
+    SELECT p.position, p.planet_id, p.name AS planet_name, p.player_id, pl.name AS player_name,
+           pl.alliance_tag, pl.rank_position, pl.is_inactive, pl.is_vacation, pl.is_banned,
+           p.activity, p.is_destroyed, m.moon_id, m.size AS moon_size
+    FROM scans s
+    JOIN planets p ON p.scan_id = s.id
+    LEFT JOIN players pl ON pl.player_id = p.player_id
+    LEFT JOIN moons m ON m.scan_id = s.id AND m.position = p.position
+    WHERE s.galaxy = ? AND s.system = ?
+    ORDER BY p.position
+"""
+
+SQL_SLOTS_RANGE = """
+    SELECT s.system, p.position, p.planet_id, p.name AS planet_name, p.player_id, pl.name AS player_name,
+           pl.alliance_tag, pl.rank_position, pl.is_inactive, pl.is_vacation, pl.is_banned,
+           p.activity, p.is_destroyed, m.moon_id, m.size AS moon_size
+    FROM scans s
+    JOIN planets p ON p.scan_id = s.id
+    LEFT JOIN players pl ON pl.player_id = p.player_id
+    LEFT JOIN moons m ON m.scan_id = s.id AND m.position = p.position
+    WHERE s.galaxy = ? AND s.system BETWEEN ? AND ?
+    ORDER BY s.system, p.position
+"""
+
+SQL_SLOT = """
+    SELECT p.planet_id, p.name AS planet_name, p.player_id, p.activity, p.moon_id, m.size AS moon_size, s.scanned_at
+    FROM scans s
+    JOIN planets p ON p.scan_id = s.id AND p.position = ?
+    LEFT JOIN moons m ON m.scan_id = s.id AND m.position = p.position
+    WHERE s.galaxy = ? AND s.system = ?
+"""
+
+# El total se escribe igual que en los índices de migrate_v5 para que SQLite los use
+SQL_DEBRIS = """
+    SELECT d.galaxy, s.system, d.position, d.metal, d.crystal, d.deuterium,
+           d.metal + d.crystal + d.deuterium AS total, d.required_ships, s.scanned_at
+    FROM debris d
+    JOIN scans s ON s.id = d.scan_id
+    WHERE d.galaxy = ? AND d.metal + d.crystal + d.deuterium >= ?
+      AND d.metal >= ? AND d.crystal >= ? AND d.deuterium >= ?
+    ORDER BY d.metal + d.crystal + d.deuterium DESC
+"""
+
+SQL_DEBRIS_ALL = """
+    SELECT d.galaxy, s.system, d.position, d.metal, d.crystal, d.deuterium,
+           d.metal + d.crystal + d.deuterium AS total, d.required_ships, s.scanned_at
+    FROM debris d
+    JOIN scans s ON s.id = d.scan_id
+    WHERE d.metal + d.crystal + d.deuterium >= ?
+      AND d.metal >= ? AND d.crystal >= ? AND d.deuterium >= ?
+    ORDER BY d.metal + d.crystal + d.deuterium DESC
+"""
+
+# Mínimos (metal, cristal, deuterio) para quedarse con los escombros que tienen ese recurso
+RESOURCE_MINIMUMS = {
+    None: (0, 0, 0),
+    "metal": (1, 0, 0),
+    "crystal": (0, 1, 0),
+    "deuterium": (0, 0, 1),
+}
+
+SQL_PLAYER_PLANETS = """
+    SELECT s.galaxy, s.system, p.position, p.planet_id, p.name AS planet_name, p.moon_id, p.activity, s.scanned_at
+    FROM planets p
+    JOIN scans s ON s.id = p.scan_id
+    WHERE p.player_id = ?
+    ORDER BY s.galaxy, s.system, p.position
+"""
+
+SQL_FIND_PLAYERS = """
+    SELECT player_id, name, alliance_id, alliance_tag, rank_position, is_inactive, is_vacation, is_banned
+    FROM players
+    WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+    ORDER BY name COLLATE NOCASE
+    LIMIT ?
+"""
+
+SQL_MOONS_BY_SIZE = """
+    SELECT s.galaxy, s.system, m.position, m.moon_id, m.name AS moon_name, m.size, p.player_id, pl.name AS player_name
+    FROM moons m
+    JOIN scans s ON s.id = m.scan_id
+    LEFT JOIN planets p ON p.scan_id = m.scan_id AND p.position = m.position
+    LEFT JOIN players pl ON pl.player_id = p.player_id
+    WHERE m.size >= ? AND m.is_destroyed = 0 AND (? IS NULL OR s.galaxy = ?)
+    ORDER BY m.size DESC
+"""
+
+SQL_ALLIANCE_MEMBERS = """
+    SELECT player_id, name, rank_position, is_inactive, is_vacation, is_banned
+    FROM players
+    WHERE alliance_id = ?
+    ORDER BY rank_position
+"""
+
+SQL_INACTIVE_TARGETS = """
+    SELECT s.galaxy, s.system, p.position, p.planet_id, p.moon_id, pl.player_id, pl.name AS player_name, pl.rank_position
+    FROM players pl
+    JOIN planets p ON p.player_id = pl.player_id
+    JOIN scans s ON s.id = p.scan_id
+    WHERE pl.is_inactive = 1 AND pl.is_vacation = 0 AND pl.is_banned = 0 AND p.is_destroyed = 0
+"""
+
+# ─────────────────────────────
+# Consultas
+# ─────────────────────────────
+
+def system_slots(conn, galaxy, system):
+    return conn.execute(SQL_SYSTEM_SLOTS, (galaxy, system)).fetchall()
+
+def slots(conn, galaxy, first, last):
+    """Slots ocupados de los sistemas first..last (inclusive) de una galaxia."""
+    return conn.execute(SQL_SLOTS_RANGE, (galaxy, first, last)).fetchall()
+
+def slot(conn, galaxy, system, position):
+    return conn.execute(SQL_SLOT, (position, galaxy, system)).fetchone()
+
+def debris_cursor(conn, galaxy=None, min_total=0, resource=None):
+    """
+    Cursor sobre los escombros ordenados por total de recursos (de una galaxia o de todas),
+    opcionalmente solo los que tienen `resource` ("metal", "crystal" o "deuterium").
+    Las filas se leen a medida que se piden (fetchmany), sin armar la lista entera.
+    """
+    minimums = RESOURCE_MINIMUMS[resource]
+    if galaxy is None:
+        return conn.execute(SQL_DEBRIS_ALL, (min_total, *minimums))
+    return conn.execute(SQL_DEBRIS, (galaxy, min_total, *minimums))
+
+def debris_fields(conn, galaxy=None, min_total=0, resource=None):
+    """Escombros ordenados por total de recursos (de una galaxia o de todas)."""
+    return debris_cursor(conn, galaxy, min_total, resource).fetchall()
+
+def player_planets(conn, player_id):
+    return conn.execute(SQL_PLAYER_PLANETS, (player_id,)).fetchall()
+
+def moons_by_size(conn, min_size=0, galaxy=None):
+    """Lunas no destruidas, de mayor a menor tamaño."""
+    return conn.execute(SQL_MOONS_BY_SIZE, (min_size, galaxy, galaxy)).fetchall()
+
+def find_players(conn, prefix, limit=20):
+    """Jugadores cuyo nombre empieza con `prefix` (sin distinguir mayúsculas), por rango sobre el índice."""
+    return conn.execute(SQL_FIND_PLAYERS, (prefix, prefix + "\U0010ffff", limit)).fetchall()
+
+def alliance_members(conn, alliance_id):
+    return conn.execute(SQL_ALLIANCE_MEMBERS, (alliance_id,)).fetchall()
+
+def inactive_targets(conn):
+    """Planetas de jugadores inactivos (sin vacaciones ni baneo)."""
+    return conn.execute(SQL_INACTIVE_TARGETS).fetchall()
+
+# ─────────────────────────────
+# Lectura cacheada
+# ─────────────────────────────
+
+class GalaxyReader:
+    """
+    Consultas de galaxy_query con caché LRU. La clave incluye la generación de la galaxia
+    consultada (o la global para consultas de todo el universo): cuando el writer guarda
+    sistemas de esa galaxia, las entradas viejas dejan de coincidir y el LRU las descarta.
+    Las que unen la tabla players (global) suman la generación de players: un jugador
+    escrito desde otra galaxia también las invalida.
+    """
+    def __init__(self, db_path="galaxy.db", maxsize=256):
+        self.conn = connect(db_path)
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._data_version = None
+        self._generations = {}
+
+    def _refresh(self):
+        # data_version solo cambia si otra conexión (el writer) hizo commit
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._generations = dict(self.conn.execute("SELECT key, value FROM meta"))
+            self._data_version = version
+
+    def generation(self, galaxy=None):
+        with self.lock:
+            self._refresh()
+            return self._generations.get(generation_key(galaxy), 0)
+
+    def _cached(self, fn, galaxy, *args, players=False):
+        with self.lock:
+            self._refresh()
+            key = (fn.__name__, args, self._generations.get(generation_key(galaxy), 0))
+            if players:
+                key += (self._generations.get(PLAYERS_GENERATION, 0),)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+
+            self.misses += 1
+            result = tuple(fn(self.conn, *args))
+            self.cache[key] = result
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+            return result
+
+    def slots(self, galaxy, first=1, last=499):
+        return self._cached(slots, galaxy, galaxy, first, last, players=True)
+
+    def system_slots(self, galaxy, system):
+        return self._cached(system_slots, galaxy, galaxy, system, players=True)
+
+    def debris_fields(self, galaxy=None, min_total=0, resource=None):
+        return self._cached(debris_fields, galaxy, galaxy, min_total, resource)
+
+    def player_planets(self, player_id):
+        return self._cached(player_planets, None, player_id)
+
+    def moons_by_size(self, min_size=0, galaxy=None):
+        return self._cached(moons_by_size, galaxy, min_size, galaxy, players=True)
+
+    def inactive_targets(self):
+        return self._cached(inactive_targets, None)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.conn.close()
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+def galaxy_reader(db_path="galaxy.db"):
+    """GalaxyReader compartido por todo el proceso para esta base."""
+    with _readers_lock:
+        if db_path not in _readers:
+            _readers[db_path] = GalaxyReader(db_path)
+        return _readers[db_path]
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+QUERIES = {
+    "system_slots": (SQL_SYSTEM_SLOTS, (1, 1)),
+    "slots": (SQL_SLOTS_RANGE, (1, 1, 50)),
+    "slot": (SQL_SLOT, (1, 1, 1)),
+    "debris_fields(galaxy)": (SQL_DEBRIS, (1, 0, 0, 0, 0)),
+    "debris_fields()": (SQL_DEBRIS_ALL, (0, 0, 0, 0)),
+    "player_planets": (SQL_PLAYER_PLANETS, (1,)),
+    "find_players": (SQL_FIND_PLAYERS, ("a", "a\U0010ffff", 20)),
+    "moons_by_size": (SQL_MOONS_BY_SIZE, (5000, None, None)),
+    "alliance_members": (SQL_ALLIANCE_MEMBERS, (1,)),
+    "inactive_targets": (SQL_INACTIVE_TARGETS, ()),
+}
+
+def explain(conn):
+    for name, (sql, params) in QUERIES.items():
+        print(f"[{name}]")
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+            print(f"   {row[-1]}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Planes de ejecución de las consultas de galaxy.db")
+    parser.add_argument("--db", default="galaxy.db")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    explain(conn)
+    conn.close()
@@ -0,0 +1,146 @@
+"""
+Fixtures de fetchGalaxyContent y servidor local que las reproduce.
+
+- Captura: `python -m workers.new_galaxy_worker 1 --capture fixtures/` guarda cada
+  respuesta cruda como fixtures/<galaxia>_<sistema>.json.
+- Replay: un servidor HTTP que responde como el juego (login por GET, fetchGalaxyContent
+  por POST) con latencia, jitter e inyección de errores configurables. Si falta la fixture
+  de un sistema se usa otra de forma determinística, así unas pocas alcanzan para simular
+  el universo entero.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_replay fixtures/ [--port 8163] [--latency 0.08] [--jitter 0.04] [--error-rate 0.01] [--logout-rate 0.005]
+"""
+import argparse, os, random, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+from workers.session_manager import SessionManager
+
+LOGIN_PAGE = b"<html><body>page=ingame&component=galaxy</body></html>"
+LOGGED_OUT_PAGE = b"<html><body>login</body></html>"
+
+# ─────────────────────────────
+# Fixtures
+# ─────────────────────────────
+
+def fixture_path(directory, galaxy, system):
+    return os.path.join(directory, f"{galaxy}_{system}.json")
+
+def save_fixture(directory, galaxy, system, body):
+    os.makedirs(directory, exist_ok=True)
+    with open(fixture_path(directory, galaxy, system), "wb") as f:
+        f.write(body)
+
+def load_fixtures(directory):
+    """{(galaxia, sistema): bytes} con todas las fixtures de `directory`."""
+    fixtures = {}
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        if ext != ".json" or "_" not in stem:
+            continue
+        g, s = stem.split("_", 1)
+        if g.isdigit() and s.isdigit():
+            with open(os.path.join(directory, name), "rb") as f:
+                fixtures[(int(g), int(s))] = f.read()
+    return fixtures
+
+# ─────────────────────────────
+# Servidor
+# ─────────────────────────────
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    # Los configura `serve` en una subclase por servidor
+    fixtures = {}
+    keys = []
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    logout_rate = 0.0
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", f"prsess_100170={int(time.time() * 1000)}; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def delay(self):
+        with self.lock:
+            d = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if d > 0:
+            time.sleep(d)
+
+    def do_GET(self):
+        self.reply(200, LOGIN_PAGE)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        galaxy = int(form.get("galaxy", ["1"])[0])
+        system = int(form.get("system", ["1"])[0])
+
+        self.delay()
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.error_rate:
+            return self.reply(500, b"Internal Server Error")
+        if roll < self.error_rate + self.logout_rate:
+            return self.reply(200, LOGGED_OUT_PAGE)
+
+        body = self.fixtures.get((galaxy, system))
+        if body is None:
+            body = self.fixtures[self.keys[(galaxy * 499 + system) % len(self.keys)]]
+        self.reply(200, body)
+
+def serve(fixtures, port=0, latency=0.0, jitter=0.0, error_rate=0.0, logout_rate=0.0, seed=0):
+    """Levanta el servidor en un thread. Devuelve (server, base_url para GALAXY_PARAMS)."""
+    if isinstance(fixtures, str):
+        fixtures = load_fixtures(fixtures)
+    if not fixtures:
+        raise ValueError("No hay fixtures para reproducir")
+
+    handler = type("Handler", (ReplayHandler,), {
+        "fixtures": fixtures,
+        "keys": sorted(fixtures),
+        "latency": latency,
+        "jitter": jitter,
+        "error_rate": error_rate,
+        "logout_rate": logout_rate,
+        "rng": random.Random(seed),
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/game/index.php"
+
+def replay_sessions(url, pool_size=16):
+    """SessionManager contra el servidor de replay: no hacen falta las cookies del navegador."""
+    return SessionManager(base_url=url, pool_size=pool_size, retry_wait=0.1, cookie_loader=dict)
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que reproduce fixtures de fetchGalaxyContent")
+    parser.add_argument("fixtures", help="directorio con <galaxia>_<sistema>.json")
+    parser.add_argument("--port", type=int, default=8163)
+    parser.add_argument("--latency", type=float, default=0.0, help="segundos por respuesta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± segundos aleatorios sobre la latencia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 500")
+    parser.add_argument("--logout-rate", type=float, default=0.0, help="fracción de respuestas con la sesión caída")
+    args = parser.parse_args()
+
+    server, url = serve(args.fixtures, args.port, args.latency, args.jitter, args.error_rate, args.logout_rate)
+    print(f"[REPLAY] {len(server.RequestHandlerClass.fixtures)} fixtures en {url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
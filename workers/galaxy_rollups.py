@@ -0,0 +1,322 @@
+"""
+Agregados materializados de alianzas y jugadores.
+
+"Planetas por alianza y galaxia" o "territorio de una alianza entre los sistemas 100 y
+200" ya no necesitan un GROUP BY sobre players/planets: el writer mantiene
+
+- rollup_alliance_systems:  planetas y lunas por (alianza, galaxia, sistema);
+- rollup_alliance_galaxies: planetas y lunas por (alianza, galaxia);
+- rollup_alliances:         miembros con planetas, planetas y lunas por alianza;
+- rollup_players:           alianza contada, planetas y lunas por jugador;
+- rollup_slots:             qué aportó cada slot la última vez (dueño y luna).
+
+Con cada sistema guardado se compara el slot viejo con el nuevo y solo se aplica la
+diferencia (-1 al dueño/alianza anterior, +1 al nuevo). Si un jugador cambió de alianza
+se mueven sus planetas ya contados de una alianza a la otra. Los planetas destruidos no
+cuentan; alliance_id 0 = sin alianza.
+
+`rebuild` recalcula todo desde planets, que el writer deja igual al último escaneo de
+cada sistema (borra los planetas que el sistema ya no muestra); `check` compara ese
+recálculo con lo que acumuló el hook.
+
+Las tablas se leen con WAL mientras el scanner escribe.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_rollups [--galaxy 3] [--alliance 123 --systems 100-200] [--rebuild] [--check]
+"""
+import argparse, sqlite3
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS rollup_slots (
+        galaxy INTEGER, system INTEGER, position INTEGER, player_id INTEGER, has_moon INTEGER,
+        PRIMARY KEY (galaxy, system, position)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_slots_player ON rollup_slots (player_id)",
+    """CREATE TABLE IF NOT EXISTS rollup_players (
+        player_id INTEGER PRIMARY KEY, alliance_id INTEGER, planets INTEGER, moons INTEGER)""",
+    """CREATE TABLE IF NOT EXISTS rollup_alliance_systems (
+        alliance_id INTEGER, galaxy INTEGER, system INTEGER, planets INTEGER, moons INTEGER,
+        PRIMARY KEY (alliance_id, galaxy, system)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS rollup_alliance_galaxies (
+        alliance_id INTEGER, galaxy INTEGER, planets INTEGER, moons INTEGER,
+        PRIMARY KEY (alliance_id, galaxy)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS rollup_alliances (
+        alliance_id INTEGER PRIMARY KEY, members INTEGER, planets INTEGER, moons INTEGER)""",
+]
+
+ROLLUP_TABLES = ["rollup_slots", "rollup_players", "rollup_alliance_systems", "rollup_alliance_galaxies", "rollup_alliances"]
+
+def init_rollups(conn):
+    for sql in SCHEMA:
+        conn.execute(sql)
+    conn.commit()
+
+def alliance_of(value):
+    try:
+        return int(value) if value not in (None, "", False) else 0
+    except (TypeError, ValueError):
+        return 0
+
+# ─────────────────────────────
+# Deltas
+# ─────────────────────────────
+
+def _player(cur, player_id, alliance_id=0):
+    """(alianza contada, planetas) del jugador; lo crea si no existe."""
+    row = cur.execute("SELECT alliance_id, planets FROM rollup_players WHERE player_id = ?", (player_id,)).fetchone()
+    if row is None:
+        cur.execute("INSERT INTO rollup_players (player_id, alliance_id, planets, moons) VALUES (?, ?, 0, 0)",
+                    (player_id, alliance_id))
+        return alliance_id, 0
+    return row
+
+def _alliance_add(cur, alliance_id, galaxy, system, planets, moons, members=0):
+    cur.execute("""
+        INSERT INTO rollup_alliance_systems (alliance_id, galaxy, system, planets, moons) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(alliance_id, galaxy, system) DO UPDATE SET planets = planets + excluded.planets, moons = moons + excluded.moons
+    """, (alliance_id, galaxy, system, planets, moons))
+    cur.execute("""
+        INSERT INTO rollup_alliance_galaxies (alliance_id, galaxy, planets, moons) VALUES (?, ?, ?, ?)
+        ON CONFLICT(alliance_id, galaxy) DO UPDATE SET planets = planets + excluded.planets, moons = moons + excluded.moons
+    """, (alliance_id, galaxy, planets, moons))
+    cur.execute("""
+        INSERT INTO rollup_alliances (alliance_id, members, planets, moons) VALUES (?, ?, ?, ?)
+        ON CONFLICT(alliance_id) DO UPDATE SET
+            members = members + excluded.members, planets = planets + excluded.planets, moons = moons + excluded.moons
+    """, (alliance_id, members, planets, moons))
+
+def slot_add(cur, player_id, galaxy, system, sign, has_moon):
+    """Suma (sign=1) o resta (sign=-1) un planeta (y su luna) del jugador en todas las agregaciones."""
+    alliance_id, planets = _player(cur, player_id)
+    moons = sign * int(bool(has_moon))
+    cur.execute("UPDATE rollup_players SET planets = planets + ?, moons = moons + ? WHERE player_id = ?",
+                (sign, moons, player_id))
+    # Un jugador es miembro contado de su alianza mientras tenga al menos un planeta
+    members = 1 if planets == 0 and sign > 0 else -1 if planets == 1 and sign < 0 else 0
+    _alliance_add(cur, alliance_id, galaxy, system, sign, moons, members)
+
+def move_player(cur, player_id, new_alliance):
+    """El jugador cambió de alianza: sus planetas contados pasan de una a la otra."""
+    old_alliance, planets = _player(cur, player_id, new_alliance)
+    if old_alliance == new_alliance:
+        return
+    member = 1 if planets > 0 else 0
+    for galaxy, system, n, moons in cur.execute("""
+        SELECT galaxy, system, COUNT(*), SUM(has_moon) FROM rollup_slots
+        WHERE player_id = ? GROUP BY galaxy, system
+    """, (player_id,)).fetchall():
+        _alliance_add(cur, old_alliance, galaxy, system, -n, -moons)
+        _alliance_add(cur, new_alliance, galaxy, system, n, moons)
+    _alliance_add_members(cur, old_alliance, -member)
+    _alliance_add_members(cur, new_alliance, member)
+    cur.execute("UPDATE rollup_players SET alliance_id = ? WHERE player_id = ?", (new_alliance, player_id))
+
+def _alliance_add_members(cur, alliance_id, members):
+    if members:
+        cur.execute("""
+            INSERT INTO rollup_alliances (alliance_id, members, planets, moons) VALUES (?, ?, 0, 0)
+            ON CONFLICT(alliance_id) DO UPDATE SET members = members + excluded.members
+        """, (alliance_id, members))
+
+def scan_slots(scan):
+    """{posición: (player_id, tiene luna)} de los planetas no destruidos del sistema."""
+    moon_positions = {pos for _, pos in scan.moon_links}
+    return {
+        pl[7]: (pl[2], int(pl[7] in moon_positions))
+        for pl in scan.planets
+        if pl[2] not in (None, 99999) and not pl[4]
+    }
+
+# ─────────────────────────────
+# Writer hook
+# ─────────────────────────────
+
+class RollupRecorder:
+    """Hook del writer: aplica a los agregados la diferencia entre el sistema anterior y el nuevo."""
+    def __init__(self):
+        self._ready = False
+
+    def __call__(self, cur, scan, scan_id):
+        if not self._ready:
+            for sql in SCHEMA:
+                cur.execute(sql)
+            # Primera vez sobre una base con datos: partir del estado actual de las tablas
+            if cur.execute("SELECT 1 FROM rollup_slots LIMIT 1").fetchone() is None:
+                rebuild(cur)
+            self._ready = True
+
+        g, s = scan.galaxy, scan.system
+        for p in scan.players:
+            if cur.execute("SELECT 1 FROM rollup_players WHERE player_id = ?", (p[0],)).fetchone():
+                move_player(cur, p[0], alliance_of(p[2]))
+            else:
+                _player(cur, p[0], alliance_of(p[2]))
+
+        old = {
+            pos: (player_id, has_moon)
+            for pos, player_id, has_moon in cur.execute(
+                "SELECT position, player_id, has_moon FROM rollup_slots WHERE galaxy = ? AND system = ?", (g, s)
+            )
+        }
+        new = scan_slots(scan)
+
+        for pos in set(old) | set(new):
+            before, after = old.get(pos), new.get(pos)
+            if before == after:
+                continue
+            if before is not None:
+                slot_add(cur, before[0], g, s, -1, before[1])
+            if after is not None:
+                slot_add(cur, after[0], g, s, 1, after[1])
+                cur.execute("INSERT OR REPLACE INTO rollup_slots VALUES (?, ?, ?, ?, ?)", (g, s, pos, *after))
+            else:
+                cur.execute("DELETE FROM rollup_slots WHERE galaxy = ? AND system = ? AND position = ?", (g, s, pos))
+
+def rebuild(cur):
+    """
+    Recalcula todos los agregados desde players/planets (una vez, o a pedido). Cuenta solo
+    los planetas no destruidos del último escaneo de cada sistema (el writer borra el resto).
+    """
+    for table in ROLLUP_TABLES:
+        cur.execute(f"DELETE FROM {table}")
+    cur.execute("""
+        INSERT OR REPLACE INTO rollup_slots (galaxy, system, position, player_id, has_moon)
+        SELECT galaxy, system, position, player_id, has_moon FROM (
+            -- Si quedaron varios planetas en un slot, vale el de id más alto (el más nuevo)
+            SELECT s.galaxy, s.system, p.position, p.player_id, p.moon_id IS NOT NULL AS has_moon, MAX(p.planet_id)
+            FROM planets p JOIN scans s ON s.id = p.scan_id
+            WHERE p.player_id IS NOT NULL AND p.player_id != 99999 AND p.is_destroyed = 0
+            GROUP BY s.galaxy, s.system, p.position
+        )
+    """)
+    cur.execute("""
+        INSERT INTO rollup_players (player_id, alliance_id, planets, moons)
+        SELECT r.player_id, COALESCE(pl.alliance_id, 0), COUNT(*), SUM(r.has_moon)
+        FROM rollup_slots r LEFT JOIN players pl ON pl.player_id = r.player_id
+        GROUP BY r.player_id
+    """)
+    cur.execute("""
+        INSERT INTO rollup_alliance_systems (alliance_id, galaxy, system, planets, moons)
+        SELECT p.alliance_id, r.galaxy, r.system, COUNT(*), SUM(r.has_moon)
+        FROM rollup_slots r JOIN rollup_players p ON p.player_id = r.player_id
+        GROUP BY p.alliance_id, r.galaxy, r.system
+    """)
+    cur.execute("""
+        INSERT INTO rollup_alliance_galaxies (alliance_id, galaxy, planets, moons)
+        SELECT alliance_id, galaxy, SUM(planets), SUM(moons) FROM rollup_alliance_systems
+        GROUP BY alliance_id, galaxy
+    """)
+    cur.execute("""
+        INSERT INTO rollup_alliances (alliance_id, members, planets, moons)
+        SELECT alliance_id, COUNT(*), SUM(planets), SUM(moons) FROM rollup_players
+        WHERE planets > 0 GROUP BY alliance_id
+    """)
+
+# Filas comparables entre el hook y rebuild: el hook deja en 0 lo que rebuild no crea
+CHECK_QUERIES = {
+    "rollup_slots": "SELECT galaxy, system, position, player_id, has_moon FROM rollup_slots",
+    "rollup_players": "SELECT player_id, alliance_id, planets, moons FROM rollup_players WHERE planets != 0 OR moons != 0",
+    "rollup_alliance_systems": "SELECT alliance_id, galaxy, system, planets, moons FROM rollup_alliance_systems WHERE planets != 0 OR moons != 0",
+    "rollup_alliance_galaxies": "SELECT alliance_id, galaxy, planets, moons FROM rollup_alliance_galaxies WHERE planets != 0 OR moons != 0",
+    "rollup_alliances": "SELECT alliance_id, members, planets, moons FROM rollup_alliances WHERE members != 0 OR planets != 0 OR moons != 0",
+}
+
+def check(conn):
+    """
+    Compara los agregados incrementales con un rebuild desde cero, sin modificar la base.
+    Retorna {tabla: (solo en el incremental, solo en el rebuild)}; vacío = iguales.
+    """
+    cur = conn.cursor()
+    incremental = {table: set(cur.execute(sql).fetchall()) for table, sql in CHECK_QUERIES.items()}
+    cur.execute("SAVEPOINT rollup_check")
+    try:
+        rebuild(cur)
+        rebuilt = {table: set(cur.execute(sql).fetchall()) for table, sql in CHECK_QUERIES.items()}
+    finally:
+        cur.execute("ROLLBACK TO rollup_check")
+        cur.execute("RELEASE rollup_check")
+    return {
+        table: (sorted(incremental[table] - rebuilt[table]), sorted(rebuilt[table] - incremental[table]))
+        for table in CHECK_QUERIES
+        if incremental[table] != rebuilt[table]
+    }
+
+# ─────────────────────────────
+# Consultas
+# ─────────────────────────────
+
+def alliance_tag(conn, alliance_id):
+    row = conn.execute("SELECT alliance_tag FROM players WHERE alliance_id = ? LIMIT 1", (alliance_id,)).fetchone()
+    return row[0] if row else None
+
+def top_alliances(conn, limit=20):
+    """[(alliance_id, miembros, planetas, lunas)] por cantidad de planetas."""
+    return conn.execute("""
+        SELECT alliance_id, members, planets, moons FROM rollup_alliances
+        WHERE alliance_id != 0 AND planets > 0
+        ORDER BY planets DESC LIMIT ?
+    """, (limit,)).fetchall()
+
+def alliances_by_galaxy(conn, galaxy):
+    """[(alliance_id, planetas, lunas)] de una galaxia."""
+    return conn.execute("""
+        SELECT alliance_id, planets, moons FROM rollup_alliance_galaxies
+        WHERE galaxy = ? AND alliance_id != 0 AND planets > 0
+        ORDER BY planets DESC
+    """, (galaxy,)).fetchall()
+
+def alliance_territory(conn, alliance_id, galaxy, first=1, last=499):
+    """(sistemas ocupados, planetas, lunas) de la alianza entre los sistemas first..last."""
+    row = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(planets), 0), COALESCE(SUM(moons), 0) FROM rollup_alliance_systems
+        WHERE alliance_id = ? AND galaxy = ? AND system BETWEEN ? AND ? AND planets > 0
+    """, (alliance_id, galaxy, first, last)).fetchone()
+    return tuple(row)
+
+def player_totals(conn, player_id):
+    """(alliance_id, planetas, lunas) del jugador, o None."""
+    return conn.execute(
+        "SELECT alliance_id, planets, moons FROM rollup_players WHERE player_id = ?", (player_id,)
+    ).fetchone()
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agregados de alianzas y jugadores")
+    parser.add_argument("--db", default="galaxy.db")
+    parser.add_argument("--galaxy", type=int)
+    parser.add_argument("--alliance", type=int)
+    parser.add_argument("--systems", default="1-499", help="rango de sistemas para --alliance")
+    parser.add_argument("--rebuild", action="store_true", help="recalcular todo desde players/planets")
+    parser.add_argument("--check", action="store_true", help="comparar los agregados incrementales con un rebuild")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    init_rollups(conn)
+    if args.check:
+        diffs = check(conn)
+        for table, (extra, missing) in diffs.items():
+            print(f"[ROLLUPS] {table}: {len(extra)} filas solo en el incremental, {len(missing)} solo en el rebuild")
+            for row in (extra + missing)[:5]:
+                print(f"    {row}")
+        print("[ROLLUPS] incremental == rebuild" if not diffs else f"[ROLLUPS] {len(diffs)} tablas distintas")
+        conn.close()
+        raise SystemExit(1 if diffs else 0)
+    if args.rebuild:
+        with conn:
+            rebuild(conn.cursor())
+
+    if args.alliance is not None:
+        first, _, last = args.systems.partition("-")
+        galaxies = [args.galaxy] if args.galaxy else range(1, 6)
+        for g in galaxies:
+            systems, planets, moons = alliance_territory(conn, args.alliance, g, int(first), int(last or first))
+            print(f"  G{g} {args.systems}: {systems} sistemas, {planets} planetas, {moons} lunas")
+    elif args.galaxy is not None:
+        for alliance_id, planets, moons in alliances_by_galaxy(conn, args.galaxy):
+            print(f"  [{alliance_tag(conn, alliance_id) or alliance_id}] {planets} planetas, {moons} lunas")
+    else:
+        for alliance_id, members, planets, moons in top_alliances(conn):
+            print(f"  [{alliance_tag(conn, alliance_id) or alliance_id}] {members} miembros, {planets} planetas, {moons} lunas")
+    conn.close()
@@ -0,0 +1,296 @@
+"""
+Re-escaneo continuo guiado por la tasa de cambio de cada sistema.
+
+Cada vez que el writer guarda un sistema, `ChangeRateTracker` compara su firma con la
+anterior y actualiza una tasa de cambios por segundo con decaimiento exponencial
+(tabla system_stats). Con esa tasa calcula cuándo vuelve a "vencer" el sistema, y
+`RescanScheduler` mantiene un heap de próximos vencimientos: con un presupuesto fijo
+de requests por minuto se escanea primero lo que se pone viejo más rápido.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_scheduler [--budget 30] [--threads 3] [--galaxies 1-5]
+"""
+import argparse, hashlib, heapq, queue, threading, time, traceback
+from workers.galaxy_db import GalaxyDBWriter, init_db, sql_create
+from workers.galaxy_decode import decode_galaxy
+from workers.new_galaxy_worker import (
+    GALAXY_PARAMS, PROFILE_PATH, parse_systems_arg, writer_hooks
+)
+from workers.session_manager import LoginError, session_manager
+from workers.rate_limiter import GAME_LIMITER, PRIORITY_SCAN, healthy
+
+TABLE_SYSTEM_STATS = [("galaxy", 'INTEGER'), ("system", 'INTEGER'), ("fingerprint", 'TEXT'), ("last_seen", 'REAL'),
+                      ("observations", 'INTEGER'), ("changes", 'INTEGER'), ("weighted_changes", 'REAL'), ("weighted_time", 'REAL'),
+                      ("rate", 'REAL'), ("next_due", 'REAL')]
+
+# Prior: un cambio por día hasta tener observaciones propias
+PRIOR_CHANGES = 1.0
+PRIOR_TIME = 86400.0
+
+# 5xx / 429: volver a intentar el sistema con espera exponencial, sin re-login
+RETRY_BACKOFF = 5.0
+RETRY_BACKOFF_MAX = 300.0
+
+def init_stats(conn):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS system_stats ({sql_create(TABLE_SYSTEM_STATS)}, PRIMARY KEY (galaxy, system))")
+    conn.commit()
+
+def change_signature(scan):
+    """Firma de lo que cambia seguido en un sistema: actividad, estados de jugadores, lunas y escombros."""
+    parts = [
+        sorted((p[0], p[6], p[7], p[8]) for p in scan.players),        # id, inactivo, vacaciones, baneado
+        sorted((p[0], p[2], p[4], p[5]) for p in scan.planets),        # id, dueño, destruido, actividad
+        sorted((m[0], m[4], m[5]) for m in scan.moons),                # id, destruida, actividad
+        sorted((d[1], d[2], d[3], d[4]) for d in scan.debris),         # posición, metal, cristal, deuterio
+    ]
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+class ChangeRateTracker:
+    """
+    Hook del writer: aprende la tasa de cambio de cada sistema y calcula su próximo vencimiento.
+    El intervalo es target_changes / tasa, acotado entre min_interval y max_interval.
+    """
+    def __init__(self, target_changes=0.5, min_interval=600, max_interval=48 * 3600, halflife=7 * 86400, on_due=None):
+        self.target_changes = target_changes
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.halflife = halflife
+        self.on_due = on_due
+
+    def interval(self, rate):
+        return min(self.max_interval, max(self.min_interval, self.target_changes / rate))
+
+    def default_interval(self):
+        return self.interval(PRIOR_CHANGES / PRIOR_TIME)
+
+    def __call__(self, cur, scan, scan_id):
+        sig = change_signature(scan)
+        now = scan.scanned_at
+
+        row = cur.execute("""
+            SELECT fingerprint, last_seen, observations, changes, weighted_changes, weighted_time
+            FROM system_stats WHERE galaxy = ? AND system = ?
+        """, (scan.galaxy, scan.system)).fetchone()
+
+        if row:
+            fingerprint, last_seen, observations, changes, wc, wt = row
+            dt = max(0.0, now - last_seen)
+            changed = int(sig != fingerprint)
+            decay = 0.5 ** (dt / self.halflife)
+            wc = wc * decay + changed
+            wt = wt * decay + dt
+            observations += 1
+            changes += changed
+        else:
+            observations, changes, wc, wt = 1, 0, 0.0, 0.0
+
+        rate = (wc + PRIOR_CHANGES) / (wt + PRIOR_TIME)
+        next_due = now + self.interval(rate)
+
+        cur.execute("""
+            INSERT OR REPLACE INTO system_stats
+            (galaxy, system, fingerprint, last_seen, observations, changes, weighted_changes, weighted_time, rate, next_due)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (scan.galaxy, scan.system, sig, now, observations, changes, wc, wt, rate, next_due))
+
+        if self.on_due:
+            self.on_due(next_due, scan.galaxy, scan.system)
+
+# ─────────────────────────────
+# Scheduler
+# ─────────────────────────────
+
+class RescanScheduler:
+    def __init__(self, galaxies=range(1, 6), systems=None, budget=30, threads=3, db_path="galaxy.db", tracker=None, sessions=None,
+                 login_attempts=None):
+        self.galaxies = list(galaxies)
+        self.systems = systems or range(1, 500)
+        self.budget = budget            # requests por minuto
+        self.threads = threads
+        self.db_path = db_path
+        self.tracker = tracker or ChangeRateTracker()
+        self.tracker.on_due = self.push
+        self.sessions = sessions or session_manager(PROFILE_PATH)
+        self.login_attempts = login_attempts   # None = reintentar el login hasta que stop() lo corte
+        self.login_error = None
+
+        self.heap = []
+        self.cond = threading.Condition()
+        self.work_q = queue.Queue(maxsize=threads)
+        self._stop = threading.Event()
+
+        self.scanned = 0
+        self.failed = 0
+        self.retries = {}   # (galaxia, sistema) -> respuestas 5xx / 429 seguidas
+        self._count_lock = threading.Lock()
+
+    def load(self):
+        """Arma el heap: system_stats.next_due, o scans.scanned_at + intervalo por defecto, o ya."""
+        conn = init_db(self.db_path)
+        init_stats(conn)
+        due = {}
+        for g, s, scanned_at in conn.execute("SELECT galaxy, system, scanned_at FROM scans WHERE success = 1"):
+            due[(g, s)] = scanned_at + self.tracker.default_interval()
+        for g, s, next_due in conn.execute("SELECT galaxy, system, next_due FROM system_stats"):
+            due[(g, s)] = next_due
+        conn.close()
+
+        with self.cond:
+            self.heap = [(due.get((g, s), 0.0), g, s) for g in self.galaxies for s in self.systems]
+            heapq.heapify(self.heap)
+
+    def push(self, due, galaxy, system):
+        if galaxy not in self.galaxies or system not in self.systems:
+            return
+        with self.cond:
+            heapq.heappush(self.heap, (due, galaxy, system))
+            self.cond.notify()
+
+    def overdue(self):
+        now = time.time()
+        with self.cond:
+            return sum(1 for due, _, _ in self.heap if due <= now)
+
+    def dispatch(self):
+        """Saca del heap el sistema más vencido respetando el presupuesto de requests."""
+        spacing = 60.0 / self.budget
+        next_slot = time.monotonic()
+        while not self._stop.is_set():
+            with self.cond:
+                while not self._stop.is_set():
+                    wait = self.heap[0][0] - time.time() if self.heap else 60.0
+                    if wait <= 0:
+                        break
+                    self.cond.wait(min(wait, 5.0))
+                if self._stop.is_set():
+                    break
+                _, galaxy, system = heapq.heappop(self.heap)
+
+            delay = next_slot - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            next_slot = max(next_slot, time.monotonic()) + spacing
+
+            while not self._stop.is_set():
+                try:
+                    self.work_q.put((galaxy, system), timeout=1.0)
+                    break
+                except queue.Full:
+                    continue
+
+    def worker_thread(self, tid, writer):
+        session = self.sessions.client()
+        try:
+            gen = self.sessions.ensure_logged_in(None, self._stop, self.login_attempts)
+        except LoginError as e:
+            return self.give_up(e)
+
+        while not self._stop.is_set():
+            try:
+                galaxy, system = self.work_q.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            self.sessions.wait_ready()
+            try:
+                with GAME_LIMITER.request(PRIORITY_SCAN) as req:
+                    r = session.post(
+                        self.sessions.base_url,
+                        params=GALAXY_PARAMS,
+                        data={"galaxy": galaxy, "system": system},
+                        timeout=10
+                    )
+                    req.ok = healthy(r.status_code)
+                if not req.ok:
+                    # 5xx / 429: el servidor está cargado, la sesión sigue bien
+                    self.push(time.time() + self.backoff(galaxy, system), galaxy, system)
+                    continue
+                scan = decode_galaxy(r.content, galaxy, system)
+                if scan is None:
+                    # 200 que no es JSON: la página de login, la sesión se cayó
+                    gen = self.sessions.relogin(gen, None, self._stop, self.login_attempts)
+                    self.push(time.time(), galaxy, system)
+                    continue
+                # El tracker del writer vuelve a encolar el sistema con su próximo vencimiento
+                writer.submit(scan)
+                with self._count_lock:
+                    self.scanned += 1
+                    self.retries.pop((galaxy, system), None)
+            except LoginError as e:
+                self.push(time.time(), galaxy, system)
+                return self.give_up(e)
+            except Exception as e:
+                with self._count_lock:
+                    self.failed += 1
+                print(f"\n[SCHED][T{tid}] {galaxy}:{system} {e}")
+                self.push(time.time() + 60, galaxy, system)
+
+    def backoff(self, galaxy, system):
+        """Espera antes de reintentar un sistema que respondió 5xx / 429: se duplica en cada fallo seguido."""
+        with self._count_lock:
+            self.failed += 1
+            n = self.retries.get((galaxy, system), 0)
+            self.retries[(galaxy, system)] = n + 1
+        return min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** n)
+
+    def stop(self):
+        self._stop.set()
+        with self.cond:
+            self.cond.notify_all()
+
+    def give_up(self, error):
+        """Sin sesión (login cancelado o agotado): frena el dispatcher y todos los threads."""
+        with self._count_lock:
+            if self.login_error is None:
+                self.login_error = str(error)
+                print(f"\n[SCHED] {error}")
+        self.stop()
+
+    def status(self):
+        with self.cond:
+            next_due = self.heap[0][0] - time.time() if self.heap else 0
+        print(f"\r[SCHED] {self.scanned} escaneos | {self.failed} errores | {self.overdue()} vencidos | próximo en {max(0, next_due) / 60:.1f}m   ", end="", flush=True)
+
+    def run(self):
+        self.load()
+        writer = GalaxyDBWriter(self.db_path, batch_size=10, hooks=writer_hooks(self.db_path) + [self.tracker])
+        writer.start()
+
+        workers = [threading.Thread(target=self.worker_thread, args=(tid, writer), daemon=True) for tid in range(self.threads)]
+        for t in workers:
+            t.start()
+        dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+        dispatcher.start()
+
+        try:
+            while dispatcher.is_alive():
+                self.status()
+                dispatcher.join(5.0)
+        except KeyboardInterrupt:
+            print("\n[SCHED] Deteniendo...")
+        finally:
+            self.stop()
+            for t in workers:
+                t.join()
+            writer.close()
+            print(f"[DB] {writer.summary()}")
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-escaneo continuo por tasa de cambio")
+    parser.add_argument("--budget", type=float, default=30, help="requests por minuto")
+    parser.add_argument("--threads", type=int, default=3)
+    parser.add_argument("--galaxies", default="1-5", help="galaxia o rango inicio-fin")
+    parser.add_argument("--systems", help="sistema o rango inicio-fin")
+    args = parser.parse_args()
+
+    try:
+        galaxies = parse_systems_arg(args.galaxies)
+        systems = parse_systems_arg(args.systems) if args.systems else None
+        RescanScheduler(galaxies, systems, budget=args.budget, threads=args.threads).run()
+    except Exception as e:
+        print(f"[RescanScheduler] Error: {e}")
+        traceback.print_exc()
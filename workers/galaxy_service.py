@@ -0,0 +1,94 @@
+"""
+Escaneo de galaxias dentro de la app, en un QThread.
+
+Antes la pestaña de escombros lanzaba `python -m workers.new_galaxy_worker` en otra
+consola y nunca se enteraba de cuándo terminaba. `GalaxyScanWorker` corre el mismo
+GalaxyWorker en un QThread y avisa con señales:
+
+- progress(hechos, total): por cada sistema pedido;
+- system_done(galaxia, sistema, debris): cuando el sistema ya está commiteado en
+  galaxy.db, con sus escombros como dicts (mismo formato que la pestaña de escombros);
+- success(resumen) / error(mensaje) / finished() como el resto de los workers de Qt.
+
+`cancel()` se llama directo desde la UI: cada thread termina el sistema en curso y el
+scan_run queda abierto para retomarlo con --resume. También corta un login en curso; si
+la sesión sigue inválida después de LOGIN_ATTEMPTS intentos, el escaneo termina con error.
+
+Uso:
+    worker = GalaxyScanWorker([3])
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    worker.system_done.connect(...)
+"""
+from PyQt6.QtCore import QObject, pyqtSignal
+from workers.new_galaxy_worker import GalaxyWorker
+
+LOGIN_ATTEMPTS = 3
+
+def scan_debris(scan):
+    """Escombros de un SystemScan como dicts de la pestaña de escombros."""
+    return [
+        {
+            "galaxy": scan.galaxy, "system": scan.system, "position": pos,
+            "metal": metal, "crystal": crystal, "deuterium": deuterium,
+            "requiredShips": ships,
+        }
+        for _, pos, metal, crystal, deuterium, ships in scan.debris
+    ]
+
+class GalaxyScanWorker(QObject):
+    """Worker para escanear galaxias sin bloquear la UI"""
+    finished = pyqtSignal()
+    success = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    system_done = pyqtSignal(int, int, list)
+
+    def __init__(self, galaxies, systems=None, db_path="galaxy.db", threads=3, max_age=None):
+        super().__init__()
+        self.galaxies = list(galaxies)
+        self.systems = systems
+        self.db_path = db_path
+        self.threads = threads
+        self.max_age = max_age
+        self.scanner = None
+        self.cancelled = False
+
+    def run(self):
+        """Corre el escaneo completo en el thread del worker"""
+        try:
+            if self.cancelled:
+                return
+            self.scanner = GalaxyWorker(self.galaxies, self.systems, max_age=self.max_age, db_path=self.db_path,
+                                        login_attempts=LOGIN_ATTEMPTS)
+            self.scanner.on_progress = self.progress.emit
+            self.scanner.on_written = self._on_written
+            if self.cancelled:
+                self.scanner.stop()
+            self.scanner.run(threads=self.threads)
+            if self.scanner.login_error and not self.cancelled:
+                self.error.emit(self.scanner.login_error)
+                return
+
+            stats = self.scanner.write_stats
+            self.success.emit({
+                "galaxies": self.galaxies,
+                "systems": self.scanner.scanned,
+                "elapsed": self.scanner.elapsed,
+                "cancelled": self.cancelled,
+                "writes": stats.summary() if stats else "",
+            })
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit()
+
+    def cancel(self):
+        """Pide detener el escaneo (se puede llamar desde cualquier thread)"""
+        self.cancelled = True
+        if self.scanner is not None:
+            self.scanner.stop()
+
+    def _on_written(self, scans):
+        for scan in scans:
+            self.system_done.emit(scan.galaxy, scan.system, scan_debris(scan))
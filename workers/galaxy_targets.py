@@ -0,0 +1,226 @@
+"""
+Índice de objetivos por distancia de vuelo.
+
+Responde "los 10 inactivos más cercanos a 3:120:8" o "escombros a menos de 5000 de
+cualquiera de mis planetas" sin recorrer todo galaxy.db.
+
+Por cada tipo de objetivo (inactivos, escombros, lunas) se arma:
+- un agregado por sistema: cuántos objetivos tiene cada (galaxia, sistema);
+- las filas de cada sistema ordenadas por posición.
+
+La distancia del juego (ver flight) solo depende del salto de galaxia, del salto de
+sistema (con la vuelta del donut) y de la posición, así que desde un origen se recorren
+"anillos" en orden de distancia creciente: el propio sistema, los sistemas a ±1, ±2...
+intercalados con las galaxias vecinas (todas a 20000 * salto). Los anillos vacíos se
+saltean con el agregado y la búsqueda termina apenas se juntan k objetivos o se pasa
+del radio.
+
+Las filas vienen de GalaxyReader: el índice se rearma solo cuando el writer sube la
+generación de galaxy.db.
+
+Uso (desde la raíz del repo):
+    python -m workers.galaxy_targets inactive 3:120:8 [--k 10] [--radius 20000]
+    python -m workers.galaxy_targets debris --planets [--k 5]      # desde planets_data.json
+"""
+import argparse, heapq, itertools, json, threading, time
+import numpy as np
+from workers.flight import DONUT_GALAXY, DONUT_SYSTEM, distance, parse_coords, system_gap
+from workers.galaxy_grid import GALAXIES, SYSTEMS
+from workers.galaxy_query import galaxy_reader
+
+KINDS = {
+    "inactive": lambda reader: reader.inactive_targets(),
+    "debris": lambda reader: reader.debris_fields(),
+    "moons": lambda reader: reader.moons_by_size(),
+}
+
+def coords_of(row):
+    return row["galaxy"], row["system"], row["position"]
+
+def wrap(system):
+    return (system - 1) % SYSTEMS + 1
+
+def origins(planets_data):
+    """[(nombre, (g, s, p))] de planets_data, una vez por coordenada."""
+    result, seen = [], set()
+    for key, pdata in planets_data.items():
+        try:
+            coords = parse_coords(pdata.get("coords", ""))
+        except ValueError:
+            continue
+        if coords not in seen:
+            seen.add(coords)
+            result.append((pdata.get("name") or key, coords))
+    return result
+
+# ─────────────────────────────
+# Anillos
+# ─────────────────────────────
+
+class SystemRings:
+    """Objetivos de un tipo, agrupados por sistema, con el conteo por sistema."""
+    def __init__(self, rows):
+        self.counts = np.zeros((GALAXIES + 1, SYSTEMS + 1), dtype=np.int32)
+        self.by_system = {}
+        for row in sorted(rows, key=coords_of):
+            g, s, _ = coords_of(row)
+            if 1 <= g <= GALAXIES and 1 <= s <= SYSTEMS:
+                self.by_system.setdefault((g, s), []).append(row)
+                self.counts[g, s] += 1
+        self.galaxy_totals = self.counts.sum(axis=1)
+        self.occupied = [np.nonzero(self.counts[g])[0] for g in range(GALAXIES + 1)]
+        self.size = int(self.galaxy_totals.sum())
+
+    def _ring_systems(self, s0, d):
+        return sorted({wrap(s0 - d), wrap(s0 + d)}) if DONUT_SYSTEM else [s for s in (s0 - d, s0 + d) if 1 <= s <= SYSTEMS]
+
+    def _galaxies_at(self, g0, k):
+        if DONUT_GALAXY:
+            return sorted({(g0 - 1 - k) % GALAXIES + 1, (g0 - 1 + k) % GALAXIES + 1})
+        return [g for g in (g0 - k, g0 + k) if 1 <= g <= GALAXIES]
+
+    def walk(self, origin):
+        """Genera (distancia, fila) en orden de distancia creciente desde `origin`."""
+        g0, s0, p0 = origin
+
+        # Mismo sistema: cada posición tiene su propia distancia
+        here = self.by_system.get((g0, s0), ())
+        yield from sorted(((distance(origin, coords_of(r)), r) for r in here), key=lambda t: t[0])
+
+        max_d = SYSTEMS // 2 if DONUT_SYSTEM else max(s0 - 1, SYSTEMS - s0)
+        max_k = GALAXIES // 2 if DONUT_GALAXY else max(g0 - 1, GALAXIES - g0)
+        counts = self.counts[g0]
+        remaining = int(self.galaxy_totals[g0]) - len(here)
+        d = k = 1
+
+        while d <= max_d or k <= max_k:
+            ring_dist = 2700 + 95 * d if d <= max_d and remaining > 0 else None
+            galaxy_dist = 20000 * k if k <= max_k else None
+            if ring_dist is None and galaxy_dist is None:
+                break
+
+            if galaxy_dist is None or (ring_dist is not None and ring_dist <= galaxy_dist):
+                # Anillo ±d de la misma galaxia
+                for s in self._ring_systems(s0, d):
+                    if counts[s]:
+                        remaining -= int(counts[s])
+                        for row in self.by_system[(g0, s)]:
+                            yield ring_dist, row
+                d += 1
+            else:
+                # Galaxias a salto k: todo está a la misma distancia, primero los sistemas más cercanos
+                for g in self._galaxies_at(g0, k):
+                    if not self.galaxy_totals[g]:
+                        continue
+                    systems = self.occupied[g]
+                    order = np.argsort([system_gap(s0, int(s)) for s in systems], kind="stable")
+                    for i in order:
+                        for row in self.by_system[(g, int(systems[i]))]:
+                            yield galaxy_dist, row
+                k += 1
+
+# ─────────────────────────────
+# Índice
+# ─────────────────────────────
+
+class TargetIndex:
+    def __init__(self, db_path="galaxy.db", reader=None):
+        self.reader = reader or galaxy_reader(db_path)
+        self.lock = threading.Lock()
+        self._rings = {}    # tipo -> (generación, SystemRings)
+
+    def rings(self, kind):
+        if kind not in KINDS:
+            raise ValueError(f"Tipo de objetivo inválido: '{kind}' ({', '.join(KINDS)})")
+        gen = self.reader.generation()
+        with self.lock:
+            built = self._rings.get(kind)
+            if built is None or built[0] != gen:
+                built = (gen, SystemRings(KINDS[kind](self.reader)))
+                self._rings[kind] = built
+            return built[1]
+
+    def nearest(self, kind, origin, k=10, where=None):
+        """Los `k` objetivos más cercanos a `origin` ((g, s, p) o 'g:s:p'): [(distancia, fila)]."""
+        if isinstance(origin, str):
+            origin = parse_coords(origin)
+        walk = self.rings(kind).walk(origin)
+        if where is not None:
+            walk = (t for t in walk if where(t[1]))
+        return list(itertools.islice(walk, k))
+
+    def within(self, kind, origin, radius, where=None):
+        """Objetivos a distancia <= `radius` de `origin`, del más cercano al más lejano."""
+        if isinstance(origin, str):
+            origin = parse_coords(origin)
+        walk = itertools.takewhile(lambda t: t[0] <= radius, self.rings(kind).walk(origin))
+        return [t for t in walk if where is None or where(t[1])]
+
+    def nearest_from(self, kind, planets_data, k=10, where=None):
+        """
+        Los `k` objetivos más cercanos a cualquiera de mis planetas: [(distancia, nombre del origen, fila)].
+        Cada objetivo aparece una vez, con su origen más cercano.
+        """
+        rings = self.rings(kind)
+
+        def tagged(i, name, coords):
+            for dist, row in rings.walk(coords):
+                yield dist, i, name, row
+
+        walks = [tagged(i, name, coords) for i, (name, coords) in enumerate(origins(planets_data))]
+        result, seen = [], set()
+        for dist, _, name, row in heapq.merge(*walks, key=lambda t: (t[0], t[1])):
+            target = coords_of(row)
+            if target in seen or (where is not None and not where(row)):
+                continue
+            seen.add(target)
+            result.append((dist, name, row))
+            if len(result) >= k:
+                break
+        return result
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def target_index(db_path="galaxy.db"):
+    """TargetIndex compartido por todo el proceso para esta base."""
+    with _indexes_lock:
+        if db_path not in _indexes:
+            _indexes[db_path] = TargetIndex(db_path)
+        return _indexes[db_path]
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Objetivos más cercanos por distancia de vuelo")
+    parser.add_argument("kind", choices=list(KINDS))
+    parser.add_argument("origin", nargs="?", help="coordenadas g:s:p de origen")
+    parser.add_argument("--planets", action="store_true", help="desde todos los planetas de planets_data.json")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius", type=int, help="todos los objetivos hasta esta distancia")
+    parser.add_argument("--db", default="galaxy.db")
+    args = parser.parse_args()
+
+    index = TargetIndex(args.db)
+    start = time.perf_counter()
+    index.rings(args.kind)
+    print(f"[TARGETS] índice '{args.kind}' armado en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    if args.planets:
+        with open("planets_data.json", "r", encoding="utf-8") as f:
+            found = index.nearest_from(args.kind, json.load(f), args.k)
+    elif not args.origin:
+        raise SystemExit("[TARGETS] Falta el origen (g:s:p) o --planets")
+    elif args.radius is not None:
+        found = [(d, args.origin, row) for d, row in index.within(args.kind, args.origin, args.radius)]
+    else:
+        found = [(d, args.origin, row) for d, row in index.nearest(args.kind, args.origin, args.k)]
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for dist, name, row in found:
+        g, s, p = coords_of(row)
+        print(f"  {g}:{s}:{p:<3} {dist:>6}  desde {name}")
+    print(f"[TARGETS] {len(found)} objetivos en {elapsed:.3f} ms")
@@ -0,0 +1,349 @@
+"""
+Ranking de objetivos inactivos: botín estimado por hora de vuelo.
+
+Cruza galaxy.db (inactivos, posiciones, ranking) con los informes de espionaje de
+output/ogame_messages.db (ver html_to_sql) y guarda el resultado en galaxy.db:
+
+- spy_reports:     último informe de cada slot (recursos vistos y cuándo);
+- target_ranking:  una fila por (origen, objetivo) con distancia, duración del vuelo,
+                   botín estimado y botín por hora de vuelo (ida y vuelta);
+- ranking_origins: los orígenes (mis planetas) y los parámetros con que se calcularon;
+- ranking_scans / ranking_players: el scanned_at de cada sistema y el estado de cada
+  jugador ya incorporados al ranking.
+
+`refresh` nunca recalcula todo: solo los sistemas cuyo scanned_at cambió, los planetas de
+jugadores que cambiaron de estado o desaparecieron de players, los slots con informes nuevos y los orígenes agregados
+o con otros parámetros. Si la generación de galaxy.db no cambió ni hay informes nuevos
+(marcas de agua en la tabla meta) no se toca nada.
+
+Uso (desde la raíz del repo):
+    python -m workers.inactive_ranking [--origin 3:120:8] [--ship "Nave Grande de Carga"] [--limit 20]
+"""
+import argparse, json, os, re, sqlite3, time
+from workers.flight import SHIPS, distance, flight_seconds, parse_coords
+from workers.galaxy_db import generation_key, init_db
+from workers.galaxy_targets import origins as planet_origins
+
+MESSAGES_DB = os.path.join("output", "ogame_messages.db")
+
+ESPIONAGE_TYPE = 0      # data-raw-messagetype de los informes de espionaje
+LOOT_RATIO = 0.5        # fracción de los recursos que se lleva un ataque a un inactivo
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS spy_reports (
+        galaxy INTEGER, system INTEGER, position INTEGER, ts INTEGER, message_id INTEGER,
+        metal INTEGER, crystal INTEGER, deuterium INTEGER,
+        PRIMARY KEY (galaxy, system, position))""",
+    """CREATE TABLE IF NOT EXISTS target_ranking (
+        origin TEXT, galaxy INTEGER, system INTEGER, position INTEGER,
+        planet_id INTEGER, player_id INTEGER, player_name TEXT, rank_position INTEGER,
+        report_ts INTEGER, loot INTEGER, distance INTEGER, flight_seconds REAL, loot_per_hour REAL,
+        PRIMARY KEY (origin, galaxy, system, position))""",
+    "CREATE INDEX IF NOT EXISTS idx_target_ranking_slot ON target_ranking (galaxy, system, position)",
+    "CREATE INDEX IF NOT EXISTS idx_target_ranking_best ON target_ranking (origin, loot_per_hour DESC)",
+    "CREATE TABLE IF NOT EXISTS ranking_origins (origin TEXT PRIMARY KEY, name TEXT, params TEXT)",
+    "CREATE TABLE IF NOT EXISTS ranking_scans (galaxy INTEGER, system INTEGER, scanned_at REAL, PRIMARY KEY (galaxy, system))",
+    """CREATE TABLE IF NOT EXISTS ranking_players (
+        player_id INTEGER PRIMARY KEY, name TEXT, rank_position INTEGER,
+        is_inactive INTEGER, is_vacation INTEGER, is_banned INTEGER)""",
+    "CREATE INDEX IF NOT EXISTS idx_target_ranking_player ON target_ranking (player_id)",
+]
+
+SQL_TARGETS = """
+    SELECT s.galaxy, s.system, p.position, p.planet_id, pl.player_id, pl.name AS player_name, pl.rank_position,
+           r.ts AS report_ts, r.metal, r.crystal, r.deuterium
+    FROM players pl
+    JOIN planets p ON p.player_id = pl.player_id
+    JOIN scans s ON s.id = p.scan_id
+    LEFT JOIN spy_reports r ON r.galaxy = s.galaxy AND r.system = s.system AND r.position = p.position
+    WHERE pl.is_inactive = 1 AND pl.is_vacation = 0 AND pl.is_banned = 0 AND p.is_destroyed = 0
+"""
+
+# Sistemas y jugadores distintos de lo último incorporado al ranking
+SQL_CHANGED_SYSTEMS = """
+    SELECT s.galaxy, s.system, s.scanned_at FROM scans s
+    LEFT JOIN ranking_scans r ON r.galaxy = s.galaxy AND r.system = s.system
+    WHERE r.scanned_at IS NOT s.scanned_at
+"""
+
+SQL_CHANGED_PLAYERS = """
+    SELECT pl.player_id, pl.name, pl.rank_position, pl.is_inactive, pl.is_vacation, pl.is_banned FROM players pl
+    LEFT JOIN ranking_players r ON r.player_id = pl.player_id
+    WHERE r.name IS NOT pl.name OR r.rank_position IS NOT pl.rank_position OR r.is_inactive IS NOT pl.is_inactive
+       OR r.is_vacation IS NOT pl.is_vacation OR r.is_banned IS NOT pl.is_banned
+"""
+
+# Jugadores incorporados al ranking que ya no están en players (borrados o reemplazados por un volcado)
+SQL_GONE_PLAYERS = """
+    SELECT r.player_id FROM ranking_players r
+    LEFT JOIN players pl ON pl.player_id = r.player_id
+    WHERE pl.player_id IS NULL
+"""
+
+def init_ranking(conn):
+    for sql in SCHEMA:
+        conn.execute(sql)
+    conn.commit()
+
+def get_meta(conn, key, default=0):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return default if row is None else row[0]
+
+def set_meta(conn, key, value):
+    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+# ─────────────────────────────
+# Informes de espionaje
+# ─────────────────────────────
+
+AMOUNT_RE = re.compile(r"^(Metal|Cristal|Crystal|Deuterio|Deuterium)\s*:?\s*$|^(Metal|Cristal|Crystal|Deuterio|Deuterium)\s*:\s*(\S+)")
+RESOURCE_NAMES = {"metal": "metal", "cristal": "crystal", "crystal": "crystal", "deuterio": "deuterium", "deuterium": "deuterium"}
+SUFFIXES = {"k": 1e3, "m": 1e6, "mn": 1e6, "md": 1e9, "b": 1e9}
+
+def parse_amount(text):
+    """'1.234.567' -> 1234567, '1,5M' / '2,3Mn' -> 1500000 / 2300000. None si no es un número."""
+    text = text.strip().lower()
+    m = re.fullmatch(r"([\d.,]+)\s*([a-z]*)", text)
+    if not m or (m.group(2) and m.group(2) not in SUFFIXES):
+        return None
+    number, suffix = m.groups()
+    try:
+        if suffix:
+            return int(float(number.replace(".", "").replace(",", ".")) * SUFFIXES[suffix])
+        return int(number.replace(".", "").replace(",", ""))
+    except ValueError:
+        return None
+
+def report_resources(resources_json, content):
+    """(metal, cristal, deuterio) de un informe: de data-raw-resources o, si falta, del texto."""
+    if resources_json:
+        try:
+            data = json.loads(resources_json)
+            return tuple(int(data.get(k, 0) or 0) for k in ("metal", "crystal", "deuterium"))
+        except (ValueError, TypeError, AttributeError):
+            pass
+
+    found = {}
+    lines = (content or "").splitlines()
+    for i, line in enumerate(lines):
+        m = AMOUNT_RE.match(line.strip())
+        if not m:
+            continue
+        if m.group(3) is not None:
+            name, value = m.group(2), parse_amount(m.group(3))
+        else:
+            # Nombre y cantidad en líneas separadas (clean_text corta por elemento)
+            name = m.group(1)
+            value = parse_amount(lines[i + 1]) if i + 1 < len(lines) else None
+        if value is not None:
+            found.setdefault(RESOURCE_NAMES[name.lower()], value)
+    if not found:
+        return None
+    return tuple(found.get(k, 0) for k in ("metal", "crystal", "deuterium"))
+
+def ingest_reports(conn, messages_db=MESSAGES_DB):
+    """Pasa a spy_reports los informes nuevos (id > marca de agua). Devuelve los slots que cambiaron."""
+    if not os.path.isfile(messages_db):
+        return set()
+    last_id = get_meta(conn, "ranking_message_id")
+
+    msgs = sqlite3.connect(f"file:{messages_db}?mode=ro", uri=True)
+    try:
+        # Bases de antes de guardar data-raw-resources: solo queda el texto
+        columns = [row[1] for row in msgs.execute("PRAGMA table_info(messages)")]
+        resources_col = "resources_json" if "resources_json" in columns else "NULL"
+        rows = msgs.execute(f"""
+            SELECT id, timestamp, target_coords, {resources_col}, content FROM messages
+            WHERE id > ? AND msg_type = ?
+            ORDER BY id
+        """, (last_id, ESPIONAGE_TYPE)).fetchall()
+    finally:
+        msgs.close()
+
+    changed = set()
+    for message_id, ts, coords, resources_json, content in rows:
+        last_id = max(last_id, message_id)
+        try:
+            slot = parse_coords(coords)
+        except (ValueError, TypeError):
+            continue
+        resources = report_resources(resources_json, content)
+        if resources is None:
+            continue
+        cur = conn.execute("""
+            INSERT INTO spy_reports (galaxy, system, position, ts, message_id, metal, crystal, deuterium)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(galaxy, system, position) DO UPDATE SET
+                ts = excluded.ts, message_id = excluded.message_id,
+                metal = excluded.metal, crystal = excluded.crystal, deuterium = excluded.deuterium
+            WHERE excluded.ts >= spy_reports.ts
+        """, (*slot, ts, message_id, *resources))
+        if cur.rowcount:
+            changed.add(slot)
+
+    set_meta(conn, "ranking_message_id", last_id)
+    return changed
+
+# ─────────────────────────────
+# Ranking
+# ─────────────────────────────
+
+class RankingEngine:
+    def __init__(self, db_path="galaxy.db", messages_db=MESSAGES_DB, ship="Nave Grande de Carga",
+                 ship_speed=None, speed_pct=1.0, fleet_speed=1):
+        self.db_path = db_path
+        self.messages_db = messages_db
+        self.ship = ship
+        self.ship_speed = ship_speed or SHIPS[ship][0]
+        self.speed_pct = speed_pct
+        self.fleet_speed = fleet_speed
+
+        self.updated_rows = 0
+        self.elapsed = 0.0
+
+    def params(self):
+        return json.dumps([self.ship, self.ship_speed, self.speed_pct, self.fleet_speed, LOOT_RATIO])
+
+    def rows_for(self, origin, targets):
+        """Filas de target_ranking para un origen (coords 'g:s:p')."""
+        o = parse_coords(origin)
+        rows = []
+        for t in targets:
+            dist = distance(o, (t["galaxy"], t["system"], t["position"]))
+            seconds = float(flight_seconds(dist, self.ship_speed, self.speed_pct, self.fleet_speed))
+            loot = None
+            per_hour = None
+            if t["report_ts"] is not None:
+                loot = int(LOOT_RATIO * ((t["metal"] or 0) + (t["crystal"] or 0) + (t["deuterium"] or 0)))
+                per_hour = loot / (2 * seconds / 3600)
+            rows.append((
+                origin, t["galaxy"], t["system"], t["position"], t["planet_id"], t["player_id"], t["player_name"],
+                t["rank_position"], t["report_ts"], loot, dist, seconds, per_hour
+            ))
+        return rows
+
+    def _insert(self, conn, rows):
+        conn.executemany("""
+            INSERT OR REPLACE INTO target_ranking
+            (origin, galaxy, system, position, planet_id, player_id, player_name, rank_position,
+             report_ts, loot, distance, flight_seconds, loot_per_hour)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        self.updated_rows += len(rows)
+
+    def refresh(self, planets_data):
+        """Actualiza target_ranking con lo que cambió desde la última vez. Devuelve las filas escritas."""
+        start = time.perf_counter()
+        self.updated_rows = 0
+        conn = init_db(self.db_path)
+        conn.row_factory = sqlite3.Row
+        init_ranking(conn)
+        params = self.params()
+
+        with conn:
+            # ── orígenes: los que desaparecieron o cambiaron de parámetros se recalculan enteros
+            current = {f"{g}:{s}:{p}": name for name, (g, s, p) in planet_origins(planets_data)}
+            stored = {r["origin"]: r["params"] for r in conn.execute("SELECT origin, params FROM ranking_origins")}
+            stale = [o for o in stored if o not in current or stored[o] != params]
+            for origin in stale:
+                conn.execute("DELETE FROM target_ranking WHERE origin = ?", (origin,))
+                conn.execute("DELETE FROM ranking_origins WHERE origin = ?", (origin,))
+            new = [o for o in current if o not in stored or o in stale]
+            kept = [o for o in current if o not in new]
+
+            # ── qué cambió en las dos bases
+            reports = ingest_reports(conn, self.messages_db)
+            systems, players = [], []
+            generation = get_meta(conn, generation_key())
+            if generation != get_meta(conn, "ranking_generation"):
+                systems = conn.execute(SQL_CHANGED_SYSTEMS).fetchall()
+                conn.executemany("INSERT OR REPLACE INTO ranking_scans VALUES (?, ?, ?)", [tuple(r) for r in systems])
+                # El estado de un jugador (inactivo, vacaciones...) afecta a sus planetas de otros sistemas
+                players = conn.execute(SQL_CHANGED_PLAYERS).fetchall()
+                conn.executemany("INSERT OR REPLACE INTO ranking_players VALUES (?, ?, ?, ?, ?, ?)", [tuple(r) for r in players])
+                # Sin fila en players sus planetas ya no son objetivos: sacarlos de todos los orígenes
+                gone = [(r["player_id"],) for r in conn.execute(SQL_GONE_PLAYERS)]
+                conn.executemany("DELETE FROM target_ranking WHERE player_id = ?", gone)
+                conn.executemany("DELETE FROM ranking_players WHERE player_id = ?", gone)
+                self.updated_rows += len(gone)
+                set_meta(conn, "ranking_generation", generation)
+
+            # ── orígenes existentes: solo los sistemas, jugadores y slots que cambiaron
+            if kept and (systems or players or reports):
+                targets = {}
+                def collect(where, params):
+                    for t in conn.execute(SQL_TARGETS + where, params):
+                        targets[(t["galaxy"], t["system"], t["position"])] = t
+
+                for g, s, _ in systems:
+                    conn.execute("DELETE FROM target_ranking WHERE galaxy = ? AND system = ?", (g, s))
+                    collect(" AND s.galaxy = ? AND s.system = ?", (g, s))
+                for r in players:
+                    conn.execute("DELETE FROM target_ranking WHERE player_id = ?", (r["player_id"],))
+                    collect(" AND pl.player_id = ?", (r["player_id"],))
+                for g, s, p in reports:
+                    conn.execute("DELETE FROM target_ranking WHERE galaxy = ? AND system = ? AND position = ?", (g, s, p))
+                    collect(" AND s.galaxy = ? AND s.system = ? AND p.position = ?", (g, s, p))
+                for origin in kept:
+                    self._insert(conn, self.rows_for(origin, targets.values()))
+
+            # ── orígenes nuevos: todos los objetivos
+            if new:
+                targets = conn.execute(SQL_TARGETS).fetchall()
+                for origin in new:
+                    self._insert(conn, self.rows_for(origin, targets))
+                    conn.execute("INSERT OR REPLACE INTO ranking_origins (origin, name, params) VALUES (?, ?, ?)",
+                                 (origin, current[origin], params))
+
+        conn.close()
+        self.elapsed = time.perf_counter() - start
+        return self.updated_rows
+
+def ranking(conn, origin=None, limit=50):
+    """
+    Mejores objetivos por botín/hora. Con `origin`, desde ese planeta; sin él, cada
+    objetivo una vez con su mejor origen. Los que no tienen informe van al final.
+    """
+    if origin is not None:
+        return conn.execute("""
+            SELECT * FROM target_ranking WHERE origin = ?
+            ORDER BY loot_per_hour DESC NULLS LAST, distance
+            LIMIT ?
+        """, (origin, limit)).fetchall()
+    return conn.execute("""
+        SELECT *, MAX(COALESCE(loot_per_hour, -1)) AS best FROM target_ranking
+        GROUP BY galaxy, system, position
+        ORDER BY best DESC, distance
+        LIMIT ?
+    """, (limit,)).fetchall()
+
+# ─────────────────────────────
+# Main
+# ─────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ranking de inactivos por botín por hora de vuelo")
+    parser.add_argument("--db", default="galaxy.db")
+    parser.add_argument("--messages-db", default=MESSAGES_DB)
+    parser.add_argument("--planets", default="planets_data.json")
+    parser.add_argument("--origin", help="mostrar el ranking desde este planeta (g:s:p)")
+    parser.add_argument("--ship", default="Nave Grande de Carga", choices=list(SHIPS))
+    parser.add_argument("--fleet-speed", type=float, default=1)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.planets, "r", encoding="utf-8") as f:
+        planets_data = json.load(f)
+
+    engine = RankingEngine(args.db, args.messages_db, ship=args.ship, fleet_speed=args.fleet_speed)
+    n = engine.refresh(planets_data)
+    print(f"[RANKING] {n} filas actualizadas en {engine.elapsed * 1000:.1f} ms")
+
+    conn = init_db(args.db)
+    conn.row_factory = sqlite3.Row
+    for r in ranking(conn, args.origin, args.limit):
+        loot = f"{r['loot']:,}" if r["loot"] is not None else "sin informe"
+        per_hour = f"{r['loot_per_hour']:,.0f}/h" if r["loot_per_hour"] is not None else "-"
+        print(f"  {r['galaxy']}:{r['system']}:{r['position']:<3} {r['player_name'] or '?':<20} desde {r['origin']:<10} "
+              f"{r['flight_seconds'] / 60:6.1f} min  {loot:>14}  {per_hour}")
+    conn.close()
@@ -2,7 +2,8 @@ import json, re, os
 from datetime import datetime
 from bs4 import BeautifulSoup
 from PyQt6.QtCore import pyqtSignal, QObject
-from workers.new_galaxy_worker import load_ogame_session
+from workers.session_manager import session_manager
+from workers.rate_limiter import GAME_LIMITER, PRIORITY_MESSAGES, healthy
 
 def clean_message_html(html_content: str, base_url: str = "https://s163-ar.ogame.gameforge.com") -> str:
     """
@@ -36,12 +37,14 @@ def fetch_messages(base_url, profile_path="profile_data"):
     Retorna array de messages con {title, content, time, tab_id, subtab_id, tab_name, subtab_name}
     """
     try:
-        session = load_ogame_session(profile_path)
+        session = session_manager(profile_path).client()
         
         # PASO 1: Obtener tabs principales y sus contadores de mensajes
         #print("[MESSAGES] Paso 1: Obteniendo tabs principales...")
         url_main = base_url + "/game/index.php?page=ingame&component=messages"
-        response_main = session.get(url_main, timeout=10)
+        with GAME_LIMITER.request(PRIORITY_MESSAGES) as req:
+            response_main = session.get(url_main, timeout=10)
+            req.ok = healthy(response_main.status_code)
         response_main.raise_for_status()
         
         soup_main = BeautifulSoup(response_main.text, 'html.parser')
@@ -88,7 +91,9 @@ def fetch_messages(base_url, profile_path="profile_data"):
             #print(f"[MESSAGES] Paso 2: Obteniendo subtabs para tab {active_tab} ({tab_name})...")
             
             url_wrapper = base_url + "/game/index.php?page=componentOnly&component=messages&ajax=1&action=getMessageWrapper"
-            response_wrapper = session.post(url_wrapper, data={"activeTab": active_tab}, timeout=10)
+            with GAME_LIMITER.request(PRIORITY_MESSAGES) as req:
+                response_wrapper = session.post(url_wrapper, data={"activeTab": active_tab}, timeout=10)
+                req.ok = healthy(response_wrapper.status_code)
             response_wrapper.raise_for_status()
             
             soup_wrapper = BeautifulSoup(response_wrapper.text, 'html.parser')
@@ -132,14 +137,16 @@ def fetch_messages(base_url, profile_path="profile_data"):
                 #print(f"[MESSAGES] Paso 3: Obteniendo mensajes para subtab {active_subtab} ({subtab_name})...")
                 
                 url_list = base_url + "/game/index.php?page=componentOnly&component=messages&asJson=1&action=getMessagesList"
-                response_list = session.post(
-                    url_list,
-                    data={
-                        "showTrash": "false",
-                        "activeSubTab": active_subtab
-                    },
-                    timeout=10
-                )
+                with GAME_LIMITER.request(PRIORITY_MESSAGES) as req:
+                    response_list = session.post(
+                        url_list,
+                        data={
+                            "showTrash": "false",
+                            "activeSubTab": active_subtab
+                        },
+                        timeout=10
+                    )
+                    req.ok = healthy(response_list.status_code)
                 response_list.raise_for_status()
                 
                 try:
@@ -1,14 +1,32 @@
-import os, random, time, json, sys, traceback, queue, threading, string, keyboard
-import requests, browser_cookie3, sqlite3
+import os, shutil, time, json, sys, traceback, queue, threading, string, keyboard, argparse
+import sqlite3
 from tqdm import tqdm
-
-TABLE_SCANS = [("id", 'INTEGER PRIMARY KEY AUTOINCREMENT'), ("galaxy", 'INTEGER'), ("system", 'INTEGER'), ("scanned_at", 'REAL'), ("success", 'INTEGER')]
-TABLE_PLAYERS = [("player_id", 'INTEGER PRIMARY KEY'), ("name", 'TEXT'), ("alliance_id", 'INTEGER'), ("alliance_tag", 'TEXT'), ("rank_position", 'INTEGER'), ("is_active", 'INTEGER'), ("is_inactive", 'INTEGER'), ("is_vacation", 'INTEGER'), ("is_banned", 'INTEGER')]
-TABLE_PLANETS = [("planet_id", 'INTEGER PRIMARY KEY'), ("name", 'TEXT'), ("player_id", 'INTEGER'), ("image", 'TEXT'), ("is_destroyed", 'INTEGER'), ("activity", 'INTEGER'), ("scan_id", 'INTEGER'), ("position", 'INTEGER'), ("moon_id", 'INTEGER'),
-                  ("can_attack", 'INTEGER'), ("can_transport", 'INTEGER'), ("can_deploy", 'INTEGER'), ("can_hold", 'INTEGER'), ("can_espionage", 'INTEGER')]
-TABLE_MOONS = [("moon_id", " INTEGER PRIMARY KEY"),("name"," TEXT"),("size"," INTEGER"),("image"," TEXT"),("is_destroyed"," INTEGER"),("activity"," INTEGER"),
-               ("can_attack"," INTEGER"),("can_transport"," INTEGER"),("can_deploy"," INTEGER"),("can_hold"," INTEGER"),("can_espionage"," INTEGER"),("can_destroy"," INTEGER")]
-TABLE_DEBRIS = [("scan_id", 'INTEGER'), ("position", 'INTEGER'), ("metal", 'INTEGER'), ("crystal", 'INTEGER'), ("deuterium", 'INTEGER'), ("required_ships", 'INTEGER')]
+from workers.galaxy_db import (
+    init_db, fresh_systems, start_scan_run, unfinished_scan_run, finish_scan_run,
+    GalaxyDBWriter
+)
+from workers.galaxy_decode import decode_galaxy
+from workers.galaxy_history import HistoryRecorder
+from workers.galaxy_activity import ActivityRecorder
+from workers.galaxy_grid import GridRecorder, grid_path_for
+from workers.galaxy_rollups import RollupRecorder
+from workers.rate_limiter import GAME_LIMITER, PRIORITY_SCAN, healthy
+from workers.galaxy_replay import save_fixture
+from workers.galaxy_archive import ResponseArchive
+from workers.galaxy_bootstrap import systems_needing_detail
+from workers.scan_metrics import MetricsFlusher, ScanMetrics, limiter_collector, sessions_collector, writer_collector
+# Reexportados: messages y fleet_sender los importan desde acá
+from workers.session_manager import (
+    BASE_URL, PROFILE_PATH, LoginError, SessionManager, ensure_logged_in, load_ogame_session, session_manager
+)
+
+GALAXY_PARAMS = {
+    "page": "ingame",
+    "component": "galaxy",
+    "action": "fetchGalaxyContent",
+    "ajax": "1",
+    "asJson": "1"
+}
 
 # ─────────────────────────────
 # Utils
@@ -33,39 +51,6 @@ def close():
     print("\r                 \r\r", end='')
     sys.exit(1)
 
-def load_ogame_session(profile_path):
-    cj = browser_cookie3.chrome(
-        cookie_file=f"{profile_path}/Cookies",
-        domain_name="ogame.gameforge.com"
-    )
-    session = requests.Session()
-    session.cookies.update(cj)
-    session.headers.update({
-        "X-Requested-With": "XMLHttpRequest",
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Referer": "https://s163-ar.ogame.gameforge.com/game/index.php?page=ingame&component=galaxy",
-        "Origin": "https://s163-ar.ogame.gameforge.com",
-    })
-    return session
-
-def ensure_logged_in(profile_name, galaxy=None, retry_wait=10):
-    BASE_URL = "https://s163-ar.ogame.gameforge.com/game/index.php"
-    while True:
-        session = load_ogame_session(profile_name)
-        try:
-            r = session.get(f"{BASE_URL}?page=ingame&component=galaxy", timeout=10)
-            if "component=galaxy" in r.text:
-                if galaxy is not None:
-                    print(f"\r\r[GALAXY {galaxy}] Logged   ", end='')
-                return session
-        except Exception as e:
-            print(f"\n[LOGIN] Error: {e}")
-
-        if galaxy is not None:
-            print(f"\r[GALAXY {galaxy}] Login...", end='')
-        time.sleep(retry_wait)
-
 def parse_systems_arg(arg):
     if arg.isdigit():
         s = int(arg)
@@ -78,81 +63,63 @@ def parse_systems_arg(arg):
 
     raise ValueError(f"Sistemas inválidos: '{arg}'")
 
-def parse_mission_flags(available):
-    flags = {
-        1: "can_attack",
-        3: "can_transport",
-        4: "can_deploy",
-        5: "can_hold",
-        6: "can_espionage",
-        9: "can_destroy",
-    }
-
-    result = {v: 0 for v in flags.values()}
-
-    for m in available or []:
-        mt = m.get("missionType")
-        if mt in flags:
-            result[flags[mt]] = 1
-
-    return result
-
-def sql_insert_values(table_cols):
-    return f" ({', '.join(col for col, _ in table_cols)}) VALUES ({', '.join(['?'] * len(table_cols))})"
+def parse_age_arg(arg):
+    """'90s', '30m', '6h', '2d' -> segundos. Sin unidad se toma como horas."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    arg = arg.strip().lower()
+    try:
+        if arg and arg[-1] in units:
+            return float(arg[:-1]) * units[arg[-1]]
+        return float(arg) * 3600
+    except ValueError:
+        raise ValueError(f"Edad inválida: '{arg}'")
 
-def sql_create(table):
-    return f"{', '.join([f'{col} {type_}' for col, type_ in table])}"
+def parse_galaxies_arg(arg):
+    """'all' -> 1-5, o una galaxia / rango como en parse_systems_arg."""
+    if arg.strip().lower() == "all":
+        return range(1, 6)
+    return parse_systems_arg(arg)
 
-# ─────────────────────────────
-# DB
-# ─────────────────────────────
+def systems_spec(systems):
+    return f"{systems.start}-{systems.stop - 1}"
 
-def init_db(db_path="galaxy.db"):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-
-    cur.executescript(
-        f"CREATE TABLE IF NOT EXISTS scans ({sql_create(TABLE_SCANS)}, UNIQUE (galaxy, system));" +
-        f"CREATE TABLE IF NOT EXISTS players ({sql_create(TABLE_PLAYERS)});" +
-        f"CREATE TABLE IF NOT EXISTS planets ({sql_create(TABLE_PLANETS)});" +
-        f"CREATE TABLE IF NOT EXISTS moons ({sql_create(TABLE_MOONS)});" +
-        f"CREATE TABLE IF NOT EXISTS debris ({sql_create(TABLE_DEBRIS)}, PRIMARY KEY (scan_id, position));" +
-        "CREATE TABLE IF NOT EXISTS images (image_name TEXT PRIMARY KEY, image_src TEXT);" +
-        "CREATE TABLE IF NOT EXISTS missions (missionType INTEGER PRIMARY KEY, name TEXT, link TEXT);"
-    )
-    conn.commit()
-
-    MISSIONS = [
-        (0, "Reubicar", "prepareMove"),
-        (1, "Atacar", "attack"),
-        (2, "Ataque conjunto", "unionAttack"),
-        (3, "Transportar", "transport"),
-        (4, "Desplegar", "deploy"),
-        (5, "Mantener posición", "hold"),
-        (6, "Espionaje", "espionage"),
-        (7, "Colonizar", "colonize"),
-        (8, "Recolectar", "recycle"),
-        (9, "Destruir", "destroy"),
-        (10, "Misil", "missileAttack"),
-        (15, "Expedicíon", "expedition"),
-        (18, "Forma de vida", "discovery")
-    ]
-
-    cur.executemany("""
-        INSERT OR IGNORE INTO missions (missionType, name, link)
-        VALUES (?, ?, ?)
-    """, MISSIONS)
-
-    return conn
+def writer_hooks(db_path="galaxy.db"):
+    """Hooks que corren dentro de cada transacción del GalaxyDBWriter."""
+    return [HistoryRecorder(), ActivityRecorder(), RollupRecorder(), GridRecorder(grid_path_for(db_path))]
 
 # ─────────────────────────────
 # Galaxy Worker
 # ─────────────────────────────
 
 class GalaxyWorker:
-    def __init__(self, galaxy, systems=None):
-        self.galaxy = galaxy
+    """
+    Escanea una o varias galaxias con una sola cola de (galaxia, sistema) compartida por
+    todos los threads: ningún thread queda ocioso al terminar una galaxia y el login se
+    hace una vez para todo el escaneo.
+    """
+    def __init__(self, galaxy, systems=None, max_age=None, resume=False, db_path="galaxy.db",
+                 capture_dir=None, archive_dir=None, occupied_only=False, metrics_path=None, sessions=None, max_retries=2,
+                 login_attempts=None):
+        self.galaxies = [galaxy] if isinstance(galaxy, int) else list(galaxy)
+        self.galaxy = self.galaxies[0]
+        self.label = str(self.galaxy) if len(self.galaxies) == 1 else f"{self.galaxies[0]}-{self.galaxies[-1]}"
         self.systems = systems or range(1, 500)
+        self.max_age = max_age
+        self.resume = resume
+        self.occupied_only = occupied_only   # saltear los sistemas que galaxy.db sabe vacíos y sin escombros (ver galaxy_bootstrap)
+        self.db_path = db_path
+        self.capture_dir = capture_dir   # guardar las respuestas crudas como fixtures (ver galaxy_replay)
+        self.archive_dir = archive_dir   # archivo zstd de respuestas crudas (ver galaxy_archive)
+        self.archive = None
+        self.metrics = ScanMetrics()
+        self.metrics_path = metrics_path   # volcar self.metrics periódicamente (ver scan_metrics)
+        self.on_progress = None   # on_progress(hechos, total) por sistema, desde los threads de red
+        self.on_written = None    # on_written(scans) después de cada commit (ver GalaxyDBWriter)
+        self.sessions = sessions or session_manager(PROFILE_PATH)
+        self.base_url = self.sessions.base_url
+        self.max_retries = max_retries   # reintentos por sistema (5xx, sesión caída, errores de red)
+        self.login_attempts = login_attempts   # None = reintentar el login hasta que stop() lo corte
+        self.login_error = None
 
         self.PLANETS = 0
         self.MOONS = 0
@@ -161,274 +128,285 @@ class GalaxyWorker:
         self.CRYSTAL = 0
         self.DEUTERIUM = 0
 
-    def worker_thread(self, tid, systems_q, pbar, lock):
-        session = ensure_logged_in("..\profile_data", self.galaxy)
-        conn = init_db("galaxy.db")
-
-        status = tqdm(
-            total=0,
-            position=tid + 1,
-            bar_format="{desc}",
-            leave=True
-        )
-
-        BASE_URL = "https://s163-ar.ogame.gameforge.com/game/index.php"
-        PARAMS = {
-            "page": "ingame",
-            "component": "galaxy",
-            "action": "fetchGalaxyContent",
-            "ajax": "1",
-            "asJson": "1"
-        }
+        # Tiempos para galaxy_bench
+        self.fetch_times = []
+        self.decode_time = 0.0
+        self.db_time = 0.0
+        self.write_stats = None
+        self.elapsed = 0.0
+        self.scanned = 0
+        self.failed = 0
+
+        self._count_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def count(self, scan):
+        with self._count_lock:
+            self.PLANETS += len(scan.planets)
+            self.MOONS += len(scan.moons)
+            self.DEBRIS += len(scan.debris)
+            for _, _, m, c, d, _ in scan.debris:
+                self.METAL += m
+                self.CRYSTAL += c
+                self.DEUTERIUM += d
+
+    def worker_thread(self, tid, systems_q, pbar, lock, writer):
+        # Jar y pool de conexiones compartidos: la rotación de prsess_100170 la ven todos los threads
+        session = self.sessions.client()
+        try:
+            gen = self.sessions.ensure_logged_in(self.label, self._stop, self.login_attempts)
+        except LoginError as e:
+            return self.give_up(e)
 
-        while True:
+        while not self._stop.is_set():
             try:
-                system = systems_q.get_nowait()
+                galaxy, system, attempt = systems_q.get_nowait()
             except queue.Empty:
                 break
 
+            if attempt:
+                self.metrics.inc("retries_total")
+            self.sessions.wait_ready()
             start = time.perf_counter()
+            scan = None
             try:
-                r = session.post(
-                    BASE_URL,
-                    params=PARAMS,
-                    data={"galaxy": self.galaxy, "system": system},
-                    timeout=10
-                )
-
-                ok, session_cookie = self.parse_galaxy_response(r, conn, self.galaxy, system)
-                if not ok:
-                    session = ensure_logged_in("..\profile_data", self.galaxy)
-                # Actualizar la cookie de sesión si se recibió una nueva
-                if session_cookie:
-                    session.cookies.set("prsess_100170", session_cookie)
-
+                with GAME_LIMITER.request(PRIORITY_SCAN) as req:
+                    r = session.post(
+                        self.base_url,
+                        params=GALAXY_PARAMS,
+                        data={"galaxy": galaxy, "system": system},
+                        timeout=10
+                    )
+                    req.ok = healthy(r.status_code)
+                elapsed = time.perf_counter() - start
+                self.fetch_times.append(elapsed)
+                self.metrics.request("fetchGalaxyContent", elapsed, r.status_code, len(r.content))
+
+                # 5xx / 429: el servidor está cargado, la sesión sigue bien
+                scan = self.parse_galaxy_response(r, galaxy, system) if req.ok else None
+                if scan is not None:
+                    self.metrics.inc("systems_total", result="ok")
+                    writer.submit(scan)
+                    if self.capture_dir:
+                        save_fixture(self.capture_dir, galaxy, system, r.content)
+                    if self.archive is not None:
+                        self.archive.add(galaxy, system, scan.scanned_at, r.content)
+                elif req.ok:
+                    # 200 que no es JSON: la página de login, la sesión se cayó
+                    self.metrics.inc("relogins_total")
+                    gen = self.sessions.relogin(gen, self.label, self._stop, self.login_attempts)
+
+            except LoginError as e:
+                return self.give_up(e)
             except Exception as e:
-                tqdm.write(f"[ERROR][T{tid}] {self.galaxy}:{system} {e}")
+                self.metrics.inc("errors_total", type=type(e).__name__)
+                tqdm.write(f"[ERROR][T{tid}] {galaxy}:{system} {e}")
 
-            elapsed = time.perf_counter() - start
-
-            status.set_description_str(
-                f"T{tid} | Sistema {system} | {elapsed:.2f}s"
-            )
+            if scan is None and attempt < self.max_retries:
+                # Vuelve a la cola: lo toma este u otro thread
+                systems_q.put((galaxy, system, attempt + 1))
+                systems_q.task_done()
+                continue
+            if scan is None:
+                self.metrics.inc("systems_total", result="failed")
+                with self._count_lock:
+                    self.failed += 1
 
             with lock:
                 pbar.update(1)
+                done, total = pbar.n, pbar.total
+            if self.on_progress is not None:
+                self.on_progress(done, total)
 
             systems_q.task_done()
-            #time.sleep(random.random())
 
-        conn.close()
-        status.close()
-
-    def parse_galaxy_response(self, response, conn, galaxy, system):
-        def image(name, src):
-            if name and src:
-                cur.execute("""
-                    INSERT OR IGNORE INTO images (image_name, image_src)
-                    VALUES (?, ?)
-                """, (name, src))
-        
-        # Extraer cookie de sesión de la respuesta si existe
-        session_cookie = None
-        if response:
-            if "prsess_100170" in response.cookies:
-                session_cookie = response.cookies["prsess_100170"]
-        
-        cur = conn.cursor()
+    def parse_galaxy_response(self, response, galaxy, system):
+        start = time.perf_counter()
+        scan = decode_galaxy(response.content, galaxy, system)
+        elapsed = time.perf_counter() - start
+        self.metrics.observe("decode_seconds", elapsed)
+        if scan is None:
+            return None
+
+        self.count(scan)
+        with self._count_lock:
+            self.decode_time += elapsed
+            self.scanned += 1
+        return scan
+
+    def stop(self):
+        """Termina después del sistema en curso de cada thread; el scan_run queda sin terminar."""
+        self._stop.set()
+
+    def give_up(self, error):
+        """Sin sesión (login cancelado o agotado): frena todos los threads, como stop()."""
+        with self._count_lock:
+            if self.login_error is None:
+                self.login_error = str(error)
+                tqdm.write(f"[GALAXY {self.label}] {error}")
+        self._stop.set()
+
+    def plan_systems(self, conn, galaxy):
+        """
+        Decide qué sistemas de `galaxy` escanear y a qué scan_run pertenecen.
+        - resume: retoma el último escaneo sin terminar del mismo rango, salteando lo escaneado desde su inicio.
+        - max_age: saltea sistemas escaneados hace menos de max_age segundos.
+        - occupied_only: saltea los sistemas que galaxy.db ya conoce vacíos y sin escombros.
+        """
         now = time.time()
+        spec = systems_spec(self.systems)
+        since = None
+        run_id = None
 
-        text = response.text.strip()
-        if not text.startswith("{"):
-            return False, None
-
-        data = json.loads(text)
+        if self.resume:
+            row = unfinished_scan_run(conn, galaxy, spec)
+            if row:
+                run_id, since = row
+                print(f"[GALAXY {galaxy}] Retomando escaneo #{run_id} ({spec})")
 
-        cur.execute("""
-            INSERT INTO scans (galaxy, system, scanned_at, success)
-            VALUES (?, ?, ?, 1)
-            ON CONFLICT(galaxy, system)
-            DO UPDATE SET
-                scanned_at = excluded.scanned_at,
-                success = 1
-        """, (galaxy, system, now))
+        if self.max_age is not None:
+            cutoff = now - self.max_age
+            since = cutoff if since is None else min(since, cutoff)
 
-        cur.execute("""
-            SELECT id FROM scans WHERE galaxy = ? AND system = ?
-        """, (galaxy, system))
-        scan_id = cur.fetchone()[0]
+        if run_id is None:
+            run_id = start_scan_run(conn, galaxy, spec, now)
 
-        galaxy_content = data.get("system", {}).get("galaxyContent", [])
-
-        for row in galaxy_content:
-            pos = row.get("position")
-            if not pos:
-                continue
-
-            player = row.get("player")
-            if player:
-                pId = player.get("playerId", 0)
-                if pId != 99999:
-                    cur.execute(f"INSERT OR REPLACE INTO players {sql_insert_values(TABLE_PLAYERS)}", (
-                        pId,
-                        player.get("playerName"),
-                        player.get("allianceId"),
-                        player.get("allianceTag"),
-                        player.get("highscorePositionPlayer"),
-                        int(player.get("isActive", False)),
-                        int(player.get("isInactive", False)),
-                        int(player.get("isOnVacation", False)),
-                        int(player.get("isBanned", False))
-                    ))
-
-            planets = row.get("planets") or []
-            if not isinstance(planets, list):
-                planets = [planets]
-
-            moon_id = None
-            for body in planets:
-                if not isinstance(body, dict):
-                    continue
-
-                ptype = body.get("planetType")
-                missions = body.get("availableMissions", [])
-                flags = parse_mission_flags(missions)
-                # ── PLANETA
-                if ptype == 1:
-                    self.PLANETS += 1
-                    image_name = body.get("imageInformation")
-                    image_src = body.get("imageSrc")
-                    image(image_name, image_src)
-                    cur.execute(f"INSERT OR REPLACE INTO planets {sql_insert_values(TABLE_PLANETS)}", (
-                        body.get("planetId"),
-                        body.get("planetName"),
-                        body.get("playerId"),
-                        image_name,
-                        int(body.get("isDestroyed", False)),
-                        body.get("activity", {}).get("showActivity"),
-                        scan_id,
-                        pos,
-                        None,
-                        flags["can_attack"],
-                        flags["can_transport"],
-                        flags["can_deploy"],
-                        flags["can_hold"],
-                        flags["can_espionage"]
-                    ))
-
-                # ── LUNA
-                elif ptype == 3:
-                    self.MOONS += 1
-                    image_name = body.get("imageInformation")
-                    image_src = body.get("imageSrc")
-                    image(image_name, image_src)
-                    moon_id = body.get("planetId")
-                    cur.execute(f"INSERT OR REPLACE INTO moons {sql_insert_values(TABLE_MOONS)}", (
-                        moon_id,
-                        body.get("planetName"),
-                        body.get("size"),
-                        image_name,
-                        int(body.get("isDestroyed", False)),
-                        body.get("activity", {}).get("showActivity"),
-                        flags["can_attack"],
-                        flags["can_transport"],
-                        flags["can_deploy"],
-                        flags["can_hold"],
-                        flags["can_espionage"],
-                        flags["can_destroy"]
-                    ))
-
-                # ── ESCOMBROS
-                elif ptype == 2:
-                    self.DEBRIS += 1
-                    res = body.get("resources", {})
-                    m = int(res.get("metal", {}).get("amount", 0))
-                    c = int(res.get("crystal", {}).get("amount", 0))
-                    d = int(res.get("deuterium", {}).get("amount", 0))
-                    self.METAL += m
-                    self.CRYSTAL += c
-                    self.DEUTERIUM += d
-                    cur.execute(f"INSERT OR REPLACE INTO debris {sql_insert_values(TABLE_DEBRIS)}", (
-                        scan_id, pos,
-                        m, c, d,
-                        body.get("requiredShips")
-                    ))
-            
-            # ── si hubo luna, vincularla al planeta del slot
-            if moon_id:
-                cur.execute("""
-                    UPDATE planets
-                    SET moon_id = ?
-                    WHERE scan_id = ? AND planet_id IS NOT NULL
-                """, (moon_id, scan_id))
-
-        conn.commit()
-        return True, session_cookie
+        fresh = fresh_systems(conn, galaxy, since) if since is not None else set()
+        pending = [s for s in self.systems if s not in fresh]
+        if self.occupied_only:
+            pending = systems_needing_detail(conn, galaxy, pending)
+        return run_id, pending
 
     def run(self, threads=3):
-        systems_q = queue.Queue()
-        for s in self.systems:
-            systems_q.put(s)
+        started = time.perf_counter()
 
-        size = os.get_terminal_size()
+        conn = init_db(self.db_path)
+        systems_q = queue.Queue()
+        run_ids = {}
+        for galaxy in self.galaxies:
+            run_ids[galaxy], pending = self.plan_systems(conn, galaxy)
+            skipped = len(self.systems) - len(pending)
+            if skipped:
+                print(f"[GALAXY {galaxy}] {skipped} sistemas frescos salteados, {len(pending)} pendientes")
+            for s in pending:
+                systems_q.put((galaxy, s, 0))
+
+        size = shutil.get_terminal_size()
         total = systems_q.qsize()
 
         pbar = tqdm(
             total=total,
-            desc=f"G{self.galaxy} escaneando",
+            desc=f"G{self.label} escaneando",
             unit="sistem",
             ncols=size.columns - 2,
             position=0
         )
 
+        writer = GalaxyDBWriter(self.db_path, hooks=writer_hooks(self.db_path), on_written=self.on_written,
+                                on_batch=lambda seconds: self.metrics.observe("db_batch_seconds", seconds))
+        writer.start()
+        if self.archive_dir:
+            self.archive = ResponseArchive(self.archive_dir)
+        self.metrics.add_collector(writer_collector(writer))
+        self.metrics.add_collector(limiter_collector(GAME_LIMITER))
+        self.metrics.add_collector(sessions_collector(self.sessions))
+        flusher = MetricsFlusher(self.metrics, self.metrics_path) if self.metrics_path else None
+        if flusher is not None:
+            flusher.start()
+
+        logins = self.sessions.logins
+        self.sessions.observers.append(self.metrics.request)   # latencia del chequeo de sesión del login
         lock = threading.Lock()
         workers = []
 
         for tid in range(threads):
             t = threading.Thread(
                 target=self.worker_thread,
-                args=(tid, systems_q, pbar, lock),
+                args=(tid, systems_q, pbar, lock, writer),
                 daemon=True
             )
             t.start()
             workers.append(t)
 
-        for t in workers:
-            t.join()
-
+        interrupted = False
+        try:
+            for t in workers:
+                while t.is_alive():
+                    t.join(0.5)
+        except KeyboardInterrupt:
+            # Terminar el sistema en curso y dejar que el writer vacíe su lote
+            interrupted = True
+            self._stop.set()
+            for t in workers:
+                t.join()
+        # stop() desde otro thread (ej. la UI) también deja el escaneo para --resume
+        interrupted = interrupted or self._stop.is_set()
+        self.sessions.observers.remove(self.metrics.request)
+
+        writer.close()
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        if flusher is not None:
+            flusher.close()
         pbar.close()
 
+        if interrupted or self.failed:
+            # Con sistemas fallidos el scan_run queda abierto: --resume los vuelve a pedir
+            runs = ", ".join(f"#{run_id}" for run_id in run_ids.values())
+            reason = self.login_error or ("Interrumpido" if interrupted else f"{self.failed} sistemas fallidos")
+            print(f"\n[GALAXY {self.label}] {reason}: usar --resume para continuar ({runs})")
+        else:
+            for run_id in run_ids.values():
+                finish_scan_run(conn, run_id)
+        conn.close()
+        elapsed = time.perf_counter() - started
+        self.elapsed = elapsed
+        self.db_time = writer.db_time
+        self.write_stats = writer.stats
+        print(f"[GALAXY {self.label}] {total} sistemas en {elapsed:.1f}s ({total / max(elapsed, 1e-9):.2f} sistemas/s, {threads} threads, {self.sessions.logins - logins} logins, fallidos {self.failed})")
+        print(f"[DB] {writer.summary()}")
+
 
 # ─────────────────────────────
 # Main
 # ─────────────────────────────
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso:")
-        print("  python galaxy_worker.py <galaxia>")
-        print("  python galaxy_worker.py <galaxia> <sistema>")
-        print("  python galaxy_worker.py <galaxia> <inicio-fin>")
-        print("Want to scan all galaxies? Y/N")
-        answer = getch()
-        if answer.lower() == "y":
-            for galaxy in range(1, 6):
-                worker = GalaxyWorker(galaxy, None)
-                threads = min(3, os.cpu_count())
-                worker.run(threads=threads)
-        else:
-            sys.exit(1)
+    parser = argparse.ArgumentParser(description="Escaneo de galaxias", add_help=True)
+    parser.add_argument("galaxy", nargs="?", help="galaxia, rango inicio-fin o 'all' para 1-5")
+    parser.add_argument("systems", nargs="?", help="sistema o rango inicio-fin")
+    parser.add_argument("--max-age", help="saltear sistemas escaneados hace menos de esto (90s, 30m, 6h, 2d; sin unidad = horas)")
+    parser.add_argument("--resume", action="store_true", help="retomar el último escaneo interrumpido del mismo rango")
+    parser.add_argument("--capture", metavar="DIR", help="guardar las respuestas crudas en DIR para galaxy_replay / galaxy_bench")
+    parser.add_argument("--archive", metavar="DIR", help="archivar las respuestas crudas comprimidas en DIR (ver galaxy_archive)")
+    parser.add_argument("--occupied-only", action="store_true", help="solo sistemas con planetas, con escombros conocidos o sin datos (después de galaxy_bootstrap)")
+    parser.add_argument("--metrics", metavar="FILE", help="volcar métricas del escaneo cada 10s en FILE (.prom = Prometheus, si no JSON)")
+    parser.add_argument("--threads", type=int, default=min(3, os.cpu_count()), help="threads de red (el limitador ajusta la concurrencia real)")
+    args = parser.parse_args()
 
     try:
-        galaxy = int(sys.argv[1])
-        systems = None
-
-        if len(sys.argv) == 3:
-            systems = parse_systems_arg(sys.argv[2])
-
-        worker = GalaxyWorker(galaxy, systems)
-        threads = min(3, os.cpu_count())
-        worker.run(threads=threads)
+        max_age = parse_age_arg(args.max_age) if args.max_age else None
+        threads = args.threads
+
+        if args.galaxy is None:
+            print("Uso:")
+            print("  python -m workers.new_galaxy_worker <galaxia>")
+            print("  python -m workers.new_galaxy_worker <galaxia> <sistema>")
+            print("  python -m workers.new_galaxy_worker <galaxia> <inicio-fin>")
+            print("  python -m workers.new_galaxy_worker all")
+            print("  opciones: --max-age 6h  --resume  --capture fixtures/  --archive archive/  --occupied-only  --metrics scan.prom")
+            print("Want to scan all galaxies? Y/N")
+            answer = getch()
+            if answer.lower() != "y":
+                sys.exit(1)
+            worker = GalaxyWorker(range(1, 6), None, max_age=max_age, resume=args.resume, capture_dir=args.capture, archive_dir=args.archive, occupied_only=args.occupied_only, metrics_path=args.metrics)
+            worker.run(threads=threads)
+        else:
+            galaxies = parse_galaxies_arg(args.galaxy)
+            systems = parse_systems_arg(args.systems) if args.systems else None
+            worker = GalaxyWorker(galaxies, systems, max_age=max_age, resume=args.resume, capture_dir=args.capture, archive_dir=args.archive, occupied_only=args.occupied_only, metrics_path=args.metrics)
+            worker.run(threads=threads)
         close()
 
     except Exception as e:
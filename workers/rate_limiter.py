@@ -0,0 +1,167 @@
+"""
+Limitador compartido para todo el tráfico HTTP contra el servidor del juego.
+
+- Token bucket: `rate` requests por segundo con ráfagas de hasta `burst`.
+- Clases de prioridad: mientras haya alguien esperando con mayor prioridad, las clases
+  menores no toman tokens. El envío de flotas (PRIORITY_FLEET) nunca espera: toma su
+  token aunque el balde quede en negativo, y eso frena al escaneo.
+- AIMD sobre la concurrencia: +1/limit por respuesta sana, la mitad cuando sube la
+  latencia o aparece un error (como mucho una vez por `cooldown`).
+
+Uso:
+    with GAME_LIMITER.request(PRIORITY_SCAN) as req:
+        r = session.post(...)
+        req.ok = healthy(r.status_code)
+"""
+import asyncio, threading, time
+from contextlib import contextmanager, asynccontextmanager
+
+PRIORITY_FLEET = 0
+PRIORITY_MESSAGES = 1
+PRIORITY_SCAN = 2
+PRIORITY_NAMES = {PRIORITY_FLEET: "fleet", PRIORITY_MESSAGES: "messages", PRIORITY_SCAN: "scan"}
+
+def healthy(status_code):
+    """429 y 5xx indican que el servidor está cargado; el resto no cuenta como error para AIMD."""
+    return status_code < 500 and status_code != 429
+
+class Ticket:
+    """Un request en vuelo. Poner ok=False si la respuesta fue un error (5xx, 429, sesión caída)."""
+    def __init__(self, priority, started):
+        self.priority = priority
+        self.started = started
+        self.ok = True
+
+class GameRateLimiter:
+    def __init__(self, rate=8.0, burst=8, concurrency=3, min_concurrency=1, max_concurrency=16,
+                 target_latency=1.5, cooldown=2.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.limit = float(concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.waiting = {p: 0 for p in PRIORITY_NAMES}
+        self.cond = threading.Condition()
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+
+        self.latency = 0.0      # EWMA en segundos
+        self.error_rate = 0.0   # EWMA de errores
+        self.requests = {p: 0 for p in PRIORITY_NAMES}
+        self.decreases = 0
+
+    # ── token bucket
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _can_take(self, priority):
+        if priority == PRIORITY_FLEET:
+            return True
+        if any(self.waiting[p] for p in PRIORITY_NAMES if p < priority):
+            return False
+        return self.tokens >= 1 and self.in_flight < int(self.limit)
+
+    def _take(self, priority):
+        self.tokens -= 1
+        self.in_flight += 1
+        self.requests[priority] += 1
+        return Ticket(priority, time.monotonic())
+
+    def _wait_time(self):
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.5  # esperando concurrencia o prioridad: lo despierta un release()
+
+    def acquire(self, priority=PRIORITY_SCAN):
+        with self.cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    self._refill()
+                    if self._can_take(priority):
+                        return self._take(priority)
+                    self.cond.wait(self._wait_time())
+            finally:
+                self.waiting[priority] -= 1
+
+    async def acquire_async(self, priority=PRIORITY_SCAN):
+        with self.cond:
+            self.waiting[priority] += 1
+        try:
+            while True:
+                with self.cond:
+                    self._refill()
+                    if self._can_take(priority):
+                        return self._take(priority)
+                    wait = self._wait_time()
+                await asyncio.sleep(min(wait, 0.05))
+        finally:
+            with self.cond:
+                self.waiting[priority] -= 1
+
+    def release(self, ticket):
+        latency = time.monotonic() - ticket.started
+        with self.cond:
+            self.in_flight -= 1
+            self._aimd(latency, ticket.ok)
+            self.cond.notify_all()
+
+    # ── AIMD
+
+    def _aimd(self, latency, ok):
+        self.latency = latency if not self.latency else 0.8 * self.latency + 0.2 * latency
+        self.error_rate = 0.9 * self.error_rate + 0.1 * (0 if ok else 1)
+
+        now = time.monotonic()
+        if not ok or latency > self.target_latency:
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._last_decrease = now
+                self.decreases += 1
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    @contextmanager
+    def request(self, priority=PRIORITY_SCAN):
+        ticket = self.acquire(priority)
+        try:
+            yield ticket
+        except Exception:
+            ticket.ok = False
+            raise
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def request_async(self, priority=PRIORITY_SCAN):
+        ticket = await self.acquire_async(priority)
+        try:
+            yield ticket
+        except Exception:
+            ticket.ok = False
+            raise
+        finally:
+            self.release(ticket)
+
+    def snapshot(self):
+        with self.cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "tokens": round(self.tokens, 2),
+                "latency": round(self.latency, 3),
+                "error_rate": round(self.error_rate, 3),
+                "decreases": self.decreases,
+                "requests": {PRIORITY_NAMES[p]: n for p, n in self.requests.items()},
+            }
+
+# Instancia compartida por el scanner, los mensajes y el envío de flotas del mismo proceso
+GAME_LIMITER = GameRateLimiter()
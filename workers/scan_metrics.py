@@ -0,0 +1,234 @@
+"""
+Métricas del scanner en un archivo que se puede graficar.
+
+Las barras de tqdm por thread mostraban el último sistema y su tiempo, y nada más. Acá
+cada escaneo acumula:
+
+- histogramas de latencia por endpoint (fetchGalaxyContent y el chequeo de sesión del
+  login), de decode y de cada transacción del writer, con buckets propios (BUCKETS);
+- requests por endpoint y código HTTP, bytes recibidos, errores por tipo, reintentos,
+  re-logins y sistemas escaneados;
+- lo que exponen los "collectors" al momento de volcar: tiempo de DB, filas escritas y
+  evitadas del GalaxyDBWriter, estado del GAME_LIMITER, logins del SessionManager.
+
+`MetricsFlusher` escribe el estado cada `interval` segundos (reemplazo atómico): en texto
+de Prometheus si el archivo termina en .prom o .txt (node_exporter textfile), en JSON si no.
+
+Uso (desde la raíz del repo):
+    python -m workers.new_galaxy_worker all --metrics scan_metrics.prom
+    python -m workers.galaxy_async all --metrics scan_metrics.json
+"""
+import bisect, json, os, threading, time
+
+PREFIX = "ogame_scan"
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# El decode de un sistema tarda 0.1-0.4 ms y una transacción del writer pocos ms: con
+# LATENCY_BUCKETS todo caería en el primer bucket
+DECODE_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01)
+DB_BUCKETS = (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BUCKETS = {"decode_seconds": DECODE_BUCKETS, "db_batch_seconds": DB_BUCKETS}
+
+HELP = {
+    "request_seconds": "Latencia de los requests al juego por endpoint",
+    "decode_seconds": "Tiempo de decode de cada respuesta",
+    "db_batch_seconds": "Tiempo de cada transacción del writer",
+    "requests_total": "Requests por endpoint y código HTTP",
+    "received_bytes_total": "Bytes de respuesta recibidos",
+    "errors_total": "Excepciones por tipo",
+    "retries_total": "Reintentos de un sistema",
+    "relogins_total": "Respuestas que no eran JSON (sesión caída)",
+    "systems_total": "Sistemas escaneados por resultado",
+}
+
+class Histogram:
+    """Buckets fijos (en segundos), acumulados recién al exportar."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total, result = 0, []
+        for le, n in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += n
+            result.append((le, total))
+        return result
+
+    def quantile(self, q):
+        """Cota superior del bucket donde cae el cuantil `q` (None sin datos)."""
+        if not self.count:
+            return None
+        for le, total in self.cumulative():
+            if total >= q * self.count:
+                return le
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}" if items else ""
+
+class ScanMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}      # (nombre, labels) -> valor
+        self.histograms = {}    # (nombre, labels) -> Histogram
+        self.collectors = []    # funciones sin argumentos -> {nombre: valor}
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(BUCKETS.get(name, LATENCY_BUCKETS))
+            self.histograms[key].observe(seconds)
+
+    def request(self, endpoint, seconds, status, size):
+        """Un request terminado: latencia, código HTTP y bytes recibidos."""
+        self.observe("request_seconds", seconds, endpoint=endpoint)
+        self.inc("requests_total", endpoint=endpoint, status=status)
+        self.inc("received_bytes_total", size, endpoint=endpoint)
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def gauges(self):
+        values = {}
+        for collector in self.collectors:
+            try:
+                values.update(collector())
+            except Exception as e:
+                values[f"collector_error_{type(e).__name__}"] = 1
+        return values
+
+    # ── exportar
+
+    def to_dict(self):
+        gauges = self.gauges()
+        with self.lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name, "labels": dict(labels), "count": h.count, "sum": round(h.sum, 6),
+                    "p50": h.quantile(0.5), "p99": h.quantile(0.99),
+                    "buckets": {("+Inf" if le == float("inf") else str(le)): n for le, n in h.cumulative()},
+                }
+                for (name, labels), h in sorted(self.histograms.items())
+            ]
+        return {"ts": time.time(), "uptime": round(time.time() - self.started, 1),
+                "counters": counters, "histograms": histograms, "gauges": gauges}
+
+    def to_prometheus(self):
+        lines, typed = [], set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                base = name[len(PREFIX) + 1:]
+                if base in HELP:
+                    lines.append(f"# HELP {name} {HELP[base]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        gauges = self.gauges()
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                full = f"{PREFIX}_{name}"
+                header(full, "counter")
+                lines.append(f"{full}{format_labels(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                full = f"{PREFIX}_{name}"
+                header(full, "histogram")
+                for le, n in h.cumulative():
+                    le = "+Inf" if le == float("inf") else le
+                    lines.append(f"{full}_bucket{format_labels(labels, [('le', le)])} {n}")
+                lines.append(f"{full}_sum{format_labels(labels)} {h.sum:.6f}")
+                lines.append(f"{full}_count{format_labels(labels)} {h.count}")
+        for name, value in sorted(gauges.items()):
+            full = f"{PREFIX}_{name}"
+            header(full, "gauge")
+            lines.append(f"{full} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Reemplaza `path` de forma atómica: quien lo lea nunca ve un archivo a medias."""
+        prometheus = os.path.splitext(path)[1] in (".prom", ".txt")
+        text = self.to_prometheus() if prometheus else json.dumps(self.to_dict(), indent=2)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+# ─────────────────────────────
+# Collectors
+# ─────────────────────────────
+
+def writer_collector(writer):
+    """Tiempo de DB y filas del GalaxyDBWriter."""
+    return lambda: {
+        "db_seconds_total": round(writer.db_time, 6),
+        "db_batches_total": writer.batches,
+        "db_systems_total": writer.systems,
+        "db_systems_unchanged_total": writer.stats.unchanged,
+        "db_rows_written_total": writer.stats.rows_written,
+        "db_rows_skipped_total": writer.stats.rows_skipped,
+        "db_queue_size": writer.q.qsize(),
+    }
+
+def limiter_collector(limiter):
+    def collect():
+        snap = limiter.snapshot()
+        return {
+            "limiter_concurrency": snap["limit"],
+            "limiter_in_flight": snap["in_flight"],
+            "limiter_tokens": snap["tokens"],
+            "limiter_latency_seconds": snap["latency"],
+            "limiter_error_rate": snap["error_rate"],
+            "limiter_decreases_total": snap["decreases"],
+        }
+    return collect
+
+def sessions_collector(sessions):
+    return lambda: {"logins_total": sessions.logins}
+
+# ─────────────────────────────
+# Volcado periódico
+# ─────────────────────────────
+
+class MetricsFlusher(threading.Thread):
+    """Escribe `metrics` en `path` cada `interval` segundos y una última vez al cerrar."""
+    def __init__(self, metrics, path, interval=10.0):
+        super().__init__(daemon=True)
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._closed = threading.Event()
+
+    def run(self):
+        while not self._closed.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        try:
+            self.metrics.write(self.path)
+        except OSError as e:
+            print(f"\n[METRICS] No se pudo escribir {self.path}: {e}")
+
+    def close(self):
+        self._closed.set()
+        self.join()
+        self.flush()
@@ -0,0 +1,255 @@
+"""
+Sesión compartida contra el servidor del juego.
+
+Antes cada thread llamaba a `ensure_logged_in`: releía y desencriptaba la base de cookies
+de Chrome con browser_cookie3 y hacía un GET completo a la galaxia cada vez que una
+respuesta no era JSON, así que N threads podían disparar N re-logins a la vez.
+
+`SessionManager` mantiene, por perfil:
+- un único cookie jar, compartido por todos los clientes: la rotación de prsess_100170
+  que manda el servidor queda aplicada para todos a la vez;
+- un único pool de conexiones (HTTPAdapter de tamaño `pool_size`);
+- el jar de Chrome cacheado: solo se vuelve a desencriptar si cambió el archivo Cookies;
+- re-login single-flight: el primero que ve la sesión caída re-loguea y el resto espera
+  ese login en vez de repetirlo.
+
+Uso:
+    sessions = session_manager()
+    session = sessions.client()                  # requests.Session con jar y pool compartidos
+    gen = sessions.ensure_logged_in()
+    ...
+    gen = sessions.relogin(gen)                  # la respuesta no fue JSON
+
+Con `stop` (threading.Event) o `max_attempts`, el login deja de reintentar y levanta
+LoginError: así un escaneo cancelable no queda girando con una sesión inválida.
+"""
+import os, threading, time
+import requests, browser_cookie3
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://s163-ar.ogame.gameforge.com/game/index.php"
+# profile_data vive en la raíz del repo (equivale a "..\profile_data" corriendo desde workers/)
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profile_data")
+SESSION_COOKIE = "prsess_100170"
+
+HEADERS = {
+    "X-Requested-With": "XMLHttpRequest",
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "Referer": "https://s163-ar.ogame.gameforge.com/game/index.php?page=ingame&component=galaxy",
+    "Origin": "https://s163-ar.ogame.gameforge.com",
+}
+
+class LoginError(Exception):
+    """El login se canceló (`stop`) o agotó sus intentos."""
+
+# ─────────────────────────────
+# Cookies del navegador
+# ─────────────────────────────
+
+def load_browser_cookies(profile_path):
+    return browser_cookie3.chrome(
+        cookie_file=f"{profile_path}/Cookies",
+        domain_name="ogame.gameforge.com"
+    )
+
+def load_ogame_session(profile_path):
+    """Session suelta con las cookies de Chrome (sin pool ni jar compartidos)."""
+    session = requests.Session()
+    session.cookies.update(load_browser_cookies(profile_path))
+    session.headers.update(HEADERS)
+    return session
+
+def ensure_logged_in(profile_name, galaxy=None, retry_wait=10):
+    """Login por thread, sin coordinación. Los scanners usan SessionManager."""
+    while True:
+        session = load_ogame_session(profile_name)
+        try:
+            r = session.get(f"{BASE_URL}?page=ingame&component=galaxy", timeout=10)
+            if "component=galaxy" in r.text:
+                if galaxy is not None:
+                    print(f"\r\r[GALAXY {galaxy}] Logged   ", end='')
+                return session
+        except Exception as e:
+            print(f"\n[LOGIN] Error: {e}")
+
+        if galaxy is not None:
+            print(f"\r[GALAXY {galaxy}] Login...", end='')
+        time.sleep(retry_wait)
+
+# ─────────────────────────────
+# Session manager
+# ─────────────────────────────
+
+class SessionManager:
+    def __init__(self, profile_path=PROFILE_PATH, base_url=None, pool_size=16, retry_wait=10, cookie_loader=None):
+        self.profile_path = profile_path
+        self.base_url = base_url or BASE_URL
+        self.retry_wait = retry_wait
+        self.cookie_loader = cookie_loader
+
+        self.jar = requests.cookies.RequestsCookieJar()
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+
+        self.observers = []   # observer(endpoint, segundos, status, bytes) por cada chequeo de sesión (ver ScanMetrics.request)
+        self.generation = 0
+        self.logins = 0
+        self.cookie_reads = 0
+        self._loaded = False
+        self._cookie_mtime = None
+        self._lock = threading.Lock()          # login / re-login (single-flight)
+        self._cookie_lock = threading.Lock()   # solo la relectura de Cookies: nunca se toma durante un login entero
+        self._ready = threading.Event()
+        self._ready.set()
+
+    # ── cookies
+
+    def _cookies_file(self):
+        return os.path.join(self.profile_path, "Cookies")
+
+    def _read_cookies(self, force=False):
+        """Carga el jar de Chrome en el jar compartido. Sin `force`, solo si el archivo cambió."""
+        with self._cookie_lock:
+            self._read_cookies_locked(force)
+
+    def _read_cookies_locked(self, force):
+        if self.cookie_loader is not None:
+            if force or not self._loaded:
+                self.jar.update(self.cookie_loader())
+                self.cookie_reads += 1
+            self._loaded = True
+            return
+
+        try:
+            mtime = os.path.getmtime(self._cookies_file())
+        except OSError:
+            mtime = None
+        if self._loaded and not force and mtime == self._cookie_mtime:
+            return
+        self.jar.update(load_browser_cookies(self.profile_path))
+        self._cookie_mtime = mtime
+        self._loaded = True
+        self.cookie_reads += 1
+
+    def cookies(self):
+        """{nombre: valor} del jar compartido (para clientes que no son requests, ej. aiohttp)."""
+        return {c.name: c.value for c in list(self.jar)}
+
+    def rotate(self, value, name=SESSION_COOKIE):
+        """Aplica una cookie de sesión rotada en el jar compartido, con el dominio que ya tenía."""
+        current = [c for c in list(self.jar) if c.name == name]
+        if current and all(c.value == value for c in current):
+            return
+        # El jar tiene su propio lock: no esperar a un re-login en curso
+        if current:
+            for c in current:
+                self.jar.set(name, value, domain=c.domain, path=c.path)
+        else:
+            self.jar.set(name, value)
+
+    # ── clientes
+
+    def client(self, headers=None):
+        """
+        requests.Session con el jar y el pool compartidos y headers propios. Cada llamada
+        revisa el archivo Cookies de Chrome: quien nunca re-loguea (fleet_sender, messages)
+        igual recibe la sesión que renovó el navegador. Mientras hay un re-login en curso no
+        relee nada: el login ya relee Cookies y comparte el jar.
+        """
+        if self._ready.is_set():
+            self._read_cookies()
+        return self._client(headers)
+
+    def _client(self, headers=None):
+        session = requests.Session()
+        session.cookies = self.jar
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        session.headers.update(HEADERS)
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    # ── login
+
+    def _valid(self):
+        start = time.perf_counter()
+        try:
+            r = self._client().get(f"{self.base_url}?page=ingame&component=galaxy", timeout=10)
+            self._observe(time.perf_counter() - start, r.status_code, len(r.content))
+            return "component=galaxy" in r.text
+        except Exception as e:
+            self._observe(time.perf_counter() - start, "error", 0)
+            print(f"\n[LOGIN] Error: {e}")
+            return False
+
+    def _observe(self, seconds, status, size):
+        for observer in list(self.observers):
+            observer("sessionCheck", seconds, status, size)
+
+    def _login(self, label=None, stop=None, max_attempts=None):
+        """
+        Primero con las cookies actuales (pudo ser un error transitorio), después releyendo Chrome.
+        Sin `stop` ni `max_attempts` reintenta para siempre; si no, levanta LoginError.
+        """
+        force = False
+        attempts = 0
+        while True:
+            if stop is not None and stop.is_set():
+                raise LoginError("Login cancelado")
+            if self._valid():
+                if label is not None:
+                    print(f"\r\r[GALAXY {label}] Logged   ", end='')
+                break
+            if label is not None:
+                print(f"\r[GALAXY {label}] Login...", end='')
+            self._read_cookies(force=force)
+            if self._valid():
+                break
+            force = True
+            attempts += 1
+            if max_attempts is not None and attempts >= max_attempts:
+                raise LoginError(f"Sesión inválida después de {attempts} intentos de login")
+            if stop is not None:
+                stop.wait(self.retry_wait)
+            else:
+                time.sleep(self.retry_wait)
+        self.generation += 1
+        self.logins += 1
+
+    def ensure_logged_in(self, label=None, stop=None, max_attempts=None):
+        """Valida la sesión una vez para todos. Devuelve la generación actual."""
+        with self._lock:
+            if self.generation == 0:
+                self._read_cookies()
+                self._relogin_locked(label, stop, max_attempts)
+            return self.generation
+
+    def relogin(self, seen_gen, label=None, stop=None, max_attempts=None):
+        """Re-login single-flight: solo si nadie lo hizo desde `seen_gen`. Devuelve la generación nueva."""
+        with self._lock:
+            if seen_gen == self.generation:
+                self._relogin_locked(label, stop, max_attempts)
+            return self.generation
+
+    def _relogin_locked(self, label, stop=None, max_attempts=None):
+        self._ready.clear()
+        try:
+            self._login(label, stop, max_attempts)
+        finally:
+            self._ready.set()
+
+    def wait_ready(self, timeout=None):
+        """Bloquea mientras otro thread está re-logueando."""
+        return self._ready.wait(timeout)
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def session_manager(profile_path=PROFILE_PATH):
+    """SessionManager compartido por todo el proceso para este perfil."""
+    key = os.path.abspath(profile_path)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = SessionManager(profile_path)
+        return _managers[key]